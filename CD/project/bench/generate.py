@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Generates synthetic C-minus programs for the front end benchmarks.
+
+Declarations are derived at random from the grammar of phase2/project2/parser_rules.py,
+so the programs are valid for the LL(1) parser. With an error rate, tokens of expression
+and return statements are replaced, dropped or doubled and invalid characters and numbers
+are mixed in, giving lexical and syntax errors the parser recovers from. Comments, one
+line and multi line, are put between the declarations.
+
+Deriving a declaration is slow next to writing it, so a pool of POOL_SIZE declarations
+is derived once and large outputs repeat random picks from it.
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import Dict, IO, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "phase2" / "project2"))
+from parser_rules import grammar  # noqa: E402
+
+EPSILON = "EPSILON"
+POOL_SIZE = 2000 # declarations derived for one output
+MAX_DEPTH = 40 # non-terminal nesting from which on only the cheapest production is taken
+NAMES = ["x", "y", "i", "j", "n", "count", "total", "tmp", "arr", "buf", "value", "sum", "k", "result"]
+# the lexical errors an error puts in place of a token
+BAD_TOKENS = ["@", "$", "#x", "12ab", "3$", "a@b", "%", "~", "^", "\\", "1d"]
+KEYWORDS = {"if", "else", "repeat", "until", "return", "break", "int", "void"}
+OPERATORS = {"=", "<", "==", "+", "-", "*"}
+SIZE_UNITS = {"": 1, "B": 1, "K": 1 << 10, "KB": 1 << 10, "M": 1 << 20, "MB": 1 << 20, "G": 1 << 30, "GB": 1 << 30}
+
+
+def parse_size(text: str) -> int:
+    """Parses a size like 1K, 10MB or 500M to a number of bytes."""
+    text = text.strip().upper()
+    number = text.rstrip("KMGB")
+    unit = text[len(number):]
+    if not number or unit not in SIZE_UNITS:
+        raise ValueError(f"bad size {text!r}, expected a number with K, M or G")
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+def costs(grammar: Dict[str, List[List[str]]]) -> Dict[str, int]:
+    """Number of terminals of the smallest derivation of every non-terminal."""
+    cost = {A: float("inf") for A in grammar}
+    changed = True
+    while changed:
+        changed = False
+        for A, productions in grammar.items():
+            for production in productions:
+                c = sum(cost.get(sym, 1) for sym in production if sym != EPSILON)
+                if c < cost[A]:
+                    cost[A] = c
+                    changed = True
+    return cost
+
+
+class Generator:
+    """Random derivations of the grammar, one declaration at a time."""
+
+    def __init__(self, seed: int = 0, error_rate: float = 0.0):
+        self.rng = random.Random(seed)
+        self.error_rate = error_rate
+        cost = costs(grammar)
+        # the production with the smallest derivation, taken when the nesting is too deep
+        self.cheapest = {A: min(productions, key=lambda p: sum(cost.get(sym, 1) for sym in p if sym != EPSILON))
+                         for A, productions in grammar.items()}
+
+    def terminal(self, symbol: str) -> str:
+        """The text of a terminal."""
+        rng = self.rng
+        if symbol == "ID":
+            return f"{rng.choice(NAMES)}{rng.randrange(100)}"
+        if symbol == "NUM":
+            return str(rng.randrange(1000))
+        return symbol
+
+    def derive(self, symbol: str, depth: int, out: List[str]):
+        """Appends the terminals of a random derivation of symbol to out."""
+        productions = grammar.get(symbol)
+        if productions is None:
+            out.append(self.terminal(symbol))
+            return
+        rng = self.rng
+        # deeper down the cheapest production gets more likely, which keeps expressions short
+        production = self.cheapest[symbol] if rng.random() * MAX_DEPTH < depth else rng.choice(productions)
+        for sym in production:
+            if sym != EPSILON:
+                self.derive(sym, depth + 1, out)
+
+    def spoil(self, tokens: List[str]) -> List[str]:
+        """Puts errors into the tokens, every token is hit with the error rate.
+
+        Only operands and operators of expression and return statements are hit: panic
+        mode recovery after a broken declaration, bracket or keyword often loses track of
+        the braces, and a '}' too many ends the program for the parser, which would then
+        skip the rest of the input.
+        """
+        rng, rate = self.rng, self.error_rate
+        spoiled = []
+        depth = 0 # braces open
+        start = True # the next token starts a statement
+        hit = False # the statement may get errors
+        for token in tokens:
+            if token in ("{", "}", ";"):
+                depth += {"{": 1, "}": -1, ";": 0}[token]
+                start = True
+            elif start:
+                hit = token == "return" or token == "(" or token[0].isalnum() and token not in KEYWORDS
+                start = False
+            if (depth == 0 or start or not hit or rng.random() >= rate or
+                    not (token[0].isalnum() and token not in KEYWORDS or token in OPERATORS)):
+                spoiled.append(token)
+                continue
+            error = rng.randrange(4)
+            if error == 0: # a lexical error instead of the token
+                spoiled.append(rng.choice(BAD_TOKENS))
+            elif error == 1: # a lexical error next to it
+                spoiled.extend((token, rng.choice(BAD_TOKENS)))
+            elif error == 2: # the token is missing
+                pass
+            else: # the token twice
+                spoiled.extend((token, token))
+        return spoiled
+
+    def declaration(self) -> str:
+        """The text of a random declaration, one statement per line."""
+        tokens: List[str] = []
+        self.derive("Declaration", 0, tokens)
+        if self.error_rate:
+            tokens = self.spoil(tokens)
+        lines, line, indent = [], [], 0
+        for token in tokens:
+            if token == "}":
+                if line:
+                    lines.append("    " * indent + " ".join(line))
+                    line = []
+                indent = max(indent - 1, 0)
+            line.append(token)
+            if token in (";", "{", "}"):
+                lines.append("    " * indent + " ".join(line))
+                line = []
+                if token == "{":
+                    indent += 1
+        if line:
+            lines.append("    " * indent + " ".join(line))
+        return "\n".join(lines) + "\n"
+
+    def comment(self) -> str:
+        """A comment to put between two declarations, or nothing."""
+        rng = self.rng
+        kind = rng.randrange(8)
+        if kind == 0:
+            return f"/* {rng.choice(NAMES)} {rng.randrange(100)} */\n"
+        if kind == 1:
+            return "/*\n" + "".join(f" * {rng.choice(NAMES)} = {rng.randrange(100)};\n" for _ in range(rng.randrange(1, 4))) + " */\n"
+        return ""
+
+    def write(self, out: IO[str], size: int) -> int:
+        """Writes declarations to out until size characters are written, returns the count."""
+        pool: List[str] = []
+        written = 0
+        while written < size:
+            if len(pool) < POOL_SIZE:
+                text = self.comment() + self.declaration()
+                pool.append(text)
+            else:
+                text = self.rng.choice(pool)
+            out.write(text)
+            written += len(text)
+        return written
+
+
+def generate(path: Path, size: int, seed: int = 0, error_rate: float = 0.0) -> Path:
+    """Writes a program of about size bytes to path, returns path."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="ascii", newline="\n") as f:
+        Generator(seed, error_rate).write(f, size)
+    return path
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    args.add_argument("size", help="size of the program, like 1K, 10M or 500M")
+    args.add_argument("-o", "--output", default="input.txt", help="file to write (default: input.txt)")
+    args.add_argument("--errors", type=float, default=0.0, help="probability of an error at every token (default: 0)")
+    args.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    options = args.parse_args()
+    generate(Path(options.output), parse_size(options.size), options.seed, options.errors)
+
+
+if __name__ == "__main__":
+    main()
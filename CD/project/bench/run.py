@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Benchmarks the scanners and parsers of the project on generated C-minus programs.
+
+Every implementation runs in its own process (they all have a scanner.py or a parser.py
+of their own), once per input size, and reports its best time of --repeat runs, the
+tokens and parse tree nodes it produced and the peak RSS of the process. The results
+and the scaling of every implementation over the sizes are written to a JSON file, which
+a later run can compare against with --baseline.
+
+The cold start of every implementation is measured on a tiny input: the wall time of a
+fresh process, and the first run in it, which imports the implementation and loads its
+tables. A short compile pays both on every call.
+"""
+import argparse
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from generate import generate, parse_size
+
+BENCH = Path(__file__).resolve().parent
+ROOT = BENCH.parent # CD/project
+DATA = BENCH / "data"
+RESULTS = BENCH / "results"
+COLD_START_INPUT = "void main(void) {\n    int x;\n    x = 1;\n}\n"
+
+
+def count_nodes(tree) -> int:
+    """Number of nodes of a Node tree, epsilon leaves included."""
+    count, stack = 0, [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def scan_phase1(path: str) -> Tuple[int, int]:
+    from compiler import scan
+    with open(path) as f:
+        return sum(1 for item in scan(f) if item[0] not in ("ERROR", "FIN")), 0
+
+
+def scan_project1(path: str) -> Tuple[int, int]:
+    from scanner import scanner_for
+    from utils import map_input_file
+    return sum(1 for _ in scanner_for(map_input_file(path)).token_stream()), 0
+
+
+def scan_project2(path: str) -> Tuple[int, int]:
+    from preprocess import preprocess, process_invalid
+    from scanner import getNextToken
+    with open(path) as f:
+        _, code = process_invalid(preprocess(f.read()))
+    return sum(1 for token in getNextToken(code) if token[0] != "FIN"), 0
+
+
+def scan_project2_frontend(path: str) -> Tuple[int, int]:
+    from frontend import scan
+    with open(path) as f:
+        return sum(1 for item in scan(f) if item[0] not in ("ERROR", "FIN")), 0
+
+
+def scan_matin(path: str) -> Tuple[int, int]:
+    import re
+    from scanner import Scanner
+    with open(path, encoding="utf-8") as f:
+        code = re.sub(r"/\*[\s\S]*?\*/", " ", f.read()) # like its main
+    tokens_by_line, _ = Scanner(code).scan()
+    return sum(map(len, tokens_by_line.values())), 0
+
+
+def parse_project1(path: str) -> Tuple[int, int]:
+    from parser import Parser
+    from scanner import scanner_for
+    from utils import map_input_file
+    parser = Parser()
+    parser.reset()
+    tokens = 0
+    def counted(stream):
+        nonlocal tokens
+        for token in stream:
+            tokens += 1
+            yield token
+    parser.load_tokens(counted(scanner_for(map_input_file(path)).token_stream()))
+    tree = parser.parse()
+    return tokens, count_nodes(tree)
+
+
+def parse_project2(path: str, engine: str = "table") -> Tuple[int, int]:
+    from frontend import scan, split_errors
+    from parser import Parser
+    errors: list = []
+    tokens = 0
+    def counted(source):
+        nonlocal tokens
+        for token in split_errors(scan(source), errors):
+            tokens += 1
+            yield token
+    with open(path) as f:
+        parser = Parser(f, tokenizer=counted, engine=engine)
+    return tokens - 1, count_nodes(parser.tree)
+
+
+def parse_project2_descent(path: str) -> Tuple[int, int]:
+    return parse_project2(path, engine="descent")
+
+
+def parse_project2_mode(path: str, mode: str) -> Tuple[int, int]:
+    from frontend import scan, split_errors
+    from parser import Parser
+    from ast_nodes import ast_lines
+    errors: list = []
+    tokens = 0
+    def counted(source):
+        nonlocal tokens
+        for token in split_errors(scan(source), errors):
+            tokens += 1
+            yield token
+    with open(path) as f:
+        parser = Parser(f, tokenizer=counted, mode=mode)
+    return tokens - 1, sum(1 for _ in ast_lines(parser.ast)) if parser.ast is not None else 0
+
+
+# name: (directory under CD/project, what it does, function running it on a file)
+IMPLEMENTATIONS = {
+    "phase1": ("source/phase1", "scan", scan_phase1),
+    "project1": ("phase2/project1", "scan", scan_project1),
+    "project2": ("phase2/project2", "scan", scan_project2),
+    "project2-frontend": ("phase2/project2", "scan", scan_project2_frontend),
+    "matin": ("matin/compiler_project", "scan", scan_matin),
+    "project1-parser": ("phase2/project1", "parse", parse_project1),
+    "project2-parser": ("phase2/project2", "parse", parse_project2),
+    "project2-descent": ("phase2/project2", "parse", parse_project2_descent),
+    "project2-recognize": ("phase2/project2", "parse", partial(parse_project2_mode, mode="recognize")),
+    "project2-ast": ("phase2/project2", "parse", partial(parse_project2_mode, mode="ast")),
+}
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, None where it is not available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def worker(name: str, path: str, repeat: int):
+    """Runs one implementation on one file and prints its result as JSON."""
+    directory, _, run = IMPLEMENTATIONS[name]
+    sys.path.insert(0, str(ROOT / directory))
+    best = math.inf
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        tokens, nodes = run(path)
+        best = min(best, time.perf_counter() - start)
+    print(json.dumps({"seconds": best, "tokens": tokens, "nodes": nodes, "peak_rss": peak_rss()}))
+
+
+def measure(name: str, path: Path, repeat: int, timeout: float) -> Dict:
+    """Runs the worker of one implementation, returns its result or {"error": message}."""
+    try:
+        done = subprocess.run([sys.executable, __file__, "--worker", name, str(path), str(repeat)],
+                              capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timeout after {timeout:g} s"}
+    if done.returncode != 0:
+        lines = done.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {done.returncode}"}
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def cold_start(name: str, repeat: int, timeout: float) -> Dict:
+    """Best wall time of a process running one implementation once on a tiny input, and of that first run."""
+    path = DATA / "cold-start.txt"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(COLD_START_INPUT, encoding="utf-8")
+    wall, first = math.inf, math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = measure(name, path, 1, timeout)
+        if "error" in result:
+            return result
+        wall = min(wall, time.perf_counter() - start)
+        first = min(first, result["seconds"])
+    return {"wall": wall, "first_run": first}
+
+
+def interpreter_start(repeat: int) -> float:
+    """Best wall time of a process that does nothing, what a cold start costs at least."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scaling(points: List[Tuple[int, float]]) -> Optional[float]:
+    """Exponent k of seconds ~ bytes**k fitted to the points, 1 is linear."""
+    points = [(math.log(b), math.log(s)) for b, s in points if b > 0 and s > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    sxx = sum((x - mx) ** 2 for x, _ in points)
+    if sxx == 0:
+        return None
+    return sum((x - mx) * (y - my) for x, y in points) / sxx
+
+
+def git_commit() -> Optional[str]:
+    try:
+        done = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCH, capture_output=True, text=True)
+    except OSError:
+        return None
+    return done.stdout.strip() or None
+
+
+def compare(results: List[Dict], baseline_file: str, tolerance: float) -> int:
+    """Prints the throughput against a baseline run, returns the number of regressions."""
+    with open(baseline_file, encoding="utf-8") as f:
+        baseline = {(r["implementation"], r["size"], r["errors"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\nAgainst {baseline_file}:")
+    for r in results:
+        old = baseline.get((r["implementation"], r["size"], r["errors"]))
+        if old is None or "seconds" not in old or "seconds" not in r:
+            continue
+        ratio = old["seconds"] / r["seconds"]
+        regressed = ratio < 1 - tolerance
+        regressions += regressed
+        print(f"  {r['implementation']:18} {r['size']:>6} errors {r['errors']:<5g} {ratio:6.2f}x"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    args.add_argument("--sizes", default="1K,10K,100K,1M", help="input sizes, up to 500M (default: 1K,10K,100K,1M)")
+    args.add_argument("--impl", help=f"comma separated implementations (default: all of {', '.join(IMPLEMENTATIONS)})")
+    args.add_argument("--errors", default="0,0.05", help="error rates of the inputs (default: 0,0.05)")
+    args.add_argument("--seed", type=int, default=0, help="seed of the generated inputs (default: 0)")
+    args.add_argument("--repeat", type=int, default=3, help="runs of every measurement, the best counts (default: 3)")
+    args.add_argument("--timeout", type=float, default=600, help="seconds one measurement may take (default: 600)")
+    args.add_argument("--out", help="JSON file of the results (default: results/<date>.json)")
+    args.add_argument("--baseline", help="JSON results to compare with, regressions make the exit code 1")
+    args.add_argument("--tolerance", type=float, default=0.1, help="slowdown against the baseline that is a regression (default: 0.1)")
+    args.add_argument("--cold-repeat", type=int, default=10, help="fresh processes of every cold start measurement, the best counts (default: 10)")
+    args.add_argument("--worker", nargs=3, metavar=("IMPL", "FILE", "REPEAT"), help=argparse.SUPPRESS)
+    options = args.parse_args()
+    if options.worker:
+        name, path, repeat = options.worker
+        worker(name, path, int(repeat))
+        return
+
+    names = options.impl.split(",") if options.impl else list(IMPLEMENTATIONS)
+    unknown = [name for name in names if name not in IMPLEMENTATIONS]
+    if unknown:
+        args.error(f"unknown implementation {', '.join(unknown)}")
+    sizes = options.sizes.split(",")
+    rates = [float(rate) for rate in options.errors.split(",")]
+
+    results = []
+    print(f"{'implementation':18} {'size':>6} {'errors':>6} {'seconds':>9} {'tokens/s':>11} {'nodes/s':>11} {'MB/s':>7} {'RSS MiB':>8}")
+    for size in sizes:
+        for rate in rates:
+            path = DATA / f"c-minus-{size}-e{rate:g}-s{options.seed}.txt"
+            if not path.exists():
+                generate(path, parse_size(size), options.seed, rate)
+            n_bytes = path.stat().st_size
+            for name in names:
+                result = {"implementation": name, "kind": IMPLEMENTATIONS[name][1], "size": size,
+                          "bytes": n_bytes, "errors": rate}
+                result.update(measure(name, path, options.repeat, options.timeout))
+                results.append(result)
+                if "error" in result:
+                    print(f"{name:18} {size:>6} {rate:6g}  {result['error']}")
+                    continue
+                seconds = result["seconds"]
+                result["tokens_per_s"] = result["tokens"] / seconds
+                result["nodes_per_s"] = result["nodes"] / seconds
+                result["mb_per_s"] = n_bytes / seconds / 2 ** 20
+                rss = f"{result['peak_rss'] / 2 ** 20:8.1f}" if result["peak_rss"] else f"{'-':>8}"
+                nodes = f"{result['nodes_per_s']:11.0f}" if result["nodes"] else f"{'-':>11}"
+                print(f"{name:18} {size:>6} {rate:6g} {seconds:9.4f} {result['tokens_per_s']:11.0f} "
+                      f"{nodes} {result['mb_per_s']:7.2f} {rss}")
+
+    # seconds over bytes of every implementation and error rate
+    curves = {}
+    print("\nScaling (seconds ~ bytes^k):")
+    for name in names:
+        for rate in rates:
+            points = [(r["bytes"], r["seconds"]) for r in results
+                      if r["implementation"] == name and r["errors"] == rate and "seconds" in r]
+            k = scaling(points)
+            curves[f"{name} e{rate:g}"] = {"implementation": name, "errors": rate, "points": points, "exponent": k}
+            print(f"  {name:18} errors {rate:<5g} k = {k:.2f}" if k is not None else
+                  f"  {name:18} errors {rate:<5g} k = -")
+
+    # a fresh process per run, the implementation imports its modules and loads its tables from scratch
+    print(f"\nCold start (best of {options.cold_repeat} processes on a tiny input):")
+    interpreter = interpreter_start(options.cold_repeat)
+    cold = {"interpreter": interpreter}
+    print(f"  {'interpreter':18} {interpreter * 1000:8.1f} ms")
+    for name in names:
+        cold[name] = cold_start(name, options.cold_repeat, options.timeout)
+        if "error" in cold[name]:
+            print(f"  {name:18} {cold[name]['error']}")
+            continue
+        print(f"  {name:18} {cold[name]['wall'] * 1000:8.1f} ms, first run {cold[name]['first_run'] * 1000:7.1f} ms")
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeat": options.repeat,
+            "seed": options.seed,
+        },
+        "results": results,
+        "curves": curves,
+        "cold_start": cold,
+    }
+    out = Path(options.out) if options.out else RESULTS / f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults written to {out}")
+
+    if options.baseline and compare(results, options.baseline, options.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
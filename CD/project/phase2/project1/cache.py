@@ -0,0 +1,101 @@
+"""Content-addressed cache of the compiler outputs.
+
+The output files only depend on the input, the grammar and the code of the compiler, so
+they are stored under the hash of the three and copied out when the same input is compiled
+again, without scanning or parsing it. Every entry is a directory holding the output files,
+its modification time is the last use; the least recently used entries are evicted once
+the cache grows past its size limit.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+CACHE_DIR = Path(__file__).with_name("compile_cache")
+MAX_BYTES = 256 << 20 # size limit of the cache, the outputs of a large input are large too
+# modules whose code shapes the output files, a change to any of them is a new compiler version
+SOURCES = ["compiler.py", "scanner.py", "parser.py", "ll1.py", "nodes.py", "utils.py"]
+
+
+@lru_cache(maxsize=None)
+def compiler_version() -> str:
+    """Hash of the code of the compiler."""
+    h = hashlib.sha256()
+    here = Path(__file__).parent
+    for name in SOURCES:
+        h.update(name.encode("utf-8"))
+        h.update((here / name).read_bytes())
+    return h.hexdigest()
+
+
+def entry_size(entry: Path) -> int:
+    return sum(f.stat().st_size for f in entry.iterdir())
+
+
+class CompileCache:
+    """Output files of compiled inputs, stored by the hash of input, grammar and compiler."""
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def key(self, source, grammar_key: str) -> str:
+        """Key of a compile of source (bytes or a memory map) with the grammar of grammar_key."""
+        h = hashlib.sha256()
+        h.update(compiler_version().encode("ascii"))
+        h.update(grammar_key.encode("ascii"))
+        h.update(source)
+        return h.hexdigest()
+
+    def load(self, key: str, names: List[str], out_dir: str = ".") -> bool:
+        """Copies the cached output files of key into out_dir, returns False on a miss."""
+        entry = self.directory / key
+        try:
+            for name in names:
+                shutil.copyfile(entry / name, Path(out_dir) / name)
+            os.utime(entry) # used now, the last to evict
+        except OSError: # missing, incomplete or evicted meanwhile
+            return False
+        return True
+
+    def store(self, key: str, names: List[str], out_dir: str = "."):
+        """Copies the output files in out_dir into the cache as key and evicts old entries."""
+        entry = self.directory / key
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # copy into a temporary directory first, so an entry is never seen half written
+            staging = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.directory))
+            for name in names:
+                shutil.copyfile(Path(out_dir) / name, staging / name)
+            try:
+                staging.rename(entry)
+            except OSError: # stored by another process meanwhile
+                shutil.rmtree(staging, ignore_errors=True)
+            self.evict()
+        except OSError: # the cache is only an optimization
+            pass
+
+    def evict(self, max_bytes: Optional[int] = None):
+        """Removes the least recently used entries until the cache fits into max_bytes."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        for entry in self.directory.iterdir():
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry_size(entry), entry))
+            except OSError: # evicted by another process
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= limit:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Removes every entry."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Thin client of the compile server, the drop-in for compiler.py in builds.
+
+It only imports a few standard modules: the grammar, the parse table and the scanner stay
+in the server (server.py), so a launch costs little more than the interpreter start. If
+no server is listening it compiles in process like compiler.py.
+
+The server reads one JSON object per line and answers each with one line:
+
+    {"input": path, "out_dir": dir}    compile a file, write the outputs into dir
+    {"source": text, "return": true}   compile source text, return the outputs as "files"
+    {"command": "ping" | "shutdown"}
+
+An answer has "ok", "cached" for a compile and "error" when ok is false. Paths are
+resolved by the server, the client sends them absolute.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+from typing import BinaryIO, Dict, Optional
+
+SOCKET_PATH = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"cminus-compiler-{os.getuid()}.sock")
+
+
+def send(f: BinaryIO, message: dict):
+    f.write(json.dumps(message).encode("utf-8") + b"\n")
+    f.flush()
+
+
+def receive(f: BinaryIO) -> Optional[dict]:
+    """The next message, None once the other end closed the connection."""
+    line = f.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class Client:
+    """A connection to the compile server, requests are answered in order."""
+
+    def __init__(self, path: str = SOCKET_PATH):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.file = self.sock.makefile("rwb")
+
+    def request(self, message: dict) -> dict:
+        send(self.file, message)
+        response = receive(self.file)
+        if response is None:
+            raise ConnectionError("the compile server closed the connection")
+        return response
+
+    def compile_file(self, input_file: str, out_dir: str = ".") -> dict:
+        """Compiles input_file on the server, the outputs are written into out_dir."""
+        return self.request({"input": os.path.abspath(input_file), "out_dir": os.path.abspath(out_dir)})
+
+    def compile_source(self, source: str) -> dict:
+        """Compiles source text on the server, the outputs come back in "files"."""
+        return self.request({"source": source, "return": True})
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_files(files: Dict[str, str], out_dir: str = "."):
+    os.makedirs(out_dir, exist_ok=True)
+    for name, text in files.items():
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def compile_locally(input_file: str, out_dir: str, source: Optional[str]) -> int:
+    """Compiles in this process when there is no server, like compiler.py."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from compiler import compile_file, compile_source
+    from parser import Parser
+    from cache import CompileCache
+    os.makedirs(out_dir, exist_ok=True)
+    if source is None:
+        compile_file(input_file, Parser(), out_dir, CompileCache())
+    else:
+        compile_source(source.encode("utf-8"), Parser(), out_dir, CompileCache())
+    return 0
+
+
+def main():
+    args = argparse.ArgumentParser(description="Compiles a C-minus file on the compile server (see server.py).")
+    args.add_argument("input_file", nargs="?", default="input.txt", help="file to compile, - to read the source from stdin")
+    args.add_argument("--out", default=".", help="directory of the output files (default: .)")
+    args.add_argument("--socket", default=SOCKET_PATH, help=f"socket of the server (default: {SOCKET_PATH})")
+    args.add_argument("--no-fallback", action="store_true", help="fail instead of compiling in process when no server is listening")
+    args.add_argument("--shutdown", action="store_true", help="stop the server")
+    options = args.parse_args()
+
+    source = sys.stdin.read() if options.input_file == "-" else None
+    try:
+        client = Client(options.socket)
+    except OSError as e:
+        if options.shutdown or options.no_fallback:
+            print(f"No compile server at {options.socket}: {e}", file=sys.stderr)
+            sys.exit(2)
+        sys.exit(compile_locally(options.input_file, options.out, source))
+
+    with client:
+        if options.shutdown:
+            client.request({"command": "shutdown"})
+            return
+        if source is None:
+            response = client.compile_file(options.input_file, options.out)
+        else:
+            response = client.compile_source(source)
+            if response["ok"]:
+                write_files(response["files"], options.out)
+    if not response["ok"]:
+        print(f"Error during compilation: {response['error']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
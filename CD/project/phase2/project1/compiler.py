@@ -1,44 +1,165 @@
 #!/usr/bin/env python3
 """Main compiler script that coordinates the scanning and parsing process."""
+import argparse
+import multiprocessing
+import os
 import sys
+import time
 from pathlib import Path
-from scanner import Scanner
+from typing import List, Optional, Tuple
+from scanner import scanner_for
 from parser import Parser
+from utils import map_input_file
+from ll1 import grammar_hash
+from cache import CompileCache, CACHE_DIR, MAX_BYTES
+
+OUTPUT_FILES = ["tokens.txt", "lexical_errors.txt", "symbol_table.txt", "parse_tree.txt", "syntax_errors.txt"]
+
+# Parser of the batch workers, built once in the parent and inherited by the forked pool
+BATCH_PARSER: Optional[Parser] = None
+
+
+def compile_file(input_file: str, parser: Parser, out_dir: str = ".", cache: Optional[CompileCache] = None) -> bool:
+    """Compile one input file, writing the output files into out_dir.
+
+    With a cache, the outputs of an input compiled before are copied out of it instead.
+    Returns whether they were.
+    """
+    # Map the input once, one scan feeds both the parser and the scanner outputs
+    return compile_source(map_input_file(input_file), parser, out_dir, cache)
+
+
+def compile_source(source, parser: Parser, out_dir: str = ".", cache: Optional[CompileCache] = None) -> bool:
+    """Compile the bytes (or memory map) of an input, like compile_file."""
+    if cache is not None:
+        key = cache.key(source, grammar_hash(parser.grammar, parser.terminals))
+        if cache.load(key, OUTPUT_FILES, out_dir):
+            return True
+    parser.reset()
+    scanner = scanner_for(source)
+    tokens = scanner.token_stream()
+    parser.load_tokens(tokens)
+    parse_tree = parser.parse()
+    for _ in tokens:  # the parser may stop early, the outputs need the whole scan
+        pass
+    scanner.write_output_files(out_dir)
+    parser.write_output_files(parse_tree, out_dir)
+    if cache is not None:
+        cache.store(key, OUTPUT_FILES, out_dir)
+    return False
+
+
+def compare_outputs(case_dir: Path, out_dir: Path) -> List[str]:
+    """Names of the output files that differ from the expected file next to the input.
+
+    Line endings and trailing whitespace at the end of the file are ignored.
+    """
+    differ = []
+    for name in OUTPUT_FILES:
+        expected = case_dir / name
+        if not expected.exists():
+            continue
+        want = expected.read_text(encoding="utf-8").replace("\r\n", "\n").rstrip()
+        got = (out_dir / name).read_text(encoding="utf-8").rstrip()
+        if want != got:
+            differ.append(name)
+    return differ
+
+
+def init_batch_worker():
+    """Build the parser in a worker that did not inherit one (no fork on this platform)."""
+    global BATCH_PARSER
+    if BATCH_PARSER is None:
+        BATCH_PARSER = Parser()
+
+
+def compile_case(job: Tuple[str, str, bool, Optional[CompileCache]]):
+    """Compile one case of a batch, returns (input, seconds, error, differing files)."""
+    input_file, out_dir, diff, cache = job
+    start = time.perf_counter()
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+        compile_file(input_file, BATCH_PARSER, out_dir, cache)
+    except Exception as e:
+        return input_file, time.perf_counter() - start, str(e), []
+    elapsed = time.perf_counter() - start
+    differ = compare_outputs(Path(input_file).parent, Path(out_dir)) if diff else []
+    return input_file, elapsed, None, differ
+
+
+def batch(directory: str, out_root: str, diff: bool, jobs: Optional[int], cache: Optional[CompileCache] = None) -> int:
+    """Compile every input.txt under directory in a process pool, returns the exit code.
+
+    The outputs of DIR/<case>/input.txt go to OUT/<case>/. The parse table is built once
+    here, before the pool forks.
+    """
+    global BATCH_PARSER
+    root = Path(directory)
+    inputs = sorted(root.rglob("input.txt"))
+    if not inputs:
+        print(f"No input.txt under {directory}", file=sys.stderr)
+        return 1
+    work = [(str(inp), str(Path(out_root) / inp.parent.relative_to(root)), diff, cache) for inp in inputs]
+
+    start = time.perf_counter()
+    BATCH_PARSER = Parser()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    jobs = jobs or os.cpu_count() or 1
+    with context.Pool(jobs, initializer=init_batch_worker) as pool:
+        results = pool.map(compile_case, work, chunksize=1)
+    wall = time.perf_counter() - start
+
+    failed = [(inp, error) for inp, _, error, _ in results if error is not None]
+    mismatched = [(inp, differ) for inp, _, error, differ in results if differ]
+    cpu = sum(elapsed for _, elapsed, _, _ in results)
+    for inp, error in failed:
+        print(f"FAILED {inp}: {error}")
+    for inp, differ in mismatched:
+        print(f"DIFF   {inp}: {', '.join(differ)}")
+    print(f"Compiled {len(results)} cases in {wall:.2f} s with {jobs} processes "
+          f"({len(results) / wall:.1f} cases/s, {cpu:.2f} s of compile time)")
+    for inp, elapsed, _, _ in sorted(results, key=lambda r: -r[1])[:5]:
+        print(f"  {elapsed * 1000:8.1f} ms  {inp}")
+    if diff:
+        print(f"{len(results) - len(failed) - len(mismatched)} match the expected files, "
+              f"{len(mismatched)} differ, {len(failed)} failed")
+    return 1 if failed or (diff and mismatched) else 0
+
 
 def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument("input_file", nargs="?", default="input.txt")
+    args.add_argument("--batch", metavar="DIR", help="compile every input.txt under DIR in parallel")
+    args.add_argument("--out", default="batch_output", help="output directory of a batch (default: batch_output)")
+    args.add_argument("--diff", action="store_true", help="compare the batch outputs with the expected files")
+    args.add_argument("--jobs", type=int, help="worker processes of a batch (default: number of cores)")
+    args.add_argument("--no-cache", action="store_true", help="always compile, do not use or fill the compile cache")
+    args.add_argument("--cache-dir", default=str(CACHE_DIR), help="directory of the compile cache (default: compile_cache next to compiler.py)")
+    args.add_argument("--cache-size", type=int, default=MAX_BYTES >> 20, help=f"size limit of the compile cache in MiB (default: {MAX_BYTES >> 20})")
+    options = args.parse_args()
+    cache = None if options.no_cache else CompileCache(Path(options.cache_dir), options.cache_size << 20)
+    if options.batch:
+        sys.exit(batch(options.batch, options.out, options.diff, options.jobs, cache))
+
     # Initialize components
-    scanner = Scanner()
     parser = Parser()
-    
+
     try:
-        # Read input file
-        input_file = "input.txt"
-        if len(sys.argv) > 1:
-            input_file = sys.argv[1]
-        
-        # Process input through scanner
-        with open(input_file, 'r') as f:
-            input_text = f.read()
-        scanner.set_input(input_text)
-        scanner.process_input()
-        scanner.write_output_files()
-        
-        # Process tokens through parser
-        parser.load_input(input_file)
-        parse_tree = parser.parse()
-        parser.write_output_files(parse_tree)
-        
-        print("Compilation completed successfully.")
+        cached = compile_file(options.input_file, parser, cache=cache)
+
+        print("Compilation completed successfully." if not cached else
+              "Compilation completed successfully (unchanged input, outputs copied from the cache).")
         print("Output files generated:")
         print("- tokens.txt")
         print("- lexical_errors.txt")
         print("- symbol_table.txt")
         print("- parse_tree.txt")
         print("- syntax_errors.txt")
-        
+
     except Exception as e:
         print(f"Error during compilation: {e}", file=sys.stderr)
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,5 +1,6 @@
 # nodes.py
-from typing import List, Optional
+from array import array
+from typing import Iterator, List, Optional, Tuple, Union
 
 
 class Node:
@@ -17,4 +18,143 @@ class Node:
     def __repr__(self) -> str:
         if self.tok_type is None:
             return f"Node({self.symbol})"
-        return f"Node({self.tok_type}, {self.lexeme})"
\ No newline at end of file
+        return f"Node({self.tok_type}, {self.lexeme})"
+
+
+# Shared leaf for every epsilon expansion, never gets children or a token
+EPSILON_LEAF = Node("epsilon")
+
+
+class FlatTree:
+    """Parse tree as parallel int columns, one row per node, row 0 is the root.
+
+    symbol[i]: index of the node name in names
+    token[i]: index of (tok_type, lexeme) in tokens, -1 for non-terminals
+    first_child[i], next_sibling[i]: rows, -1 if there is none
+    """
+    __slots__ = ("names", "tokens", "symbol", "token", "first_child", "next_sibling")
+    
+    def __init__(self, names: List[str]):
+        self.names = names
+        self.tokens: List[Tuple[str, str]] = []
+        self.symbol = array("i")
+        self.token = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+    
+    def __len__(self) -> int:
+        return len(self.symbol)
+    
+    def add_node(self, symbol: int) -> int:
+        self.symbol.append(symbol)
+        self.token.append(-1)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        return len(self.symbol) - 1
+    
+    def add_child(self, parent: int, symbol: int) -> int:
+        row = self.add_node(symbol)
+        child = self.first_child[parent]
+        if child == -1:
+            self.first_child[parent] = row
+        else:
+            while self.next_sibling[child] != -1:
+                child = self.next_sibling[child]
+            self.next_sibling[child] = row
+        return row
+    
+    def node(self, row: int = 0) -> "FlatNode":
+        return FlatNode(self, row)
+
+
+class FlatNode:
+    """Read-only Node-like view of one FlatTree row."""
+    __slots__ = ("tree", "row")
+    
+    def __init__(self, tree: FlatTree, row: int):
+        self.tree = tree
+        self.row = row
+    
+    @property
+    def symbol(self) -> str:
+        return self.tree.names[self.tree.symbol[self.row]]
+    
+    @property
+    def tok_type(self) -> Optional[str]:
+        k = self.tree.token[self.row]
+        return None if k == -1 else self.tree.tokens[k][0]
+    
+    @property
+    def lexeme(self) -> Optional[str]:
+        k = self.tree.token[self.row]
+        return None if k == -1 else self.tree.tokens[k][1]
+    
+    @property
+    def children(self) -> List["FlatNode"]:
+        tree, nodes = self.tree, []
+        child = tree.first_child[self.row]
+        while child != -1:
+            nodes.append(FlatNode(tree, child))
+            child = tree.next_sibling[child]
+        return nodes
+    
+    def __repr__(self) -> str:
+        if self.tok_type is None:
+            return f"FlatNode({self.symbol})"
+        return f"FlatNode({self.tok_type}, {self.lexeme})"
+
+
+# Branch of a line / indent added for the children, indexed by is_last
+BRANCH = ("├── ", "└── ")
+INDENT = ("│   ", "    ")
+
+
+def tree_lines(node: Union[Node, FlatTree, FlatNode], prefix: str = "", is_last: bool = True) -> Iterator[str]:
+    """Yield the parse tree lines using an explicit stack instead of recursion.
+
+    Children of a node share one prefix string, built once per parent.
+    """
+    if isinstance(node, FlatTree):
+        node = node.node()
+    if isinstance(node, FlatNode):
+        yield from flat_tree_lines(node.tree, node.row, prefix, is_last)
+        return
+    stack = [(node, prefix, is_last)]
+    while stack:
+        node, prefix, is_last = stack.pop()
+        if prefix == "":
+            yield node.symbol
+        elif node.tok_type is None:
+            yield f"{prefix}{BRANCH[is_last]}{node.symbol}"
+        else:
+            yield f"{prefix}{BRANCH[is_last]}({node.tok_type}, {node.lexeme})"
+        children = node.children
+        if children:
+            new_pref = prefix + INDENT[is_last]
+            stack.append((children[-1], new_pref, True))
+            stack.extend((ch, new_pref, False) for ch in reversed(children[:-1]))
+
+
+def flat_tree_lines(tree: FlatTree, row: int = 0, prefix: str = "", is_last: bool = True) -> Iterator[str]:
+    """tree_lines for a FlatTree subtree, walks the columns directly."""
+    names, tokens, symbol, token = tree.names, tree.tokens, tree.symbol, tree.token
+    first_child, next_sibling = tree.first_child, tree.next_sibling
+    stack = [(row, prefix, is_last)]
+    while stack:
+        row, prefix, is_last = stack.pop()
+        k = token[row]
+        if prefix == "":
+            yield names[symbol[row]]
+        elif k == -1:
+            yield f"{prefix}{BRANCH[is_last]}{names[symbol[row]]}"
+        else:
+            yield f"{prefix}{BRANCH[is_last]}({tokens[k][0]}, {tokens[k][1]})"
+        child = first_child[row]
+        if child != -1:
+            new_pref = prefix + INDENT[is_last]
+            children = []
+            while child != -1:
+                children.append(child)
+                child = next_sibling[child]
+            stack.append((children[-1], new_pref, True))
+            stack.extend((ch, new_pref, False) for ch in reversed(children[:-1]))
\ No newline at end of file
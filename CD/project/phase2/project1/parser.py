@@ -2,14 +2,14 @@
 """Ciut LL(1) predictive parser – class-based implementation."""
 from __future__ import annotations
 import sys
-from collections import deque
+from functools import partial
+from array import array
 from pathlib import Path
-from typing import List, Dict, Set, Tuple, Optional
-from nodes import Node
-from scanner import Scanner
-from utils import read_input_file, compute_first_sets, compute_follow_sets, build_parse_table
-import json
-import hashlib
+from typing import Iterable, List, Dict, Tuple, Optional, Union
+from nodes import Node, EPSILON_LEAF, FlatTree, tree_lines
+from scanner import Scanner, scanner_for
+from utils import map_input_file
+from ll1 import get_tables, IntTables
 
 class Parser:
     def __init__(self):
@@ -73,19 +73,19 @@ class Parser:
             'ID', 'NUM','$'
         }
         
-        # Compute FIRST and FOLLOW sets
-        self.first = compute_first_sets()
-        self.follow = compute_follow_sets()
-        
-        # Build parse table
-        self.table = build_parse_table(self.grammar, self.terminals)     
+        # Compute FIRST and FOLLOW sets and build parse table (loaded from the cache on a warm start)
+        self.first, self.follow, self.table, self.conflicts = get_tables(self.grammar, self.terminals)
+        # Same table with the symbols interned to ints, used by the parse loop
+        self.codes = IntTables(self.grammar, self.terminals, self.first, self.follow, self.table)
 
 
 
     
         self.scanner = Scanner()
+        self.next_token = self.scanner.get_next_token  # where advance reads tokens from
         # Parser state
         self.lookahead: Optional[str] = None
+        self.la_id: int = self.codes.end  # id of lookahead
         self.tok_type: Optional[str] = None
         self.lexeme: Optional[str] = None
         self.current_line: int = 1
@@ -94,110 +94,230 @@ class Parser:
     def load_input(self, input_file: str = "input.txt"):
         """Load input file and initialize scanner."""
         try:
-            input_text = read_input_file(input_file)
-            self.scanner.set_input(input_text)
+            self.scanner = scanner_for(map_input_file(input_file))
+            self.next_token = self.scanner.get_next_token
         except FileNotFoundError as e:
             sys.exit(str(e))
     
+    def reset(self):
+        """Clear the state of the last parse, so one parser (and its tables) can parse many inputs."""
+        self.lookahead = None
+        self.la_id = self.codes.end
+        self.tok_type = self.lexeme = None
+        self.current_line = 1
+        self.syntax_errors = []
+    
+    def load_tokens(self, tokens: Iterable[Tuple[str, str, int]]):
+        """Read tokens from an already running scan (e.g. Scanner.token_stream) instead of the file."""
+        self.next_token = partial(next, iter(tokens), None)
+    
     def advance(self) -> None:
         """Get next token from scanner."""
-        tok = self.scanner.get_next_token()
+        tok = self.next_token()
         if tok is None:  # EOF
             self.lookahead = "$"
+            self.la_id = self.codes.end
             self.tok_type = self.lexeme = None
             return
         self.tok_type, self.lexeme, self.current_line = tok
         self.lookahead = self.tok_type if self.tok_type in {"ID", "NUM"} else self.lexeme
+        self.la_id = self.codes.terminal_ids.get(self.lookahead, self.codes.other)
     
     def record_error(self, msg: str) -> None:
         """Record syntax error."""
         self.syntax_errors.append(f"#{self.current_line} : {msg}")
     
-    def parse(self) -> Node:
-        """Parse input and return parse tree."""
+    def recover(self, X: int) -> bool:
+        """Panic-mode recovery for non-terminal X with no table entry.
+
+        Returns True if X should be pushed back (lookahead is in FIRST(X)),
+        False if X is dropped with an epsilon child.
+        """
+        codes = self.codes
+        nt = X - codes.n_terms
+        if codes.follow_mask[nt] >> self.la_id & 1:  # in FOLLOW(X) or $
+            self.record_error(f"syntax error, missing {codes.names[X]}")
+            return False
+        
+        if not codes.sync_mask[nt] >> self.la_id & 1:
+            self.skip(codes.sync_mask[nt])
+        
+        if codes.first_mask[nt] >> self.la_id & 1:
+            return True
+        self.record_error(f"syntax error, missing {codes.names[X]}")
+        return False
+    
+    def skip(self, sync: int) -> None:
+        """Skip the lookahead and the tokens after it until one in the bitmask sync.
+
+        Tokens are read straight from next_token and the illegal errors of the skipped
+        tokens are recorded together at the end.
+        """
+        terminal_ids, other, next_token = self.codes.terminal_ids, self.codes.other, self.next_token
+        skipped = [(self.current_line, self.lookahead)]
+        while True:
+            tok = next_token()
+            if tok is None:  # EOF, like advance
+                self.lookahead = "$"
+                self.la_id = self.codes.end
+                self.tok_type = self.lexeme = None
+                self.current_line = skipped[-1][0]
+                break
+            tok_type, lexeme, line = tok
+            lookahead = tok_type if tok_type in ("ID", "NUM") else lexeme
+            la_id = terminal_ids.get(lookahead, other)
+            if sync >> la_id & 1:
+                self.tok_type, self.lexeme, self.current_line = tok
+                self.lookahead, self.la_id = lookahead, la_id
+                break
+            skipped.append((line, lookahead))
+        self.syntax_errors.extend([f"#{line} : syntax error, illegal {a}" for line, a in skipped])
+    
+    def parse(self, flat: bool = False) -> Union[Node, FlatTree]:
+        """Parse input and return parse tree (a FlatTree if flat is set).
+
+        Works on symbol ids only (see ll1.IntTables), names are looked up
+        for the nodes and the error messages.
+        """
+        if flat:
+            return self.parse_flat()
+        codes = self.codes
+        n_terms, table, end = codes.n_terms, codes.table, codes.end
+        productions, children, names = codes.productions, codes.children, codes.names
+
         self.advance()
+        la = self.la_id
         root = Node("Program")
-        sym_stack: deque[str] = deque(["$", "Program"])
-        node_stack: deque[Node] = deque([Node("$"), root])
+        sym_stack: List[int] = [end, codes.ids["Program"]]
+        node_stack: List[Node] = [Node("$"), root]
+        pop_sym, pop_node = sym_stack.pop, node_stack.pop
+        push_syms, push_nodes = sym_stack.extend, node_stack.extend
         while sym_stack:
-            X = sym_stack.pop()
-            cur_node = node_stack.pop()
-            if X == "EPSILON":
-                cur_node.add(Node("epsilon"))
-                continue
+            X = pop_sym()
+            cur_node = pop_node()
             
             # Terminal case
-            if X in self.terminals:
-                if self.lookahead == X:
-                    if X != "$":
+            if X < n_terms:
+                if la == X:
+                    if X != end:
                         cur_node.tok_type, cur_node.lexeme = self.tok_type, self.lexeme
                     self.advance()
+                    la = self.la_id
                 else:
-                    self.record_error(f"syntax error, missing {X}")
+                    self.record_error(f"syntax error, missing {names[X]}")
                 continue
             
             # Non-terminal case
-            prod = self.table.get((X, self.lookahead))
-            if prod is None:
-                if self.lookahead in self.follow[X] or self.lookahead == "$":
-                    self.record_error(f"syntax error, missing {X}")
-                    cur_node.add(Node("epsilon"))
-                    continue
-                
-                while (self.lookahead not in self.first[X] and 
-                       self.lookahead not in self.follow[X] and 
-                       self.lookahead != "$"):
-                    self.record_error(f"syntax error, illegal {self.lookahead}")
-                    self.advance()
-                
-                if self.lookahead in self.first[X]:
+            prod = table[(X - n_terms) * n_terms + la]
+            if prod < 0:
+                if self.recover(X):
                     sym_stack.append(X)
                     node_stack.append(cur_node)
                 else:
-                    self.record_error(f"syntax error, missing {X}")
-                    cur_node.add(Node("epsilon"))
+                    cur_node.add(EPSILON_LEAF)
+                la = self.la_id
                 continue
             
             # Expand production
-            if prod == ["EPSILON"]:
-                cur_node.add(Node("epsilon"))
+            rhs = children[prod]
+            if not rhs:
+                cur_node.add(EPSILON_LEAF)
             else:
-                children = [Node(sym) for sym in prod]
-                for ch in children:
-                    cur_node.add(ch)
-                for sym, ch in reversed(list(zip(prod, children))):
-                    sym_stack.append(sym)
-                    node_stack.append(ch)
+                kids = list(map(Node, rhs))
+                cur_node.children.extend(kids)
+                push_syms(productions[prod])  # already reversed
+                push_nodes(reversed(kids))
         
         root.add(Node("$"))
         return root
     
-    def dump_tree(self, node: Node, prefix: str, is_last: bool, out: List[str]):
-        """Recursively dump parse tree to lines."""
-        if prefix == "":
-            out.append(node.symbol)
-        else:
-            branch = "└── " if is_last else "├── "
-            if node.tok_type is None:
-                out.append(f"{prefix}{branch}{node.symbol}")
+    def parse_flat(self) -> FlatTree:
+        """Parse input into a FlatTree.
+
+        Children of a production get consecutive rows, so an expansion
+        just extends the columns and the node stack holds row numbers.
+        """
+        codes = self.codes
+        n_terms, table, end = codes.n_terms, codes.table, codes.end
+        productions, right_ids = codes.productions, codes.right_ids
+        tree = FlatTree(codes.names + ["epsilon"])
+        epsilon = len(codes.names)
+        symbol, token, first_child, next_sibling = tree.symbol, tree.token, tree.first_child, tree.next_sibling
+        tokens = tree.tokens
+        blank = [array("i", [-1]) * m for m in range(max(map(len, right_ids)) + 1)]
+
+        self.advance()
+        la = self.la_id
+        root = tree.add_node(codes.ids["Program"])
+        sym_stack: List[int] = [end, codes.ids["Program"]]
+        node_stack: List[int] = [-1, root]  # no row for the bottom $
+        pop_sym, pop_node = sym_stack.pop, node_stack.pop
+        push_syms, push_nodes = sym_stack.extend, node_stack.extend
+        while sym_stack:
+            X = pop_sym()
+            cur = pop_node()
+            
+            # Terminal case
+            if X < n_terms:
+                if la == X:
+                    if X != end:
+                        token[cur] = len(tokens)
+                        tokens.append((self.tok_type, self.lexeme))
+                    self.advance()
+                    la = self.la_id
+                else:
+                    self.record_error(f"syntax error, missing {codes.names[X]}")
+                continue
+            
+            # Non-terminal case
+            prod = table[(X - n_terms) * n_terms + la]
+            if prod < 0:
+                if self.recover(X):
+                    sym_stack.append(X)
+                    node_stack.append(cur)
+                else:
+                    tree.add_child(cur, epsilon)
+                la = self.la_id
+                continue
+            
+            # Expand production into rows k .. k+m-1
+            rhs = right_ids[prod]
+            if not rhs:
+                tree.add_child(cur, epsilon)
             else:
-                out.append(f"{prefix}{branch}({node.tok_type}, {node.lexeme})")
-        new_pref = prefix + ("    " if is_last else "│   ")
-        for i, ch in enumerate(node.children):
-            self.dump_tree(ch, new_pref, i == len(node.children) - 1, out)
+                k, m = len(symbol), len(rhs)
+                symbol.extend(rhs)
+                token.extend(blank[m])
+                first_child.extend(blank[m])
+                next_sibling.extend(range(k + 1, k + m))
+                next_sibling.append(-1)
+                first_child[cur] = k
+                push_syms(productions[prod])  # already reversed
+                push_nodes(range(k + m - 1, k - 1, -1))
+        
+        tree.add_child(root, end)
+        return tree
+    
+    def dump_tree(self, node, prefix: str, is_last: bool, out: List[str]):
+        """Dump parse tree to lines (node is a Node, FlatTree or FlatNode)."""
+        out.extend(tree_lines(node, prefix, is_last))
     
-    def write_output_files(self, tree: Node):
-        """Write parse tree and syntax errors to files."""
-        # Write parse tree
-        lines: List[str] = []
-        self.dump_tree(tree, "", True, lines)
-        Path("parse_tree.txt").write_text("\n".join(lines), encoding="utf-8")
+    def write_output_files(self, tree: Union[Node, FlatTree], out_dir: str = "."):
+        """Write parse tree and syntax errors to files (into out_dir)."""
+        out = Path(out_dir)
+        # Stream the parse tree lines, no list of all lines is built
+        with open(out / "parse_tree.txt", "w", encoding="utf-8", buffering=1 << 16) as f:
+            lines = tree_lines(tree)
+            f.write(next(lines))
+            for line in lines:
+                f.write("\n")
+                f.write(line)
         
         # Write syntax errors
         if self.syntax_errors:
-            Path("syntax_errors.txt").write_text("\n".join(self.syntax_errors), encoding="utf-8")
+            (out / "syntax_errors.txt").write_text("\n".join(self.syntax_errors), encoding="utf-8")
         else:
-            Path("syntax_errors.txt").write_text("There is no syntax error.", encoding="utf-8")
+            (out / "syntax_errors.txt").write_text("There is no syntax error.", encoding="utf-8")
 
 def main():
     parser = Parser()
@@ -1,6 +1,9 @@
 # scanner.py
+import mmap
+import re
 from collections import defaultdict
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import Optional, Tuple, Union
 
 
 class Scanner:
@@ -9,11 +12,14 @@ class Scanner:
                                "int", "repeat", "return", "until", "void"]
         self.KEYWORDS_SET = set(self.FIXED_KEYWORDS)
         self.MULTI_SYMBOLS = ["==", "<=", ">=", "!=", "&&", "||"]
+        self.MULTI_BY_FIRST = {sym[0]: sym for sym in self.MULTI_SYMBOLS}
         self.SINGLE_SYMBOLS = {
             ';', ':', '(', ')', '{', '}', '[', ']', '+', '-', '*', '/', '=', '<', '>', '!', ','}
         self.NOT_VALID_ALONE = {'&', '|'}
         self.INVALID_SET = {'@', '#', '$', '%', '^', '~'}
         self.WHITESPACE = {' ', '\t', '\r', '\v', '\f'}
+        self.ALLOWED_AFTER_ID = {
+            '(', ')', '{', '}', '[', ']', ';', ',', ':', '+', '-', '*', '/', '=', '<', '>', '&', '|'}
 
         self.input_text = ""
         self.current_index = 0
@@ -21,7 +27,8 @@ class Scanner:
 
         self.tokens_by_line = {}
         self.lexical_errors = []
-        self.symbol_table_order = []
+        self.symbol_table_order = {}  # identifier -> index, in insertion order
+        self.bangs = []  # (index, line) of each '!' dropped by the rule below, see token_stream
 
     def set_input(self, text: str):
         """Set the input text and reset state."""
@@ -31,6 +38,7 @@ class Scanner:
         self.tokens_by_line.clear()
         self.lexical_errors.clear()
         self.symbol_table_order.clear()
+        self.bangs.clear()
 
     def get_char(self) -> Optional[str]:
         """Get next character and update line number."""
@@ -55,7 +63,7 @@ class Scanner:
             self.tokens_by_line[tok_line] = []
         self.tokens_by_line[tok_line].append((tok_type, lexeme))
         if tok_type == "ID" and lexeme not in self.symbol_table_order:
-            self.symbol_table_order.append(lexeme)
+            self.symbol_table_order[lexeme] = len(self.symbol_table_order)
 
     def log_error(self, tok_line: int, error_str: str, message: str):
         """Log a lexical error."""
@@ -63,144 +71,134 @@ class Scanner:
 
     def skip_whitespace_and_comments(self):
         """Skip whitespace and comments."""
-        while True:
-            ch = self.peek_char()
-            if ch is None:
-                return
+        text = self.input_text
+        n = len(text)
+        i = self.current_index
+        while i < n:
+            ch = text[i]
             if ch in self.WHITESPACE:
-                self.get_char()
+                i += 1
                 continue
             if ch == "\n":
-                self.get_char()
+                self.line_number += 1
+                i += 1
                 continue
-            if ch == "/" and self.peek_char(1) == "*":
-                self.get_char()  # consume '/'
-                self.get_char()  # consume '*'
+            if ch == "/" and text.startswith("*", i + 1):
                 comment_start_line = self.line_number
-                comment_content = ""
-                while True:
-                    c = self.get_char()
-                    if c is None:
-                        snippet = comment_content[:7] + \
-                            ("..." if len(comment_content) > 7 else "")
-                        self.log_error(comment_start_line,
-                                       "/* " + snippet, "Unclosed comment")
-                        return
-                    if c == "*" and self.peek_char() == "/":
-                        self.get_char()  # consume '/'
-                        break
-                    else:
-                        comment_content += c
+                end = text.find("*/", i + 2)
+                if end == -1:
+                    comment_content = text[i + 2:]
+                    snippet = comment_content[:7] + \
+                        ("..." if len(comment_content) > 7 else "")
+                    self.log_error(comment_start_line,
+                                   "/* " + snippet, "Unclosed comment")
+                    self.line_number += comment_content.count("\n")
+                    self.current_index = n
+                    return
+                self.line_number += text.count("\n", i + 2, end)
+                i = end + 2
                 continue
-            if ch == "*" and self.peek_char(1) == "/":
-                self.get_char()  # consume '*'
-                self.get_char()  # consume '/'
+            if ch == "*" and text.startswith("/", i + 1):
+                i += 2
                 self.log_error(self.line_number, "*/", "Unmatched comment")
                 continue
             break
+        self.current_index = i
+
+    def invalid_sequence_end(self, start: int) -> int:
+        """End index of the invalid symbol sequence starting at start."""
+        text = self.input_text
+        i = start + 1  # first_char
+        while i < len(text) and (text[i] in self.INVALID_SET or text[i] in self.NOT_VALID_ALONE):
+            i += 1
+        return i
 
     def get_invalid_symbol_sequence(self, start_line: int, first_char: str) -> str:
         """Get invalid symbol sequence."""
-        seq = first_char
-        self.get_char()  # consume first_char
-        while True:
-            nxt = self.peek_char()
-            if nxt is None or nxt.isspace():
-                break
-            if nxt in self.INVALID_SET or nxt in self.NOT_VALID_ALONE:
-                seq += self.get_char()
-            else:
-                break
-        return seq
+        start = self.current_index
+        self.current_index = self.invalid_sequence_end(start)
+        return self.input_text[start:self.current_index]
 
     def get_next_token(self) -> Optional[Tuple[str, str, int]]:
-        """Get the next token from input."""
-        self.skip_whitespace_and_comments()
-        start_line = self.line_number
-        ch = self.peek_char()
-        if ch is None:
-            return None
+        """Get the next token from input.
 
-        # Handle invalid '//' comments
-        if ch == "/" and self.peek_char(1) == "/":
-            error_token1 = self.get_char()  # consume first '/'
-            self.log_error(start_line, error_token1, "Invalid input")
-            error_token2 = self.get_char()  # consume second '/'
-            self.log_error(start_line, error_token2, "Invalid input")
-            return self.get_next_token()
-
-        # Process numbers
-        if ch.isdigit():
-            num_str = ""
-            while self.peek_char() is not None and self.peek_char().isdigit():
-                num_str += self.get_char()
-            if self.peek_char() is not None and self.peek_char().isalpha():
-                error_token = num_str + self.get_char()
-                self.log_error(start_line, error_token, "Invalid number")
-                return self.get_next_token()
-            return ("NUM", num_str, start_line)
-
-        # Process identifiers
-        if ch.isalpha():
-            id_str = ""
-            while self.peek_char() is not None and self.peek_char().isalnum():
-                id_str += self.get_char()
-            nxt = self.peek_char()
-            if nxt is not None and (not nxt.isspace()):
-                allowed_after_id = {
-                    '(', ')', '{', '}', '[', ']', ';', ',', ':', '+', '-', '*', '/', '=', '<', '>', '&', '|'}
-                if nxt not in allowed_after_id:
-                    error_char = self.get_char()
-                    self.log_error(start_line, id_str +
-                                   error_char, "Invalid input")
-                    return self.get_next_token()
-            if id_str in self.KEYWORDS_SET:
-                return ("KEYWORD", id_str, start_line)
-            else:
+        Lexemes are sliced out of the input with start/end indices, symbols are looked up
+        by their first character and lexical errors are logged in a loop (no recursion).
+        """
+        text = self.input_text
+        n = len(text)
+        while True:
+            self.skip_whitespace_and_comments()
+            start_line = self.line_number
+            i = self.current_index
+            if i >= n:
+                return None
+            ch = text[i]
+
+            # Handle invalid '//' comments
+            if ch == "/" and text.startswith("/", i + 1):
+                self.log_error(start_line, "/", "Invalid input")
+                self.log_error(start_line, "/", "Invalid input")
+                self.current_index = i + 2
+                continue
+
+            # Process numbers
+            if ch.isdigit():
+                j = i + 1
+                while j < n and text[j].isdigit():
+                    j += 1
+                if j < n and text[j].isalpha():
+                    self.current_index = j + 1
+                    self.log_error(start_line, text[i:j + 1], "Invalid number")
+                    continue
+                self.current_index = j
+                return ("NUM", text[i:j], start_line)
+
+            # Process identifiers
+            if ch.isalpha():
+                j = i + 1
+                while j < n and text[j].isalnum():
+                    j += 1
+                if j < n and not text[j].isspace() and text[j] not in self.ALLOWED_AFTER_ID:
+                    self.current_index = j + 1
+                    self.log_error(start_line, text[i:j + 1], "Invalid input")
+                    continue
+                self.current_index = j
+                id_str = text[i:j]
+                if id_str in self.KEYWORDS_SET:
+                    return ("KEYWORD", id_str, start_line)
                 return ("ID", id_str, start_line)
 
-        # Process multi-character symbols
-        for sym in self.MULTI_SYMBOLS:
-            if self.input_text[self.current_index:self.current_index+len(sym)] == sym:
-                for _ in range(len(sym)):
-                    self.get_char()
+            # Process multi-character symbols
+            sym = self.MULTI_BY_FIRST.get(ch)
+            if sym is not None and text.startswith(sym, i):
+                self.current_index = i + 2
                 return ("SYMBOL", sym, start_line)
 
-        # Process single-character symbols
-        if ch in self.SINGLE_SYMBOLS or ch in self.NOT_VALID_ALONE:
-            if ch == "!" and self.peek_char(1) == "=":
-                self.get_char()  # Consume '!'
-                self.get_char()  # Consume '='
-                return ("SYMBOL", "!=", start_line)
-
-            if ch == "!":
-                if self.tokens_by_line.get(start_line, []) and self.tokens_by_line[start_line][-1] == ("SYMBOL", ";"):
-                    error_token = self.get_char()
-                    self.log_error(start_line, error_token, "Invalid input")
-                    return self.get_next_token()
-
-            if ch == ";":
-                token = self.get_char()
-                return ("SYMBOL", token, start_line)
-
-            nxt = self.peek_char(1)
-            if nxt is not None and (not nxt.isspace()) and (nxt in self.INVALID_SET or nxt in self.NOT_VALID_ALONE):
-                invalid_seq = self.get_invalid_symbol_sequence(start_line, ch)
-                self.log_error(start_line, invalid_seq, "Invalid input")
-                return self.get_next_token()
-            token = self.get_char()
-            return ("SYMBOL", token, start_line)
-
-        # Process invalid characters
-        if ch in self.INVALID_SET:
-            error_token = self.get_char()
-            self.log_error(start_line, error_token, "Invalid input")
-            return self.get_next_token()
-
-        # Fallback for unrecognized characters
-        error_token = self.get_char()
-        self.log_error(start_line, error_token, "Invalid input")
-        return self.get_next_token()
+            # Process single-character symbols
+            if ch in self.SINGLE_SYMBOLS or ch in self.NOT_VALID_ALONE:
+                if ch == "!":
+                    if self.tokens_by_line.get(start_line, []) and self.tokens_by_line[start_line][-1] == ("SYMBOL", ";"):
+                        self.current_index = i + 1
+                        self.log_error(start_line, ch, "Invalid input")
+                        self.bangs.append((i, start_line))
+                        continue
+
+                if ch == ";":
+                    self.current_index = i + 1
+                    return ("SYMBOL", ch, start_line)
+
+                nxt = text[i + 1] if i + 1 < n else None
+                if nxt is not None and (nxt in self.INVALID_SET or nxt in self.NOT_VALID_ALONE):
+                    invalid_seq = self.get_invalid_symbol_sequence(start_line, ch)
+                    self.log_error(start_line, invalid_seq, "Invalid input")
+                    continue
+                self.current_index = i + 1
+                return ("SYMBOL", ch, start_line)
+
+            # Process invalid characters and fallback for unrecognized characters
+            self.current_index = i + 1
+            self.log_error(start_line, ch, "Invalid input")
 
     def process_input(self):
         """Process all input tokens."""
@@ -210,11 +208,37 @@ class Scanner:
             self.add_token(tok_type, lexeme, tok_line)
             token = self.get_next_token()
 
-    def write_output_files(self):
-        """Write all output files."""
-        self._write_tokens_file()
-        self._write_lexical_errors_file()
-        self._write_symbol_table_file()
+    def token_stream(self):
+        """Scan the input once, recording the tokens like process_input, and yield
+        the tokens a fresh scanner of the same input would give the parser.
+
+        The two only differ at a '!' after a ';' on the same line, which this scanner
+        drops (it sees the recorded ';') and a scanner without recorded tokens reads as
+        a '!' token, or as one invalid sequence with the invalid characters after it.
+        """
+        skip_until = 0  # tokens starting before this are inside such an invalid sequence
+        while True:
+            token = self.get_next_token()
+            for i, line in self.bangs:
+                end = self.invalid_sequence_end(i)
+                if end == i + 1:
+                    yield ("SYMBOL", "!", line)
+                else:
+                    skip_until = end
+            self.bangs.clear()
+            if token is None:
+                return
+            tok_type, lexeme, tok_line = token
+            self.add_token(tok_type, lexeme, tok_line)
+            if self.current_index - len(lexeme) >= skip_until:
+                yield token
+
+    def write_output_files(self, out_dir: str = "."):
+        """Write all output files (into out_dir)."""
+        out = Path(out_dir)
+        self._write_tokens_file(out / "tokens.txt")
+        self._write_lexical_errors_file(out / "lexical_errors.txt")
+        self._write_symbol_table_file(out / "symbol_table.txt")
 
     def _write_tokens_file(self, filename="tokens.txt"):
         """Write tokens to file."""
@@ -247,3 +271,249 @@ class Scanner:
             for ident in self.symbol_table_order:
                 f.write(f"{index}.\t{ident}\n")
                 index += 1
+
+
+def ascii_table(pred) -> bytes:
+    """256 entry table, 1 for the ASCII bytes whose character satisfies pred."""
+    return bytes(1 if b < 128 and pred(chr(b)) else 0 for b in range(256))
+
+
+# Built from the str predicates Scanner uses, so they agree on ASCII input
+IS_DIGIT = ascii_table(str.isdigit)
+IS_ALPHA = ascii_table(str.isalpha)
+IS_ALNUM = ascii_table(str.isalnum)
+
+# Input BytesScanner does not lex as is: non-ASCII bytes and '\r' newlines outside '\r\n'
+NEEDS_DECODING = re.compile(rb"[\x80-\xff]|\r(?!\n)")
+CHECK_CHUNK = 1 << 16  # bytes BytesScanner checks for NEEDS_DECODING at a time, ahead of the tokens
+
+
+class BytesScanner(Scanner):
+    """Scanner over bytes or an mmap of the input file.
+
+    Characters are classified with the ASCII tables above instead of str methods and
+    lexemes are sliced as bytes and decoded only when a token or an error is emitted, so
+    the text is never decoded or copied as a whole. Tokens, errors and line numbers are
+    the ones Scanner gives for the file read in text mode ('\r\n' is whitespace plus a
+    newline here).
+
+    The input is checked for bytes of NEEDS_DECODING a chunk ahead of the tokens, so the
+    scan starts at once. A token step that reads such a byte is undone and the scanner
+    turns into a Scanner over the decoded rest of the input, which lexes it again.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.input_text = b""
+        self.checked = 0  # input_text[:checked] has no byte of NEEDS_DECODING
+        self.undecodable: Optional[int] = None  # index of the first one, once found
+        self.WHITESPACE_TABLE = ascii_table(self.WHITESPACE.__contains__)
+        self.SYMBOL_TABLE = ascii_table((self.SINGLE_SYMBOLS | self.NOT_VALID_ALONE).__contains__)
+        self.INVALID_TABLE = ascii_table((self.INVALID_SET | self.NOT_VALID_ALONE).__contains__)
+        self.AFTER_ID_TABLE = ascii_table(lambda ch: ch.isspace() or ch in self.ALLOWED_AFTER_ID)
+        self.MULTI_BY_FIRST_BYTE = {ord(first): sym.encode() for first, sym in self.MULTI_BY_FIRST.items()}
+
+    def set_input(self, data: Union[bytes, "mmap.mmap"]):
+        """Set the input bytes and reset state."""
+        super().set_input(data)
+        self.checked = 0
+        self.undecodable = None
+
+    def check_ahead(self, end: int):
+        """Extends the checked input up to end, it stops at the first byte of NEEDS_DECODING."""
+        text = self.input_text
+        end = min(end, len(text))
+        if self.undecodable is not None or end <= self.checked:
+            return
+        # one byte more, a '\r' at the end of the chunk is only alone if no '\n' follows
+        match = NEEDS_DECODING.search(text, self.checked, min(end + 1, len(text)))
+        if match is not None and match.start() < end:
+            self.checked = self.undecodable = match.start()
+        else:
+            self.checked = end
+
+    def decode_rest(self):
+        """Turns this scanner into a Scanner over the text of the input from current_index on.
+
+        The rest is decoded as UTF-8 with universal newlines, like reading the file in text
+        mode. The ASCII before it is kept as is, so the indices of the tokens read so far
+        stay valid (token_stream compares them); the scan never reads it again.
+        """
+        text, i = self.input_text, self.current_index
+        rest = bytes(text[i:]).decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        self.input_text = bytes(text[:i]).decode("ascii") + rest
+        self.__class__ = Scanner
+
+    def count_newlines(self, start: int, end: int) -> int:
+        """Number of newlines in input_text[start:end], without copying it."""
+        text = self.input_text
+        count = 0
+        i = text.find(b"\n", start, end)
+        while i != -1:
+            count += 1
+            i = text.find(b"\n", i + 1, end)
+        return count
+
+    def skip_whitespace_and_comments(self):
+        """Skip whitespace and comments."""
+        text = self.input_text
+        n = len(text)
+        i = self.current_index
+        while i < n:
+            b = text[i]
+            if self.WHITESPACE_TABLE[b]:
+                i += 1
+                continue
+            if b == 10:  # \n
+                self.line_number += 1
+                i += 1
+                continue
+            if b == 47 and i + 1 < n and text[i + 1] == 42:  # /*
+                comment_start_line = self.line_number
+                end = text.find(b"*/", i + 2)
+                if end == -1:
+                    # at most 16 bytes are decoded, they hold the first 8 characters
+                    # of the comment once '\r\n' is read as one newline
+                    head = text[i + 2:i + 18].decode("ascii").replace("\r\n", "\n")
+                    more = n - (i + 2) > 16 or len(head) > 7
+                    snippet = head[:7] + ("..." if more else "")
+                    self.log_error(comment_start_line,
+                                   "/* " + snippet, "Unclosed comment")
+                    self.line_number += self.count_newlines(i + 2, n)
+                    self.current_index = n
+                    return
+                self.line_number += self.count_newlines(i + 2, end)
+                i = end + 2
+                continue
+            if b == 42 and i + 1 < n and text[i + 1] == 47:  # */
+                i += 2
+                self.log_error(self.line_number, "*/", "Unmatched comment")
+                continue
+            break
+        self.current_index = i
+
+    def invalid_sequence_end(self, start: int) -> int:
+        """End index of the invalid symbol sequence starting at start."""
+        text = self.input_text
+        i = start + 1  # first_char
+        while i < len(text) and self.INVALID_TABLE[text[i]]:
+            i += 1
+        return i
+
+    def get_invalid_symbol_sequence(self, start_line: int, first_char: str) -> str:
+        """Get invalid symbol sequence."""
+        start = self.current_index
+        self.current_index = self.invalid_sequence_end(start)
+        return self.input_text[start:self.current_index].decode("ascii")
+
+    def get_next_token(self) -> Optional[Tuple[str, str, int]]:
+        """Get the next token from input, decoding the rest of it at the first byte of NEEDS_DECODING."""
+        i = self.current_index
+        if self.checked - i < CHECK_CHUNK // 2:
+            self.check_ahead(i + CHECK_CHUNK)
+        line, n_errors, n_bangs = self.line_number, len(self.lexical_errors), len(self.bangs)
+        try:
+            token = self.get_next_ascii_token()
+            # the step read up to current_index, the byte there included
+            if self.current_index < self.checked:
+                return token
+            self.check_ahead(self.current_index + 1)  # a long token or comment, or the end
+            if self.checked >= min(self.current_index + 1, len(self.input_text)):
+                return token
+        except UnicodeDecodeError:  # an error lexeme with a non-ASCII byte
+            pass
+        # the step read a byte only a Scanner reads, undo it and lex it again as text
+        self.current_index, self.line_number = i, line
+        del self.lexical_errors[n_errors:]
+        del self.bangs[n_bangs:]
+        self.decode_rest()
+        return self.get_next_token()
+
+    def get_next_ascii_token(self) -> Optional[Tuple[str, str, int]]:
+        """Get the next token from input, same steps as Scanner.get_next_token on bytes."""
+        text = self.input_text
+        n = len(text)
+        while True:
+            self.skip_whitespace_and_comments()
+            start_line = self.line_number
+            i = self.current_index
+            if i >= n:
+                return None
+            b = text[i]
+
+            # Handle invalid '//' comments
+            if b == 47 and i + 1 < n and text[i + 1] == 47:
+                self.log_error(start_line, "/", "Invalid input")
+                self.log_error(start_line, "/", "Invalid input")
+                self.current_index = i + 2
+                continue
+
+            # Process numbers
+            if IS_DIGIT[b]:
+                j = i + 1
+                while j < n and IS_DIGIT[text[j]]:
+                    j += 1
+                if j < n and IS_ALPHA[text[j]]:
+                    self.current_index = j + 1
+                    self.log_error(start_line, text[i:j + 1].decode("ascii"), "Invalid number")
+                    continue
+                self.current_index = j
+                return ("NUM", text[i:j].decode("ascii"), start_line)
+
+            # Process identifiers
+            if IS_ALPHA[b]:
+                j = i + 1
+                while j < n and IS_ALNUM[text[j]]:
+                    j += 1
+                if j < n and not self.AFTER_ID_TABLE[text[j]]:
+                    self.current_index = j + 1
+                    self.log_error(start_line, text[i:j + 1].decode("ascii"), "Invalid input")
+                    continue
+                self.current_index = j
+                id_str = text[i:j].decode("ascii")
+                if id_str in self.KEYWORDS_SET:
+                    return ("KEYWORD", id_str, start_line)
+                return ("ID", id_str, start_line)
+
+            # Process multi-character symbols
+            sym = self.MULTI_BY_FIRST_BYTE.get(b)
+            if sym is not None and text[i:i + 2] == sym:
+                self.current_index = i + 2
+                return ("SYMBOL", sym.decode("ascii"), start_line)
+
+            ch = chr(b)
+            # Process single-character symbols
+            if self.SYMBOL_TABLE[b]:
+                if ch == "!":
+                    if self.tokens_by_line.get(start_line, []) and self.tokens_by_line[start_line][-1] == ("SYMBOL", ";"):
+                        self.current_index = i + 1
+                        self.log_error(start_line, ch, "Invalid input")
+                        self.bangs.append((i, start_line))
+                        continue
+
+                if ch == ";":
+                    self.current_index = i + 1
+                    return ("SYMBOL", ch, start_line)
+
+                if i + 1 < n and self.INVALID_TABLE[text[i + 1]]:
+                    invalid_seq = self.get_invalid_symbol_sequence(start_line, ch)
+                    self.log_error(start_line, invalid_seq, "Invalid input")
+                    continue
+                self.current_index = i + 1
+                return ("SYMBOL", ch, start_line)
+
+            # Process invalid characters and fallback for unrecognized characters
+            self.current_index = i + 1
+            self.log_error(start_line, ch, "Invalid input")
+
+
+def scanner_for(data: Union[bytes, "mmap.mmap"]) -> Scanner:
+    """Return a scanner with data (the bytes of an input file) as its input.
+
+    The input is lexed in place by a BytesScanner, which decodes the rest of it as UTF-8
+    with universal newlines, like reading the file in text mode, once it reaches a
+    non-ASCII byte or a lone '\r'.
+    """
+    scanner = BytesScanner()
+    scanner.set_input(data)
+    return scanner
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Compile server: a long lived compiler listening on a Unix domain socket.
+
+Every run of compiler.py starts the interpreter, imports the grammar and builds the
+parse table before it reads a token. The server does that once: the Parser is built
+before the worker pool forks, so every worker starts with the table and the scanner
+tables of its parent. A thread per connection reads the requests of client.py and hands
+each one to the pool, so concurrent clients compile in parallel. The compile cache is
+used like in compiler.py.
+
+Run it with `python server.py`, compile with `python client.py input.txt`, stop it with
+`python client.py --shutdown` or Ctrl-C.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+import compiler
+from compiler import OUTPUT_FILES, compile_file, compile_source, init_batch_worker
+from parser import Parser
+from cache import CompileCache, CACHE_DIR, MAX_BYTES
+from client import SOCKET_PATH, send, receive
+
+
+def compile_request(request: dict, cache: Optional[CompileCache]) -> dict:
+    """Runs one compile request in a worker, returns the answer to the client."""
+    parser = compiler.BATCH_PARSER
+    try:
+        if "source" in request:
+            source = request["source"].encode("utf-8")
+        elif "input" not in request:
+            return {"ok": False, "error": "a request needs an input or a source"}
+        if request.get("return"):
+            out_dir = tempfile.mkdtemp(prefix="cminus-")
+            try:
+                cached = (compile_source(source, parser, out_dir, cache) if "source" in request else
+                          compile_file(request["input"], parser, out_dir, cache))
+                files = {name: Path(out_dir, name).read_text(encoding="utf-8") for name in OUTPUT_FILES}
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+            return {"ok": True, "cached": cached, "files": files}
+        out_dir = request.get("out_dir", ".")
+        os.makedirs(out_dir, exist_ok=True)
+        cached = (compile_source(source, parser, out_dir, cache) if "source" in request else
+                  compile_file(request["input"], parser, out_dir, cache))
+        return {"ok": True, "cached": cached}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Answers the requests of one connection in order."""
+
+    def handle(self):
+        while True:
+            try:
+                request = receive(self.rfile)
+            except ValueError as e:
+                send(self.wfile, {"ok": False, "error": f"bad request: {e}"})
+                continue
+            if request is None:
+                return
+            if not isinstance(request, dict):
+                send(self.wfile, {"ok": False, "error": "bad request: not a JSON object"})
+                continue
+            command = request.get("command")
+            if command == "ping":
+                send(self.wfile, {"ok": True})
+            elif command == "shutdown":
+                send(self.wfile, {"ok": True})
+                # shutdown waits for serve_forever, which waits for this handler
+                threading.Thread(target=self.server.shutdown).start()
+                return
+            elif command is not None:
+                send(self.wfile, {"ok": False, "error": f"unknown command {command!r}"})
+            else:
+                send(self.wfile, self.server.pool.apply(compile_request, (request, self.server.cache)))
+
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, pool, cache: Optional[CompileCache]):
+        self.pool = pool
+        self.cache = cache
+        super().__init__(path, RequestHandler)
+
+
+def remove_stale_socket(path: str):
+    """Removes the socket file of a server that is gone, fails if one still listens on it."""
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+            return
+    raise RuntimeError(f"a compile server is already listening on {path}")
+
+
+def serve(path: str = SOCKET_PATH, jobs: Optional[int] = None, cache: Optional[CompileCache] = None):
+    """Serves compile requests on the socket path until it is shut down."""
+    remove_stale_socket(path)
+    compiler.BATCH_PARSER = Parser()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    jobs = jobs or os.cpu_count() or 1
+    with context.Pool(jobs, initializer=init_batch_worker) as pool, CompileServer(path, pool, cache) as server:
+        print(f"Compile server listening on {path} with {jobs} processes", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--socket", default=SOCKET_PATH, help=f"socket to listen on (default: {SOCKET_PATH})")
+    args.add_argument("--jobs", type=int, help="worker processes (default: number of cores)")
+    args.add_argument("--no-cache", action="store_true", help="always compile, do not use or fill the compile cache")
+    args.add_argument("--cache-dir", default=str(CACHE_DIR), help="directory of the compile cache (default: compile_cache next to compiler.py)")
+    args.add_argument("--cache-size", type=int, default=MAX_BYTES >> 20, help=f"size limit of the compile cache in MiB (default: {MAX_BYTES >> 20})")
+    options = args.parse_args()
+    cache = None if options.no_cache else CompileCache(Path(options.cache_dir), options.cache_size << 20)
+    try:
+        serve(options.socket, options.jobs, cache)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Abstract syntax tree of C-minus and the semantic actions that build it while parsing.
+
+Parser(mode="ast") runs the table loop with a value stack instead of the parse tree: a
+matched terminal pushes its value, an ID or NUM as (lexeme, line) and any other token
+as its line, and a production with an action gets a marker on the symbol stack below its
+symbols. When the marker is popped the values of the symbols are replaced by the result
+of the action. A production without an action keeps the value of its only symbol (the
+chains like Statement -> Return-stmt and Expression -> Simple-expression-zegond), an
+epsilon production pushes its entry of EPSILON_VALUES. A terminal that is missing or a
+non-terminal dropped by the error recovery has the value None, so every field of a node
+may be None after a syntax error.
+
+The right recursive lists build a Python list from their end, appended to by every
+element, which their owner reverses. The left factored expressions (Expression -> ID B,
+H, the -prime forms) leave a function that completes the expression once the ID it
+follows is known; the operators of D and G collect into lists folded left associative.
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class AstNode:
+    """Base of the AST nodes, CHILDREN names the fields holding nodes or lists of nodes."""
+    __slots__ = ()
+    CHILDREN: Tuple[str, ...] = ()
+
+    def label(self) -> str:
+        return type(self).__name__
+
+
+class Program(AstNode):
+    __slots__ = ("declarations", "line")
+    CHILDREN = ("declarations",)
+
+    def __init__(self, declarations: list, line: Optional[int] = None):
+        self.declarations = declarations
+        self.line = line # only set for the empty program of an input whose Program was dropped
+
+
+class VarDecl(AstNode):
+    __slots__ = ("type", "name", "size", "line")
+
+    def __init__(self, type: Optional[str], name: Optional[str], size: Optional[int], line: Optional[int]):
+        self.type = type
+        self.name = name
+        self.size = size # the length of an array, None for an int
+        self.line = line
+
+    def label(self) -> str:
+        return f"VarDecl {self.type} {self.name}" + ("" if self.size is None else f"[{self.size}]")
+
+
+class FunDecl(AstNode):
+    __slots__ = ("type", "name", "params", "body", "line")
+    CHILDREN = ("params", "body")
+
+    def __init__(self, type: Optional[str], name: Optional[str], params: list, body, line: Optional[int]):
+        self.type = type
+        self.name = name
+        self.params = params
+        self.body = body
+        self.line = line
+
+    def label(self) -> str:
+        return f"FunDecl {self.type} {self.name}"
+
+
+class Param(AstNode):
+    __slots__ = ("type", "name", "array", "line")
+
+    def __init__(self, type: Optional[str], name: Optional[str], array: bool, line: Optional[int]):
+        self.type = type
+        self.name = name
+        self.array = array
+        self.line = line
+
+    def label(self) -> str:
+        return f"Param {self.type} {self.name}" + ("[]" if self.array else "")
+
+
+class Compound(AstNode):
+    __slots__ = ("declarations", "statements", "line")
+    CHILDREN = ("declarations", "statements")
+
+    def __init__(self, declarations: list, statements: list, line: Optional[int]):
+        self.declarations = declarations
+        self.statements = statements
+        self.line = line
+
+
+class ExprStmt(AstNode):
+    __slots__ = ("expr", "line")
+    CHILDREN = ("expr",)
+
+    def __init__(self, expr, line: Optional[int]):
+        self.expr = expr # None for an empty statement
+        self.line = line
+
+
+class Break(AstNode):
+    __slots__ = ("line",)
+
+    def __init__(self, line: Optional[int]):
+        self.line = line
+
+
+class If(AstNode):
+    __slots__ = ("cond", "then", "otherwise", "line")
+    CHILDREN = ("cond", "then", "otherwise")
+
+    def __init__(self, cond, then, otherwise, line: Optional[int]):
+        self.cond = cond
+        self.then = then
+        self.otherwise = otherwise
+        self.line = line
+
+
+class Repeat(AstNode):
+    __slots__ = ("body", "cond", "line")
+    CHILDREN = ("body", "cond")
+
+    def __init__(self, body, cond, line: Optional[int]):
+        self.body = body
+        self.cond = cond
+        self.line = line
+
+
+class Return(AstNode):
+    __slots__ = ("value", "line")
+    CHILDREN = ("value",)
+
+    def __init__(self, value, line: Optional[int]):
+        self.value = value # None for a return without a value
+        self.line = line
+
+
+class Assign(AstNode):
+    __slots__ = ("target", "value", "line")
+    CHILDREN = ("target", "value")
+
+    def __init__(self, target: "Var", value, line: Optional[int]):
+        self.target = target
+        self.value = value
+        self.line = line
+
+
+class BinOp(AstNode):
+    __slots__ = ("op", "left", "right", "line")
+    CHILDREN = ("left", "right")
+
+    def __init__(self, op: str, left, right, line: Optional[int]):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.line = line
+
+    def label(self) -> str:
+        return f"BinOp {self.op}"
+
+
+class Var(AstNode):
+    __slots__ = ("name", "index", "line")
+    CHILDREN = ("index",)
+
+    def __init__(self, name: str, index, line: Optional[int]):
+        self.name = name
+        self.index = index # the index expression of an array element, or None
+        self.line = line
+
+    def label(self) -> str:
+        return f"Var {self.name}"
+
+
+class Call(AstNode):
+    __slots__ = ("name", "args", "line")
+    CHILDREN = ("args",)
+
+    def __init__(self, name: str, args: list, line: Optional[int]):
+        self.name = name
+        self.args = args
+        self.line = line
+
+    def label(self) -> str:
+        return f"Call {self.name}"
+
+
+class Num(AstNode):
+    __slots__ = ("value", "line")
+
+    def __init__(self, value: int, line: Optional[int]):
+        self.value = value
+        self.line = line
+
+    def label(self) -> str:
+        return f"Num {self.value}"
+
+
+def ast_lines(node: AstNode) -> Iterator[str]:
+    """Generates an indented dump of the AST, one node per line, fields that are None are left out."""
+    stack = [(node, "")]
+    while stack:
+        node, indent = stack.pop()
+        yield f"{indent}{node.label()}"
+        indent += "  "
+        for name in reversed(node.CHILDREN):
+            value = getattr(node, name)
+            if isinstance(value, list):
+                stack.extend((child, indent) for child in reversed(value))
+            elif value is not None:
+                stack.append((value, indent))
+
+
+# The semantic actions, the value of a production from the values of its symbols
+
+
+def cons(item, rest: Optional[list]) -> list:
+    """A right recursive list, built from its end."""
+    if rest is None:
+        rest = []
+    if item is not None:
+        rest.append(item)
+    return rest
+
+
+def items(rest: Optional[list]) -> list:
+    """The elements of a list built by cons in order."""
+    if rest is None:
+        return []
+    rest.reverse()
+    return rest
+
+
+def fold_mul(left, g: Optional[list]):
+    """Applies the '*' operands of G to left, G lists them from the last one."""
+    if g:
+        for line, factor in reversed(g):
+            left = BinOp("*", left, factor, line)
+    return left
+
+
+def fold_add(left, d: Optional[list]):
+    """Applies the (op, line, term) of D to left, D lists them from the last one."""
+    if d:
+        for op, line, term in reversed(d):
+            left = BinOp(op, left, term, line)
+    return left
+
+
+def relation(left, c: Optional[tuple]):
+    """Applies the relation of C to left, if there is one."""
+    if c is None:
+        return left
+    op, line, right = c
+    return BinOp(op, left, right, line)
+
+
+def var(name: Optional[tuple], index=None):
+    """The Var of an ID value."""
+    if name is None:
+        return Var(None, index, None)
+    return Var(name[0], index, name[1])
+
+
+def number(num: Optional[tuple]):
+    if num is None:
+        return None
+    return Num(int(num[0]), num[1])
+
+
+def declaration(initial: Optional[tuple], prime: Optional[tuple]):
+    type, name = initial if initial is not None else (None, None)
+    lexeme, line = name if name is not None else (None, None)
+    if prime is not None and prime[0] == "fun":
+        return FunDecl(type, lexeme, prime[1], prime[2], line)
+    return VarDecl(type, lexeme, None if prime is None else prime[1], line)
+
+
+def param(initial: Optional[tuple], array) -> Param:
+    type, name = initial if initial is not None else (None, None)
+    lexeme, line = name if name is not None else (None, None)
+    return Param(type, lexeme, bool(array), line)
+
+
+def first_param(type_line, name: Optional[tuple], array, rest: Optional[list]) -> list:
+    """Params -> int ID Param-prime Param-list, the first parameter is spelled out."""
+    lexeme, line = name if name is not None else (None, type_line)
+    return [Param("int", lexeme, bool(array), line)] + items(rest)
+
+
+def complete(partial: Optional[Callable], left):
+    """The expression a partial of the left factored forms makes of left, left if none."""
+    return left if partial is None else partial(left)
+
+
+# production text: action, called with the values of the symbols of the production
+ACTIONS: Dict[str, Callable] = {
+    "Program -> Declaration-list": lambda decls: Program(items(decls)),
+    "Declaration-list -> Declaration Declaration-list": cons,
+    "Declaration -> Declaration-initial Declaration-prime": declaration,
+    "Declaration-initial -> Type-specifier ID": lambda type, name: (type, name),
+    "Var-declaration-prime -> ;": lambda line: ("var", None),
+    "Var-declaration-prime -> [ NUM ] ;": lambda l1, num, l2, l3: ("var", None if num is None else int(num[0])),
+    "Fun-declaration-prime -> ( Params ) Compound-stmt": lambda l1, ps, l2, body: ("fun", ps if ps is not None else [], body),
+    "Type-specifier -> int": lambda line: "int",
+    "Type-specifier -> void": lambda line: "void",
+    "Params -> int ID Param-prime Param-list": first_param,
+    "Params -> void": lambda line: [],
+    "Param-list -> , Param Param-list": lambda line, p, rest: cons(p, rest),
+    "Param -> Declaration-initial Param-prime": param,
+    "Param-prime -> [ ]": lambda l1, l2: True,
+    "Compound-stmt -> { Declaration-list Statement-list }":
+        lambda line, decls, stmts, l2: Compound(items(decls), items(stmts), line),
+    "Statement-list -> Statement Statement-list": cons,
+    "Expression-stmt -> Expression ;": lambda e, line: ExprStmt(e, line),
+    "Expression-stmt -> break ;": lambda line, l2: Break(line),
+    "Expression-stmt -> ;": lambda line: ExprStmt(None, line),
+    "Selection-stmt -> if ( Expression ) Statement else Statement":
+        lambda line, l1, cond, l2, then, l3, otherwise: If(cond, then, otherwise, line),
+    "Iteration-stmt -> repeat Statement until ( Expression )":
+        lambda line, body, l1, l2, cond, l3: Repeat(body, cond, line),
+    "Return-stmt -> return Return-stmt-prime": lambda line, value: Return(value, line),
+    "Return-stmt-prime -> ;": lambda line: None,
+    "Return-stmt-prime -> Expression ;": lambda e, line: e,
+    "Expression -> ID B": lambda name, b: complete(b, var(name)),
+    "B -> = Expression": lambda line, e: lambda target: Assign(target, e, target.line),
+    "B -> [ Expression ] H": lambda l1, index, l2, h: lambda target: complete(h, Var(target.name, index, target.line)),
+    "H -> = Expression": lambda line, e: lambda target: Assign(target, e, target.line),
+    "H -> G D C": lambda g, d, c: lambda left: relation(fold_add(fold_mul(left, g), d), c),
+    "Simple-expression-zegond -> Additive-expression-zegond C": relation,
+    "Simple-expression-prime -> Additive-expression-prime C":
+        lambda a, c: lambda left: relation(complete(a, left), c),
+    "C -> Relop Additive-expression": lambda op, right: (op[0], op[1], right),
+    "Relop -> <": lambda line: ("<", line),
+    "Relop -> ==": lambda line: ("==", line),
+    "Additive-expression -> Term D": fold_add,
+    "Additive-expression-prime -> Term-prime D": lambda t, d: lambda left: fold_add(complete(t, left), d),
+    "Additive-expression-zegond -> Term-zegond D": fold_add,
+    "D -> Addop Term D": lambda op, term, rest: cons((op[0], op[1], term), rest),
+    "Addop -> +": lambda line: ("+", line),
+    "Addop -> -": lambda line: ("-", line),
+    "Term -> Factor G": fold_mul,
+    "Term-prime -> Factor-prime G": lambda f, g: lambda left: fold_mul(complete(f, left), g),
+    "Term-zegond -> Factor-zegond G": fold_mul,
+    "G -> * Factor G": lambda line, factor, rest: cons((line, factor), rest),
+    "Factor -> ( Expression )": lambda l1, e, l2: e,
+    "Factor -> ID Var-call-prime": lambda name, v: complete(v, var(name)),
+    "Factor -> NUM": number,
+    "Var-call-prime -> ( Args )": lambda l1, args, l2: lambda target: Call(target.name, items(args), target.line),
+    "Var-prime -> [ Expression ]": lambda l1, index, l2: lambda target: Var(target.name, index, target.line),
+    "Factor-prime -> ( Args )": lambda l1, args, l2: lambda target: Call(target.name, items(args), target.line),
+    "Factor-zegond -> ( Expression )": lambda l1, e, l2: e,
+    "Factor-zegond -> NUM": number,
+    "Arg-list -> Expression Arg-list-prime": cons,
+    "Arg-list-prime -> , Expression Arg-list-prime": lambda line, e, rest: cons(e, rest),
+}
+
+# the value of an epsilon production, None for all others (the end of a list, no operator)
+EPSILON_VALUES: Dict[str, object] = {
+    "Param-prime": False,
+}
+
+
+def production_actions(grammar: Dict[str, List[List[str]]]) -> Tuple[List[Optional[Callable]], List[object]]:
+    """The action and the epsilon value of every production, numbered in grammar order.
+
+    The action of a production with a single non-terminal and no entry in ACTIONS is None,
+    the value of that non-terminal is its value.
+    """
+    actions: List[Optional[Callable]] = []
+    epsilon_values: List[object] = []
+    for A, productions in grammar.items():
+        for production in productions:
+            text = f"{A} -> {' '.join(production)}"
+            action = ACTIONS.get(text)
+            if action is None and production != ["EPSILON"] and (len(production) != 1 or production[0] not in grammar):
+                raise ValueError(f"no AST action for {text}")
+            actions.append(action)
+            epsilon_values.append(EPSILON_VALUES.get(A))
+    return actions, epsilon_values
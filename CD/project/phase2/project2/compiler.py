@@ -1,23 +1,72 @@
+import argparse
+from pathlib import Path
 from parser import Parser
-from utils import write_output_files, getfile 
-from preprocess import preprocess, process_invalid
+from utils import write_output_files, write_syntax_errors
+from frontend import scan, split_errors
 # name: Mojtaba Mollaei
 # stdnum: 40131383
 # resources: Chatgpt, Copilot, Slides and Compilers, principles, techniques and tools by Aho, Sethi and Ullman
 
 
-def main():
+def print_profile(report: dict, filename: str):
+    print(f"{'phase':14} {'ms':>10} {'allocated MiB':>14} {'peak MiB':>9}")
+    for phase in report["phases"]:
+        print(f"{phase['phase']:14} {phase['seconds'] * 1000:10.1f} "
+              f"{phase['allocated'] / 2 ** 20:14.2f} {phase['peak'] / 2 ** 20:9.2f}")
+    counters = report["counters"]
+    lookups = counters["table_lookups"] # None for the descent engine, it has no table
+    print(f"{counters['tokens']} tokens, " + (f"{lookups} table lookups, " if lookups is not None else "") +
+          f"{counters['recovery_skips']} tokens skipped by error recovery, {counters['nodes']} nodes")
+    print(f"Profile written to {filename}")
+
 
-    # Read input file
-    code = getfile("./Test Cases/T03/input.txt")
+def main():
+    args = argparse.ArgumentParser(description="Parses a C-minus file into parse_tree.txt and syntax_errors.txt.")
+    args.add_argument("input_file", nargs="?", default="./Test Cases/T03/input.txt")
+    args.add_argument("--profile", metavar="REPORT", nargs="?", const="profile.json",
+                      help="time every phase and count the hot paths, the report is written as JSON (default: profile.json)")
+    args.add_argument("--mode", choices=("full", "recognize", "ast", "semantic"), default="full",
+                      help="full writes parse_tree.txt, recognize only syntax_errors.txt, ast writes ast.txt instead of the parse tree, "
+                           "semantic checks the AST and writes semantic_errors.txt (default: full)")
+    args.add_argument("--engine", choices=("table", "descent"), default="table",
+                      help="parse with the parse table or the generated recursive descent parser (default: table)")
+    args.add_argument("--tree-file", metavar="FILE", nargs="?", const="parse_tree.bin",
+                      help="also write the parse tree in the binary format of treefile.py (default: parse_tree.bin)")
+    args.add_argument("--snapshots", metavar="DIR", help="with --profile, dump a tracemalloc snapshot after every phase into DIR")
+    options = args.parse_args()
+    if options.mode != "full" and options.engine != "table":
+        args.error(f"--mode {options.mode} only runs on the table engine")
 
-    # Preprocess the code
-    code = preprocess(code)
-    errors, code = process_invalid(code)
+    if options.profile:
+        from profiling import profile_compile
+        report = profile_compile(options.input_file, Path(options.profile),
+                                 Path(options.snapshots) if options.snapshots else None,
+                                 options.mode, options.engine, options.tree_file)
+        print_profile(report, options.profile)
+        return
 
-    # Create parser and parse the code
-    parser = Parser(code)
+    # Read, preprocess and tokenize the input file in a single pass
+    lexical_errors = []
+    with open(options.input_file) as f:
+        # Create parser and parse the code
+        parser = Parser(f, tokenizer=lambda source: split_errors(scan(source), lexical_errors),
+                        flat=bool(options.tree_file) and options.engine == "table" and options.mode == "full",
+                        engine=options.engine, mode="ast" if options.mode == "semantic" else options.mode)
+    if options.mode != "full":
+        if options.mode == "semantic":
+            from semantic import analyze, write_semantic_errors
+            write_semantic_errors(analyze(parser.ast))
+        elif options.mode == "ast":
+            from ast_nodes import ast_lines
+            with open("ast.txt", "w", encoding="utf-8") as f:
+                f.writelines(line + "\n" for line in ast_lines(parser.ast))
+        write_syntax_errors(parser.syntax_errors)
+        print("Parsing successful")
+        return
     write_output_files(parser.tree, parser.syntax_errors)
+    if options.tree_file:
+        from treefile import write_tree_file
+        write_tree_file(parser.tree, options.tree_file)
     print("Parsing successful")
 
 
@@ -0,0 +1,163 @@
+"""Generates a recursive descent parser from the LL(1) grammar and its table.
+
+The generated module has one function per non-terminal. A function picks the production
+with an if chain on the int token code of the parser, makes the child nodes and derives
+them in order: a terminal is matched in place, a non-terminal is a call. It parses and
+recovers exactly like Parser.parse, which keeps the derivation on an explicit stack: a
+missing terminal is logged and skipped, and when the table has no entry the function
+calls Parser.recover and either starts over or gets an epsilon leaf. A production that
+ends with its own non-terminal (the lists) loops instead of recursing.
+
+The module is written next to this file as descent_parser.py, stamped with the hash of
+the grammar it was made from and of this file; load regenerates it when the grammar or
+the generator changed. Run this file to write it.
+"""
+import hashlib
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Dict, List
+from parser_rules import grammar, terminals
+from ll1 import get_tables, grammar_hash, IntTables, Grammar
+
+MODULE_FILE = Path(__file__).with_name("descent_parser.py")
+GENERATOR_HASH = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16] # the source of this file
+loaded: Dict[str, object] = {} # module of every grammar hash loaded by this process
+
+
+def function_name(symbol: str) -> str:
+    return symbol.replace("-", "_")
+
+
+def codes_test(codes: List[int]) -> str:
+    """The condition of an if on the token code t."""
+    if len(codes) == 1:
+        return f"t == {codes[0]}"
+    return f"t in {{{', '.join(map(str, codes))}}}" # a constant frozenset
+
+
+def nonterminal_function(grammar: Grammar, A: str, tables: IntTables) -> List[str]:
+    """The lines of the function deriving the non-terminal A into node."""
+    n = tables.n_terms
+    X = tables.ids[A]
+    row = tables.table[(X - n) * n:(X - n + 1) * n]
+    # the token codes of every production, in the order of the grammar
+    picks: Dict[int, List[int]] = {}
+    for t, production in enumerate(row):
+        if production >= 0:
+            picks.setdefault(production, []).append(t)
+
+    lines = [f"def {function_name(A)}(p, node):",
+             f'    """{A} -> {" | ".join(" ".join(production) for production in grammar[A])}"""',
+             "    while True:",
+             "        t = p.t"]
+    for production in sorted(picks):
+        right = tables.children[production]
+        lines.append(f"        if {codes_test(picks[production])}: # {' '.join(right) or 'EPSILON'}")
+        if not right:
+            lines.append("            node.add(EPSILON_LEAF)")
+            lines.append("            return")
+            continue
+        nodes = [f"c{i}" for i in range(len(right))]
+        for name, symbol in zip(nodes, right):
+            lines.append(f"            {name} = Node({symbol!r})")
+        lines.append(f"            node.children.extend(({', '.join(nodes)}))" if len(nodes) > 1 else
+                     f"            node.children.append({nodes[0]})")
+        tail = right[-1] == A
+        for i, (name, symbol) in enumerate(zip(nodes, right)):
+            if symbol in tables.terminal_ids:
+                lines.append(f"            if p.t == {tables.ids[symbol]}:")
+                lines.append(f"                {name}.tok_type, {name}.lexeme = p.tok_type, p.lexeme")
+                lines.append("                p.advance()")
+                lines.append("            else:")
+                lines.append(f"                p.log_err({f'syntax error, missing {symbol}'!r})")
+            elif tail and i == len(right) - 1:
+                lines.append(f"            node = {name}")
+                lines.append("            continue")
+            else:
+                lines.append(f"            {function_name(symbol)}(p, {name})")
+        if not tail:
+            lines.append("            return")
+    lines.append(f"        if not p.recover({X}):")
+    lines.append("            node.add(EPSILON_LEAF)")
+    lines.append("            return")
+    return lines
+
+
+def stamp(key: str) -> str:
+    """What a module of the grammar with hash key is made from, it is stale when this changes."""
+    return f"{key}-{GENERATOR_HASH}"
+
+
+def generate(grammar: Grammar, tables: IntTables, key: str) -> str:
+    """The source of the parser module of the grammar with hash key and its tables."""
+    lines = ["# generated by descent.py, do not edit",
+             "from utils import Node, EPSILON_LEAF",
+             "",
+             f"STAMP = {stamp(key)!r}",
+             "",
+             "",
+             "def parse(p):",
+             '    """Parses the tokens of the Parser p like Parser.parse, returns the tree."""',
+             "    p.advance()",
+             '    root = Node("Program")',
+             "    Program(p, root)",
+             f"    if p.t == {tables.end}:",
+             "        p.advance()",
+             "    else:",
+             "        p.log_err('syntax error, missing $')",
+             '    root.add(Node("$"))',
+             "    return root",
+             ]
+    for A in grammar:
+        lines += ["", ""] + nonterminal_function(grammar, A, tables)
+    return "\n".join(lines) + "\n"
+
+
+def write_module(filename: Path = MODULE_FILE):
+    """Writes the parser module of the grammar of parser_rules.py."""
+    first, follow, table, _ = get_tables(grammar, terminals)
+    tables = IntTables(grammar, terminals, first, follow, table)
+    filename.write_text(generate(grammar, tables, grammar_hash(grammar, terminals)), encoding="utf-8")
+
+
+def load(grammar: Grammar, tables: IntTables, key: str):
+    """The parser module of the grammar, written again if it is missing, for another grammar or
+    from another version of this file.
+
+    Args:
+        grammar: Productions of every non-terminal
+        tables: The interned tables of the grammar
+        key: grammar_hash of the grammar
+    """
+    if key in loaded:
+        return loaded[key]
+    module = import_file(MODULE_FILE)
+    if module is None or getattr(module, "STAMP", None) != stamp(key):
+        source = generate(grammar, tables, key)
+        try:
+            MODULE_FILE.write_text(source, encoding="utf-8")
+            module = import_file(MODULE_FILE)
+        except OSError: # the file is only a cache, run the module from memory
+            module = None
+        if module is None:
+            module = importlib.util.module_from_spec(importlib.util.spec_from_loader(MODULE_FILE.stem, loader=None))
+            exec(compile(source, str(MODULE_FILE), "exec"), module.__dict__)
+    loaded[key] = module
+    return module
+
+
+def import_file(filename: Path):
+    """Imports the module of a file, None if it is missing or broken."""
+    spec = importlib.util.spec_from_file_location(filename.stem, filename)
+    try:
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except (OSError, SyntaxError, ImportError):
+        return None
+    return module
+
+
+if __name__ == "__main__":
+    write_module()
+    print(f"wrote {MODULE_FILE.name}", file=sys.stderr)
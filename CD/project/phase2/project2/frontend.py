@@ -0,0 +1,103 @@
+"""Single pass front end: preprocess, process_invalid and tokenize fused into one generator.
+The source is read line by line, only the current line (and the first line of an open comment)
+is kept in memory, no copy of the whole text is made."""
+from preprocess import process_line
+from scanner_rules import TOKEN
+
+"""Other whitespace characters are replaced with space, like preprocess does"""
+OTHER_WHITESPACE = str.maketrans("\r\t\v\f", "    ")
+
+
+"""Reads the lines of the source and yields them the way preprocess would leave them.
+Closed comments are replaced with spaces (the lines inside a comment are yielded as empty lines),
+an unclosed comment is left as it is and nothing after its line is yielded."""
+def clean_lines(source):
+    ends_with_newline = True # an empty source is still one (empty) line
+    opened = None # (line before '/*', text from '/*' to the end of the line) of an open comment
+    inside = 0 # number of lines inside the open comment
+    for raw in source:
+        ends_with_newline = raw.endswith("\n")
+        line = raw[:-1] if ends_with_newline else raw
+        line = line.translate(OTHER_WHITESPACE)
+
+        parts = [] # the cleaned line
+        pos = 0
+        if opened is not None: # we are inside a comment that started on a previous line
+            e = line.find("*/")
+            if e == -1:
+                inside += 1
+                continue
+            yield opened[0] + " " * len(opened[1])
+            for _ in range(inside):
+                yield ""
+            opened, inside = None, 0
+            parts.append(" " * (e + 2))
+            pos = e + 2
+
+        while True:
+            s = line.find("/*", pos)
+            if s == -1:
+                parts.append(line[pos:])
+                break
+            parts.append(line[pos:s])
+            e = line.find("*/", s + 2)
+            if e == -1: # the comment goes on in the next lines
+                opened = ("".join(parts), line[s:])
+                break
+            parts.append(" " * (e + 2 - s))
+            pos = e + 2
+        if opened is None:
+            yield "".join(parts)
+
+    if opened is not None: # unclosed comment, the line keeps its '/*'
+        yield opened[0] + opened[1]
+    elif ends_with_newline:
+        yield ""
+
+
+"""This function generates the lexical errors and the tokens of the source in one pass.
+It yields ("ERROR", errors, line) for every line with lexical errors, the same
+(type, lexeme, line) tokens as tokenize(process_invalid(preprocess(code))) and ("FIN", line) at the end."""
+def scan(source):
+    return scan_lines(map(process_line, clean_lines(source)))
+
+
+"""Tokenizes the (errors, line, abort) that process_line gives for the cleaned lines, yields what scan yields."""
+def scan_lines(processed):
+    line_number = 0
+    swallowed = False # JUNK found, like tokenize no more tokens are generated
+    pending = None # a '&' or '|' that ended a line, the first half of a SPLIT symbol
+    for errors, line, abort in processed:
+        line_number += 1
+        if errors:
+            yield "ERROR", " ".join(errors), line_number
+        start = 0
+        if pending is not None and not swallowed:
+            if line.startswith(pending):
+                yield "SYMBOL", pending * 2, line_number
+                pending, start = None, 1
+            elif line: # only empty lines may come between the halves
+                swallowed = True
+        if not swallowed and pending is None:
+            for match in TOKEN.finditer(line, start):
+                kind = match.lastgroup
+                if kind == "JUNK":
+                    if match.group() in ("&", "|"): # the rest of the line, it may go on in a later one
+                        pending = match.group()
+                    else:
+                        swallowed = True
+                    break
+                if kind != "SPACE":
+                    yield kind, match.group(), line_number
+        if abort: # unclosed comment, the rest of the code is dropped
+            break
+    yield "FIN", line_number + 1
+
+
+"""Yields the tokens of a scan and puts the (line, errors) of its ERROR entries into errors."""
+def split_errors(stream, errors: list):
+    for item in stream:
+        if item[0] == "ERROR":
+            errors.append((item[2], item[1]))
+        else:
+            yield item
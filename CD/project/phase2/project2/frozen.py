@@ -0,0 +1,68 @@
+"""The parse tables frozen ahead of time, for a fast cold start.
+
+Parsing only needs the IntTables of the grammar, but building them means hashing the
+grammar, reading the json cache of ll1.py (or computing FIRST, FOLLOW and the table) and
+interning every symbol. The frozen file holds the finished IntTables and the grammar hash
+as a marshal blob, stamped with the size and modification time of the sources it depends
+on like a .pyc, so a start costs a stat per source and a marshal.loads. A missing or stale
+file is written again by the first Parser that loads it.
+
+Run this file as the build step that writes it ahead of time.
+"""
+import marshal
+import os
+import sys
+from pathlib import Path
+from typing import Tuple
+from ll1 import IntTables
+
+FROZEN_FILE = Path(__file__).with_name("parse_tables.frozen")
+VERSION = 1
+# the grammar, the analysis and interning of IntTables, the Parser reading them and this file,
+# the tables are stale when any of them changes
+SOURCES = ["parser_rules.py", "ll1.py", "parser.py", "frozen.py"]
+
+
+def stamp() -> tuple:
+    """What the frozen tables were made from, they are stale when it changes."""
+    here = Path(__file__).parent
+    sources = []
+    for name in SOURCES:
+        st = os.stat(here / name)
+        sources.append((st.st_mtime_ns, st.st_size))
+    # the table is an array of native shorts, a file from another byte order is stale too
+    return VERSION, sys.byteorder, tuple(sources)
+
+
+def freeze(filename: Path = FROZEN_FILE) -> Tuple[IntTables, str]:
+    """Builds the IntTables of parser_rules.py and writes them frozen, returns them and the grammar hash."""
+    source_stamp = stamp() # taken first, a source edited meanwhile leaves the file stale
+    from parser_rules import grammar, terminals
+    from ll1 import get_tables, grammar_hash
+    first, follow, table, _ = get_tables(grammar, terminals)
+    codes = IntTables(grammar, terminals, first, follow, table)
+    key = grammar_hash(grammar, terminals)
+    # written beside and renamed, a Parser never reads a half written file
+    temp = filename.with_name(f"{filename.name}.{os.getpid()}.tmp")
+    try:
+        temp.write_bytes(marshal.dumps((source_stamp, key, codes.freeze())))
+        os.replace(temp, filename)
+    except OSError: # the file is only a cache, the tables are built on every start then
+        pass
+    return codes, key
+
+
+def load(filename: Path = FROZEN_FILE) -> Tuple[IntTables, str]:
+    """The IntTables of parser_rules.py and the grammar hash, thawed if the frozen file is current."""
+    try:
+        source_stamp, key, fields = marshal.loads(filename.read_bytes())
+        if source_stamp == stamp():
+            return IntTables.thaw(fields), key
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    return freeze(filename)
+
+
+if __name__ == "__main__":
+    freeze()
+    print(f"wrote {FROZEN_FILE.name}", file=sys.stderr)
@@ -0,0 +1,367 @@
+"""Incremental scanning and parsing of a source that is edited in place.
+
+The source is kept as its list of lines with the scan of every cleaned line, and the parse
+records a checkpoint (token position, stacks, number of errors) every CHECKPOINT_EVERY
+matched tokens. An edit re-lexes from the last line that starts outside a comment, until a
+line after the edit ends outside a comment in the old scan too, the rest of the old scan is
+reused. A line that ends with the first half of a split '&&' or '||' counts as inside a
+comment, the scan of the next line depends on it. The parse restarts from the last
+checkpoint before the re-lexed lines and stops when it reaches the position of an old
+checkpoint after them with the same stack: from there on the old parse did the same, so the
+subtrees it built under the nodes of that stack are moved to the new ones and its errors are
+kept, with their lines moved.
+"""
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from frontend import clean_lines
+from preprocess import process_line
+from scanner_rules import TOKEN
+from parser import Parser
+from utils import Node, EPSILON_LEAF
+
+CHECKPOINT_EVERY = 64 # matched tokens between two checkpoints of the parse
+
+# scan of a cleaned line: (errors, tokens up to a JUNK, whether there was a JUNK, abort)
+Line = Tuple[str, Tuple[Tuple[str, str], ...], bool, bool]
+# (line, token index in the line, symbol stack, node stack, number of syntax errors)
+Checkpoint = Tuple[int, int, Tuple[int, ...], Tuple[Node, ...], int]
+
+
+def split_lines(text: str) -> List[str]:
+    """Splits text into lines that keep their newline, the lines a file of it is read in."""
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def lex_lines(raw: List[str], start: int) -> Iterator[Tuple[Line, bool]]:
+    """Scans the cleaned lines from raw line start on, like frontend.scan.
+
+    Yields the Line of every cleaned line and whether the raw line ends outside a comment
+    and a split symbol, so the scan can be restarted after it.
+    """
+    read = start # raw lines read by clean_lines
+    def source():
+        nonlocal read
+        for i in range(start, len(raw)):
+            read = i + 1
+            yield raw[i]
+
+    pending = None # a '&' or '|' that ended a line, like in frontend.scan_lines
+    for x, line in enumerate(clean_lines(source()), start):
+        errors, line, abort = process_line(line)
+        tokens = []
+        junk = False
+        at = 0
+        if pending is not None:
+            if line.startswith(pending):
+                tokens.append(("SYMBOL", pending * 2))
+                pending, at = None, 1
+            elif line:
+                pending, junk = None, True
+        if not junk and pending is None:
+            for match in TOKEN.finditer(line, at):
+                kind = match.lastgroup
+                if kind == "JUNK":
+                    if match.group() in ("&", "|"):
+                        pending = match.group()
+                    else:
+                        junk = True
+                    break
+                if kind != "SPACE":
+                    tokens.append((kind, match.group()))
+        # a line that closes its comments is yielded before the next raw line is read
+        yield (" ".join(errors), tuple(tokens), junk, abort), read == x + 1 and pending is None
+
+
+class Cursor:
+    """Iterator over the tokens of the scanned lines from token index of line on.
+
+    line and index are the position of the last token returned, line is len(lines) once
+    the tokens ended. Like frontend.scan no token follows a JUNK or an aborted line.
+    """
+    __slots__ = ("lines", "line", "index")
+
+    def __init__(self, lines: List[Line], line: int = 0, index: int = 0):
+        self.lines = lines
+        self.line = line
+        self.index = index - 1
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        lines = self.lines
+        self.index += 1
+        while self.line < len(lines):
+            _, tokens, junk, abort = lines[self.line]
+            if self.index < len(tokens):
+                kind, lexeme = tokens[self.index]
+                return kind, lexeme, self.line + 1
+            if junk or abort:
+                break
+            self.line += 1
+            self.index = 0
+        self.line = len(lines)
+        return "FIN", len(lines) + 1
+
+
+class IncrementalParser(Parser):
+    """LL(1) parser of a source that is changed with edit.
+
+    After every edit the scan, the syntax errors and the tree are the same as a full scan
+    and parse of the new text would give.
+    """
+
+    def __init__(self, code: str = ""):
+        """Scans and parses code.
+
+        Args:
+            code: The source code, with '\\n' line ends
+        """
+        self.raw: List[str] = split_lines(code) # the lines of the source, with their '\n'
+        self.lines: List[Line] = [] # scan of every cleaned line
+        self.safe: List[bool] = [] # whether the raw line ends outside a comment and a split symbol
+        for line, safe in lex_lines(self.raw, 0):
+            self.lines.append(line)
+            self.safe.append(safe)
+        self.checkpoints: List[Checkpoint] = []
+        # nodes of old checkpoints that were replaced by a node of a newer parse
+        self.alias: Dict[Node, Node] = {}
+        self.error_lines: List[int] = [] # line of every syntax error
+        super().__init__(code, tokenizer=lambda _: iter(()))
+
+    @property
+    def text(self) -> str:
+        """The current source."""
+        return "".join(self.raw)
+
+    def scan(self) -> Iterator[tuple]:
+        """Yields the same items as frontend.scan of the current source."""
+        number = 0
+        swallowed = False
+        for number, (errors, tokens, junk, abort) in enumerate(self.lines, 1):
+            if errors:
+                yield "ERROR", errors, number
+            if not swallowed:
+                for kind, lexeme in tokens:
+                    yield kind, lexeme, number
+                swallowed = junk
+            if abort:
+                break
+        yield "FIN", number + 1
+
+    def log_err(self, msg: str):
+        """Records a syntax error with line number."""
+        super().log_err(msg)
+        self.error_lines.append(self.current_line)
+
+    def log_illegal(self, skipped: List[Tuple[int, str]]):
+        """Records the illegal token errors with their line numbers."""
+        super().log_illegal(skipped)
+        self.error_lines.extend(line for line, _ in skipped)
+
+    def live(self, node: Node) -> Node:
+        """The node of the current tree that took the place of a node of a checkpoint."""
+        while node in self.alias:
+            node = self.alias[node]
+        return node
+
+    def parse(self) -> None:
+        """Parses the whole source."""
+        codes = self.codes
+        self.syntax_errors, self.error_lines = [], []
+        self.checkpoints, self.alias = [], {}
+        self.tokens = Cursor(self.lines)
+        self.advance()
+        self.tree = Node("Program")
+        self.run([codes.end, codes.ids["Program"]], [Node("$"), self.tree])
+        self.tree.add(Node("$"))
+
+    def run(self, symbol_stack: List[int], node_stack: List[Node],
+            targets: Sequence[Checkpoint] = (), delta: int = 0) -> int:
+        """The parse loop of Parser.parse from the given stacks, recording checkpoints.
+
+        Args:
+            symbol_stack, node_stack: The stacks to go on from, self.a holds the lookahead
+            targets: Checkpoints of the old parse in lines the edit did not change
+            delta: Number of lines the edit added before the targets
+
+        Returns:
+            The index of the first target whose position and stack the parse reaches, the
+            rest of the parse is the same as the old one from there, or -1 at the end
+        """
+        codes = self.codes
+        n_terms, table, end = codes.n_terms, codes.table, codes.end
+        productions, children, names = codes.productions, codes.children, codes.names
+        cursor, checkpoints = self.tokens, self.checkpoints
+
+        t = self.t
+        matched = 0 # tokens matched since the last checkpoint
+        i = 0 # next target
+        pop_symbol, pop_node = symbol_stack.pop, node_stack.pop
+        push_symbols, push_nodes = symbol_stack.extend, node_stack.extend
+
+        while symbol_stack:
+            X = pop_symbol()
+            current_node = pop_node()
+
+            # Handle terminals
+            if X < n_terms:
+                if t == X:
+                    if X != end:
+                        current_node.tok_type, current_node.lexeme = self.tok_type, self.lexeme
+                    self.advance()
+                    t = self.t
+                    if t == end:
+                        continue
+                    if i < len(targets):
+                        here = (cursor.line - delta, cursor.index)
+                        while i < len(targets) and targets[i][:2] < here:
+                            i += 1
+                        if i < len(targets) and targets[i][:2] == here and targets[i][2] == tuple(symbol_stack):
+                            return i
+                    matched += 1
+                    if matched == CHECKPOINT_EVERY:
+                        matched = 0
+                        checkpoints.append((cursor.line, cursor.index, tuple(symbol_stack),
+                                            tuple(node_stack), len(self.syntax_errors)))
+                else:
+                    self.log_err(f"syntax error, missing {names[X]}")
+                continue
+
+            # Handle non-terminals
+            production = table[(X - n_terms) * n_terms + t]
+            if production < 0:
+                if self.recover(X):
+                    symbol_stack.append(X)
+                    node_stack.append(current_node)
+                else:
+                    current_node.add(EPSILON_LEAF)
+                t = self.t
+                continue
+
+            # Expand production
+            right = children[production]
+            if not right:
+                current_node.add(EPSILON_LEAF)
+            else:
+                nodes = list(map(Node, right))
+                current_node.children.extend(nodes)
+                push_symbols(productions[production])
+                push_nodes(reversed(nodes))
+        return -1
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> None:
+        """Replaces deleted characters at offset with inserted and updates the scan, the
+        syntax errors and the tree.
+
+        Raises:
+            ValueError: If the deleted characters are not in the source
+        """
+        raw = self.raw
+        starts = list(accumulate(map(len, raw), initial=0)) # offset of every line
+        if offset < 0 or deleted < 0 or offset + deleted > starts[-1]:
+            raise ValueError(f"edit at {offset} deleting {deleted} is outside of the {starts[-1]} characters")
+        # lines a .. b hold the deleted text, len(raw) is the empty line after a final '\n'
+        last = len(raw) if not raw or raw[-1].endswith("\n") else len(raw) - 1
+        a = min(bisect_right(starts, offset) - 1, last)
+        b = min(bisect_right(starts, offset + deleted) - 1, last)
+        head = raw[a][:offset - starts[a]] if a < len(raw) else ""
+        tail = raw[b][offset + deleted - starts[b]:] if b < len(raw) else ""
+        block = split_lines(head + inserted + tail)
+        delta = len(block) - len(raw[a:b + 1])
+        raw[a:b + 1] = block
+
+        restart, reused = self.relex(a, a + len(block), delta)
+        self.reparse(restart, reused, delta)
+
+    def relex(self, a: int, end: int, delta: int) -> Tuple[int, Optional[int]]:
+        """Scans the lines again from the last line before a that starts outside a comment.
+
+        The edited lines are a .. end-1 and delta lines were added. The scan stops after a
+        line at end or later that ends outside a comment (and a split symbol) in both scans,
+        the old scan of the lines after it is kept.
+
+        Returns:
+            (restart, reused), the first line scanned again and the first line whose scan is
+            kept, None if the scan went on to the end
+        """
+        lines, safe = self.lines, self.safe
+        restart = min(a, max(len(self.raw) - 1, 0))
+        while restart > 0 and not (restart - 1 < len(safe) and safe[restart - 1]):
+            restart -= 1
+
+        new_lines, new_safe = [], []
+        reused = None
+        for x, (line, ends_safe) in enumerate(lex_lines(self.raw, restart), restart):
+            new_lines.append(line)
+            new_safe.append(ends_safe)
+            old = x - delta # the same line in the old scan
+            if (ends_safe and end <= x + 1 < len(self.raw) and
+                    (old < 0 or (old < len(safe) and safe[old]))):
+                reused = x + 1
+                break
+        kept = reused - delta if reused is not None else len(lines)
+        self.lines = lines[:restart] + new_lines + lines[kept:]
+        self.safe = safe[:restart] + new_safe + safe[kept:]
+        return restart, reused
+
+    def reparse(self, restart: int, reused: Optional[int], delta: int) -> None:
+        """Parses again from the last checkpoint before line restart, up to an old checkpoint
+        in the reused lines that the parse reaches with the same stack."""
+        codes = self.codes
+        checkpoints = self.checkpoints
+        k = bisect_left(checkpoints, (restart,)) # first checkpoint in a line scanned again
+        targets = checkpoints[bisect_left(checkpoints, (reused - delta,)):] if reused is not None else []
+        old_errors, old_error_lines = self.syntax_errors, self.error_lines
+
+        # the tree as it was at the checkpoint: the nodes on its stack lose what they got after it
+        finals: Dict[Node, Tuple[List[Node], Optional[str], Optional[str]]] = {}
+        if k:
+            line, index, symbols, nodes, n_errors = checkpoints[k - 1]
+            symbol_stack = list(symbols)
+            node_stack = [self.live(node) for node in nodes]
+            for node in node_stack:
+                finals[node] = node.children, node.tok_type, node.lexeme
+                node.children, node.tok_type, node.lexeme = [], None, None
+            self.tree.children.pop() # the $ added at the end of the parse
+        else:
+            line = index = n_errors = 0
+            self.tree = Node("Program")
+            symbol_stack = [codes.end, codes.ids["Program"]]
+            node_stack = [Node("$"), self.tree]
+        self.checkpoints = checkpoints[:k]
+        self.syntax_errors, self.error_lines = old_errors[:n_errors], old_error_lines[:n_errors]
+        self.tokens = Cursor(self.lines, line, index)
+        self.advance()
+
+        i = self.run(symbol_stack, node_stack, targets, delta)
+        if i >= 0:
+            # the old parse built the rest of the tree under the nodes of the target's stack
+            _, _, _, old_nodes, n_errors = targets[i]
+            moved: Dict[Node, Node] = {} # nodes of the checkpoint that are still in the tree
+            for node, old in zip(node_stack, old_nodes):
+                old = self.live(old)
+                if old in finals:
+                    node.children, node.tok_type, node.lexeme = finals[old]
+                    if old is not node:
+                        moved[old] = node
+                else:
+                    node.children, node.tok_type, node.lexeme = old.children, old.tok_type, old.lexeme
+                    self.alias[old] = node
+
+            shift = len(self.syntax_errors) - n_errors
+            for error, error_line in zip(old_errors[n_errors:], old_error_lines[n_errors:]):
+                self.syntax_errors.append(f"#{error_line + delta}{error[error.index(' '):]}")
+                self.error_lines.append(error_line + delta)
+            for line, index, symbols, nodes, n in targets[i:]:
+                if moved and any(self.live(node) in moved for node in nodes):
+                    nodes = tuple(moved.get(self.live(node), node) for node in nodes)
+                else:
+                    moved = {}
+                self.checkpoints.append((line + delta, index, symbols, nodes, n + shift))
+        self.tree.add(Node("$"))
@@ -0,0 +1,260 @@
+"""Grammar analysis for the LL(1) parser: nullable, FIRST and FOLLOW sets by fixed point,
+the parse table and its conflicts. The result is cached in a json file keyed by the hash
+of the grammar and TABLE_VERSION, so a warm start loads the table instead of computing it.
+IntTables is the same table with the symbols interned to ints, for the parse loop.
+
+json and hashlib are imported where they are used, a Parser that thaws its frozen tables
+(frozen.py) only needs IntTables."""
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List, Set, Tuple, Optional
+
+EPSILON = "EPSILON"
+END = "$"
+CACHE_FILE = Path(__file__).with_name("parse_table.cache.json")
+# raise it when the analysis or the cache format changes, the tables cached before are stale then
+TABLE_VERSION = 1
+
+Grammar = Dict[str, List[List[str]]]
+
+
+def compute_nullable(grammar: Grammar) -> Set[str]:
+    """Returns the non-terminals that derive epsilon."""
+    nullable: Set[str] = set()
+    changed = True
+    while changed:
+        changed = False
+        for A, productions in grammar.items():
+            if A in nullable:
+                continue
+            for production in productions:
+                if all(sym == EPSILON or sym in nullable for sym in production):
+                    nullable.add(A)
+                    changed = True
+                    break
+    return nullable
+
+
+def first_of(sequence: List[str], first: Dict[str, Set[str]], nullable: Set[str]) -> Tuple[Set[str], bool]:
+    """Returns FIRST of a sequence of symbols (without EPSILON) and whether it is nullable."""
+    result: Set[str] = set()
+    for sym in sequence:
+        if sym == EPSILON:
+            continue
+        if sym not in first:  # terminal
+            result.add(sym)
+            return result, False
+        result |= first[sym] - {EPSILON}
+        if sym not in nullable:
+            return result, False
+    return result, True
+
+
+def compute_first(grammar: Grammar, nullable: Set[str]) -> Dict[str, Set[str]]:
+    """Returns the FIRST set of every non-terminal, EPSILON is in it if the non-terminal is nullable."""
+    first: Dict[str, Set[str]] = {A: set() for A in grammar}
+    changed = True
+    while changed:
+        changed = False
+        for A, productions in grammar.items():
+            for production in productions:
+                prod_first, _ = first_of(production, first, nullable)
+                if not prod_first <= first[A]:
+                    first[A] |= prod_first
+                    changed = True
+    for A in nullable:
+        first[A].add(EPSILON)
+    return first
+
+
+def compute_follow(grammar: Grammar, first: Dict[str, Set[str]], nullable: Set[str],
+                   start: str = "Program") -> Dict[str, Set[str]]:
+    """Returns the FOLLOW set of every non-terminal."""
+    follow: Dict[str, Set[str]] = {A: set() for A in grammar}
+    follow[start].add(END)
+    changed = True
+    while changed:
+        changed = False
+        for A, productions in grammar.items():
+            for production in productions:
+                for i, B in enumerate(production):
+                    if B not in grammar:
+                        continue
+                    rest_first, rest_nullable = first_of(production[i + 1:], first, nullable)
+                    new = rest_first | (follow[A] if rest_nullable else set())
+                    if not new <= follow[B]:
+                        follow[B] |= new
+                        changed = True
+    return follow
+
+
+def build_table(grammar: Grammar, terminals: Set[str], first: Dict[str, Set[str]],
+                follow: Dict[str, Set[str]], nullable: Set[str]):
+    """Builds the LL(1) parse table.
+
+    Returns:
+        (table, conflicts), table maps (non-terminal, terminal) to a production or None,
+        conflicts lists (non-terminal, terminal, production, other production), the last
+        production of a conflict is kept in the table
+    """
+    table: Dict[Tuple[str, str], Optional[List[str]]] = {(A, t): None for A in grammar for t in terminals}
+    conflicts = []
+    for A, productions in grammar.items():
+        for production in productions:
+            prod_first, prod_nullable = first_of(production, first, nullable)
+            targets = prod_first | (follow[A] if prod_nullable else set())
+            for a in targets:
+                if a not in terminals:  # Only add entries for valid terminals
+                    continue
+                if table[(A, a)] is not None and table[(A, a)] is not production:
+                    conflicts.append((A, a, table[(A, a)], production))
+                table[(A, a)] = production
+    return table, conflicts
+
+
+def grammar_hash(grammar: Grammar, terminals: Set[str], start: str = "Program") -> str:
+    """Hash of everything the tables depend on."""
+    import hashlib
+    import json
+    text = json.dumps([TABLE_VERSION, start, sorted(terminals), grammar], sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def analyze(grammar: Grammar, terminals: Set[str], start: str = "Program"):
+    """Computes (first, follow, table, conflicts) of the grammar."""
+    nullable = compute_nullable(grammar)
+    first = compute_first(grammar, nullable)
+    follow = compute_follow(grammar, first, nullable, start)
+    table, conflicts = build_table(grammar, terminals, first, follow, nullable)
+    return first, follow, table, conflicts
+
+
+def save_tables(path: Path, key: str, grammar: Grammar, first, follow, table, conflicts):
+    """Writes the tables to the cache file, productions are stored as their index in the grammar."""
+    import json
+    def index(A, production):
+        return next(i for i, p in enumerate(grammar[A]) if p is production)
+
+    data = {
+        "hash": key,
+        "first": {A: sorted(s) for A, s in first.items()},
+        "follow": {A: sorted(s) for A, s in follow.items()},
+        "table": [[A, a, index(A, p)] for (A, a), p in table.items() if p is not None],
+        "conflicts": [[A, a, index(A, p), index(A, q)] for A, a, p, q in conflicts],
+    }
+    try:
+        path.write_text(json.dumps(data), encoding="utf-8")
+    except OSError:  # the cache is only an optimization
+        pass
+
+
+def load_tables(path: Path, key: str, grammar: Grammar, terminals: Set[str]):
+    """Reads the tables from the cache file, returns None if it is missing or for another grammar."""
+    import json
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("hash") != key:
+        return None
+    first = {A: set(s) for A, s in data["first"].items()}
+    follow = {A: set(s) for A, s in data["follow"].items()}
+    table = {(A, t): None for A in grammar for t in terminals}
+    for A, a, i in data["table"]:
+        table[(A, a)] = grammar[A][i]
+    conflicts = [(A, a, grammar[A][i], grammar[A][j]) for A, a, i, j in data["conflicts"]]
+    return first, follow, table, conflicts
+
+
+def get_tables(grammar: Grammar, terminals: Set[str], start: str = "Program", cache_file: Optional[Path] = CACHE_FILE):
+    """Returns (first, follow, table, conflicts), from the cache file when it matches the grammar.
+
+    Args:
+        grammar: Productions of every non-terminal
+        terminals: Terminal symbols, including $
+        start: Start symbol
+        cache_file: Where the tables are cached, None to always compute them
+    """
+    key = grammar_hash(grammar, terminals, start)
+    if cache_file is not None:
+        tables = load_tables(cache_file, key, grammar, terminals)
+        if tables is not None:
+            return tables
+    tables = analyze(grammar, terminals, start)
+    if cache_file is not None:
+        save_tables(cache_file, key, grammar, *tables)
+    return tables
+
+
+class IntTables:
+    """The parse table with every grammar symbol interned to a small int.
+
+    Terminals are 0 .. n_terms-2 in sorted order, n_terms-1 (other) stands for any token
+    that is not a terminal of the grammar and the non-terminals follow in grammar order.
+    table is a flat array('h') indexed by nt * n_terms + t, where nt is the non-terminal id
+    minus n_terms, holding the number of the production to expand or -1.
+    """
+
+    def __init__(self, grammar: Grammar, terminals: Set[str], first, follow, table):
+        self.names: List[Optional[str]] = sorted(terminals) + [None] + list(grammar)
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(self.names) if name is not None}
+        self.n_terms = len(terminals) + 1
+        self.other = self.n_terms - 1
+        self.end = self.ids[END]
+        # id of every terminal, a token looks itself up here and gets other if it is missing
+        self.terminal_ids: Dict[str, int] = {a: self.ids[a] for a in terminals}
+
+        # productions[p]: ids of the right side reversed, ready to be pushed on the stack,
+        # right_ids[p] and children[p]: ids and names of the right side in order,
+        # all empty for an epsilon production
+        self.productions: List[Tuple[int, ...]] = []
+        self.right_ids: List[Tuple[int, ...]] = []
+        self.children: List[Tuple[str, ...]] = []
+        number = {}
+        for A, productions in grammar.items():
+            for production in productions:
+                number[id(production)] = len(self.productions)
+                right = () if production == [EPSILON] else tuple(production)
+                self.productions.append(tuple(self.ids[sym] for sym in reversed(right)))
+                self.right_ids.append(tuple(self.ids[sym] for sym in right))
+                self.children.append(right)
+
+        n = self.n_terms
+        self.table = array("h", [-1]) * (len(grammar) * n)
+        for (A, a), production in table.items():
+            if production is not None:
+                self.table[(self.ids[A] - n) * n + self.ids[a]] = number[id(production)]
+        # FIRST and FOLLOW of every non-terminal as sets of terminal ids, indexed by nt
+        self.first: List[frozenset] = [frozenset(self.ids[a] for a in first[A] if a in terminals) for A in grammar]
+        self.follow: List[frozenset] = [frozenset(self.ids[a] for a in follow[A] if a in terminals) for A in grammar]
+        # the same sets as bitmasks over the terminal ids for panic mode, t is in a set if
+        # mask >> t & 1; follow_mask also has $ and sync_mask is every token the skipping stops at
+        self.first_mask: List[int] = [sum(1 << t for t in s) for s in self.first]
+        self.follow_mask: List[int] = [sum(1 << t for t in s) | 1 << self.end for s in self.follow]
+        self.sync_mask: List[int] = [f | g for f, g in zip(self.first_mask, self.follow_mask)]
+
+    def freeze(self) -> dict:
+        """The fields as values marshal can write, thaw makes the tables of them again."""
+        fields = dict(vars(self))
+        fields["table"] = self.table.tobytes()
+        return fields
+
+    @classmethod
+    def thaw(cls, fields: dict) -> "IntTables":
+        """The tables of the fields of freeze, without the grammar."""
+        tables = cls.__new__(cls)
+        vars(tables).update(fields)
+        tables.table = array("h")
+        tables.table.frombytes(fields["table"])
+        return tables
+
+
+if __name__ == "__main__":
+    from parser_rules import grammar, terminals
+    first, follow, table, conflicts = analyze(grammar, terminals)
+    for A in grammar:
+        print(f"{A}\n    FIRST:  {' '.join(sorted(first[A]))}\n    FOLLOW: {' '.join(sorted(follow[A]))}")
+    for A, a, p, q in conflicts:
+        print(f"conflict at ({A}, {a}): {' '.join(p)} / {' '.join(q)}", file=sys.stderr)
+    print(f"{len(conflicts)} conflicts")
@@ -1,140 +1,411 @@
 """LL(1) predictive parser implementation."""
-from collections import deque
-from pathlib import Path
-from typing import List, Dict, Set, Optional
-from utils import Node
-from scanner import getNextToken
-from parser_rules import grammar, first_sets, follow_sets, terminals
+import sys
+from array import array
+from functools import cached_property
+from typing import List, Dict, Optional, Tuple
+from utils import Node, EPSILON_LEAF, FlatTree
+from frozen import load as load_tables
+
+DESCENT_RECURSION_LIMIT = 100000
 
 
 class Parser:
     """LL(1) predictive parser for the C- language."""
 
-    def __init__(self, code: str):
+    def __init__(self, code: str, tokenizer=None, flat: bool = False, engine: str = "table",
+                 mode: str = "full"):
         """Initialize the parser with input code and build the parse table.
 
         Args:
-            code: The source code to parse
+            code: The source code to parse (the input file for a frontend scan)
+            tokenizer: Token generator to read the code with (getNextToken, tokenize or a frontend scan),
+                getNextToken if None
+            flat: Build the tree as a FlatTree instead of Node objects
+            engine: "table" to parse with the parse table or "descent" with the recursive
+                descent functions generated by descent.py, both give the same tree and errors
+            mode: "full" builds the parse tree as tree, "recognize" only finds the syntax
+                errors and "ast" builds the abstract syntax tree of ast_nodes.py as ast
         """
-        self.grammar: Dict[str, List[List[str]]] = grammar
-        self.first = first_sets
-        self.follow = follow_sets
-        self.terminals = terminals
-        self.table = self.build_parse_table()
+        # the parse table with the symbols interned to ints, the parse loop only works on these,
+        # thawed from the tables frozen ahead of time; the grammar and first, follow, table and
+        # conflicts are only loaded when they are read
+        self.codes, self.grammar_key = load_tables()
         self.tree = None
+        self.ast = None
         # Initialize scanner and parser state
-        self.tokens = getNextToken(code)
+        if tokenizer is None:
+            from scanner import getNextToken
+            tokenizer = getNextToken
+        self.tokens = tokenizer(code)
         self.a: Optional[str] = None
+        self.t: int = self.codes.end # id of self.a
         self.tok_type: Optional[str] = None
         self.lexeme: Optional[str] = None
         self.current_line: int = 1
         self.syntax_errors: List[str] = []
         
-        self.parse()
+        if engine not in ("table", "descent"):
+            raise ValueError(f"unknown parsing engine {engine!r}")
+        if mode not in ("full", "recognize", "ast"):
+            raise ValueError(f"unknown parse mode {mode!r}")
+        if flat and engine == "descent":
+            raise ValueError("the descent engine builds Node trees, not a FlatTree")
+        if mode != "full" and (flat or engine != "table"):
+            raise ValueError(f"the {mode} mode only runs on the table engine, without flat")
+        if mode == "recognize":
+            self.parse_recognize()
+        elif mode == "ast":
+            self.parse_ast()
+        elif flat:
+            self.parse_flat()
+        elif engine == "descent":
+            self.parse_descent()
+        else:
+            self.parse()
 
-    def build_parse_table(self) -> Dict[tuple, List[str]]:
-        """Builds the LL(1) parse table using FIRST and FOLLOW sets.
+    @property
+    def grammar(self) -> Dict[str, List[List[str]]]:
+        """Productions of every non-terminal, only the ast mode and the descent engine need them."""
+        from parser_rules import grammar
+        return grammar
 
-        Returns:
-            A dictionary mapping (non-terminal, terminal) pairs to their productions
-        """
-        table = {(nt, t): None for nt in grammar for t in terminals}
-
-        for A, productions in grammar.items():
-            for production in productions:
-                prod_first: Set[str] = set()
-                nullable = True
-                for symbol in production:
-                    # Use terminal if not in FIRST
-                    sym_first = self.first.get(symbol, {symbol})
-                    prod_first |= (sym_first - {"EPSILON"})  # Add all but EPSILON
-                    if "EPSILON" not in sym_first:
-                        nullable = False
-                        break
-
-                targets = prod_first | (self.follow[A] if nullable else set())
-                for a in targets:
-                    if a in terminals:  # Only add entries for valid terminals
-                        table[(A, a)] = production
-
-        return table
+    @property
+    def terminals(self) -> set:
+        from parser_rules import terminals
+        return terminals
+
+    @cached_property
+    def grammar_tables(self) -> tuple:
+        """(first, follow, table, conflicts) of the grammar, computed or loaded from the cache when first read."""
+        from ll1 import get_tables
+        return get_tables(self.grammar, self.terminals)
+
+    # FIRST/FOLLOW sets, parse table and conflicts of the grammar, only the checks of the grammar need them
+    first = property(lambda self: self.grammar_tables[0])
+    follow = property(lambda self: self.grammar_tables[1])
+    table = property(lambda self: self.grammar_tables[2])
+    conflicts = property(lambda self: self.grammar_tables[3])
 
     def advance(self):
         """Advances to the next token from the scanner."""
         tok = next(self.tokens, None)
         if tok is None or tok[0] == "FIN":
             self.a = "$"
+            self.t = self.codes.end
             self.tok_type = self.lexeme = None
             return
         self.tok_type, self.lexeme, self.current_line = tok
         self.a = self.tok_type if self.tok_type in {
             "ID", "NUM"} else self.lexeme
+        self.t = self.codes.terminal_ids.get(self.a, self.codes.other)
 
     def log_err(self, msg: str):
         """Records a syntax error with line number."""
         self.syntax_errors.append(f"#{self.current_line} : {msg}")
 
+    def log_illegal(self, skipped: List[Tuple[int, str]]):
+        """Records an illegal token error for every (line, token) skipped by the recovery."""
+        self.syntax_errors.extend([f"#{line} : syntax error, illegal {a}" for line, a in skipped])
+
+    def recover(self, X: int) -> bool:
+        """Panic mode recovery when the table has no production for non-terminal X and the input.
+
+        Returns:
+            True if X should be pushed back (the input is now in its first set),
+            False if X is dropped and gets an epsilon child
+        """
+        codes = self.codes
+        nt = X - codes.n_terms
+        # if production is in follow set of the non-terminal just discard X, becasue it's after X
+        if codes.follow_mask[nt] >> self.t & 1: # if the input is in the follow set of the non-terminal or $
+            self.log_err(f"syntax error, missing {codes.names[X]}")
+            return False
+
+        # Error recovery: skip tokens until one in first or follow of the non-terminal or $
+        if not codes.sync_mask[nt] >> self.t & 1:
+            self.skip(codes.sync_mask[nt])
+
+        if codes.first_mask[nt] >> self.t & 1: # if the input is in first of the non-terminal -> it's fixed
+            return True
+        self.log_err(f"syntax error, missing {codes.names[X]}")
+        return False
+
+    def skip(self, sync: int):
+        """Skips the current token and the ones after it until a token in the bitmask sync.
+
+        The tokens are read straight from the tokenizer, every skipped token is an illegal
+        error and the errors are logged together once the skipping stops.
+        """
+        terminal_ids, other = self.codes.terminal_ids, self.codes.other
+        skipped = [(self.current_line, self.a)]
+        for tok in self.tokens:
+            if tok[0] == "FIN":
+                break
+            tok_type, lexeme, line = tok
+            a = tok_type if tok_type in ("ID", "NUM") else lexeme
+            t = terminal_ids.get(a, other)
+            if sync >> t & 1:
+                self.tok_type, self.lexeme, self.current_line = tok
+                self.a, self.t = a, t
+                break
+            skipped.append((line, a))
+        else:
+            tok = None
+        if tok is None or tok[0] == "FIN": # the input ended, like advance
+            self.a = "$"
+            self.t = self.codes.end
+            self.tok_type = self.lexeme = None
+            self.current_line = skipped[-1][0]
+        self.log_illegal(skipped)
+
     def parse(self)->None:
         """Parses the input and builds the parse tree.
 
-        Returns:
-            The root node of the parse tree
+        The stack holds symbol ids, the table is looked up by nt * n_terms + t and the names
+        are only used to create the nodes and the error messages.
         """
+        codes = self.codes
+        n_terms, table, end = codes.n_terms, codes.table, codes.end
+        productions, children, names = codes.productions, codes.children, codes.names
+
         self.advance()
+        t = self.t
         root = Node("Program")
-        symbol_stack: deque[str] = deque(["$", "Program"]) # initial stack with $ and Program
-        node_stack: deque[Node] = deque([Node("$"), root]) # initial stack with $ and root node
+        symbol_stack: List[int] = [end, codes.ids["Program"]] # initial stack with $ and Program
+        node_stack: List[Node] = [Node("$"), root] # initial stack with $ and root node
+        pop_symbol, pop_node = symbol_stack.pop, node_stack.pop
+        push_symbols, push_nodes = symbol_stack.extend, node_stack.extend
 
         while symbol_stack: # while the symbol stack is not empty
-            X = symbol_stack.pop() # pop the top symbol from the symbol stack
-            current_node = node_stack.pop() # pop the top node from the node stack 
+            X = pop_symbol() # pop the top symbol from the symbol stack
+            current_node = pop_node() # pop the top node from the node stack
 
             # Handle terminals
-            if X in self.terminals:
-                if self.a == X: 
-                    if X != "$":
+            if X < n_terms:
+                if t == X:
+                    if X != end:
                         current_node.tok_type, current_node.lexeme = self.tok_type, self.lexeme
                     self.advance()
+                    t = self.t
                 else:
-                    self.log_err(f"syntax error, missing {X}")
+                    self.log_err(f"syntax error, missing {names[X]}")
+                continue
+
             # Handle non-terminals
+            production = table[(X - n_terms) * n_terms + t]
+            if production < 0: # if the production is not in the parse table
+                if self.recover(X):
+                    symbol_stack.append(X) # add the symbol to the symbol stack
+                    node_stack.append(current_node) # add the node to the node stack
+                else:
+                    current_node.add(EPSILON_LEAF)
+                t = self.t
+                continue
+
+            # Expand production
+            right = children[production]
+            if not right: # if the production is epsilon
+                current_node.add(EPSILON_LEAF)
             else:
-                production = self.table.get((X, self.a))
-                if production is None: # if the production is not in the parse table
-                    # if production is in follow set of the non-terminal just discard X, becasue it's after X
-                    if self.a in self.follow[X] or self.a == "$": # if the input is in the follow set of the non-terminal
-                        self.log_err(f"syntax error, missing {X}")
-                        current_node.add(Node("epsilon"))
-                        continue
-                    
-                    # Error recovery: skip tokens until we find a valid one
-                    while (self.a not in self.first[X] and # if the input is in first of the non-terminal -> it's fixed
-                        self.a not in self.follow[X] and # if the input is in follow of the non-terminal -> it's fixed
-                        self.a != "$"): # if the input is $ -> it's finished
-                        self.log_err(
-                            f"syntax error, illegal {self.a}")
-                        self.advance()
-
-                    if self.a in self.first[X]: # if the input is in first of the non-terminal -> it's fixed
-                        symbol_stack.append(X) # add the symbol to the symbol stack
-                        node_stack.append(current_node) # add the node to the node stack
-                    else:
-                        self.log_err(f"syntax error, missing {X}")
-                        current_node.add(Node("epsilon"))
+                nodes = list(map(Node, right)) # create the children nodes
+                current_node.children.extend(nodes) # add the children to the current node
+                push_symbols(productions[production]) # push the symbols, already reversed
+                push_nodes(reversed(nodes)) # push the nodes in the same order
+
+        root.add(Node("$"))
+        self.tree = root
+
+    def parse_recognize(self) -> None:
+        """Parses the input like parse, but only records the syntax errors, no tree is built."""
+        from precedence import ExpressionParser
+        codes = self.codes
+        n_terms, table, end = codes.n_terms, codes.table, codes.end
+        productions, names = codes.productions, codes.names
+        expression, fast = codes.ids["Expression"], ExpressionParser(codes)
+
+        self.advance()
+        t = self.t
+        symbol_stack: List[int] = [end, codes.ids["Program"]]
+        pop_symbol, push_symbols = symbol_stack.pop, symbol_stack.extend
+
+        while symbol_stack:
+            X = pop_symbol()
+            if X < n_terms:
+                if t == X:
+                    self.advance()
+                    t = self.t
+                else:
+                    self.log_err(f"syntax error, missing {names[X]}")
+                continue
+
+            production = table[(X - n_terms) * n_terms + t]
+            if production < 0:
+                if self.recover(X):
+                    symbol_stack.append(X)
+                t = self.t
+                continue
+            if X == expression and fast.parse(self, build=False)[0]:
+                t = self.t
+                continue
+            push_symbols(productions[production])
+
+    def parse_ast(self) -> None:
+        """Parses the input like parse, but builds the abstract syntax tree on a value stack.
+
+        A production with a semantic action pushes a marker, marks + its number, below its
+        symbols; popping the marker replaces the values of the symbols by the value of the
+        action (see ast_nodes.py).
+        """
+        from ast_nodes import Program, production_actions
+        from precedence import ExpressionParser
+        codes = self.codes
+        n_terms, table, end = codes.n_terms, codes.table, codes.end
+        productions, names = codes.productions, codes.names
+        actions, epsilon_values = production_actions(self.grammar)
+        arity = [len(right) for right in codes.right_ids]
+        marks = len(names)
+        valued = (codes.ids["ID"], codes.ids["NUM"]) # the terminals whose lexeme is a value
+        expression, fast = codes.ids["Expression"], ExpressionParser(codes)
+
+        self.advance()
+        t = self.t
+        symbol_stack: List[int] = [end, codes.ids["Program"]]
+        values: list = []
+        pop_symbol, push_symbols = symbol_stack.pop, symbol_stack.extend
+        push_value = values.append
+
+        while symbol_stack:
+            X = pop_symbol()
+
+            # Handle terminals, the value of a missing one is None
+            if X < n_terms:
+                if t == X:
+                    if X != end:
+                        push_value((self.lexeme, self.current_line) if X in valued else self.current_line)
+                    self.advance()
+                    t = self.t
+                else:
+                    self.log_err(f"syntax error, missing {names[X]}")
+                    if X != end:
+                        push_value(None)
+                continue
+
+            # Reduce a production to the value of its action
+            if X >= marks:
+                production = X - marks
+                n = arity[production]
+                args = values[-n:]
+                del values[-n:]
+                push_value(actions[production](*args))
+                continue
+
+            # Handle non-terminals, one dropped by the recovery has the value None
+            production = table[(X - n_terms) * n_terms + t]
+            if production < 0:
+                if self.recover(X):
+                    symbol_stack.append(X)
+                else:
+                    push_value(None)
+                t = self.t
+                continue
+            if X == expression: # an expression without errors takes the precedence climbing fast path
+                parsed, value = fast.parse(self)
+                if parsed:
+                    push_value(value)
+                    t = self.t
                     continue
+            right = productions[production]
+            if actions[production] is not None:
+                symbol_stack.append(marks + production)
+            elif not right:
+                push_value(epsilon_values[production])
+            push_symbols(right)
+
+        root = values[-1] if values else None
+        # the recovery dropped Program (an input like "1" or "; x)"), the tree is an empty program
+        self.ast = root if root is not None else Program([], self.current_line)
+
+    def parse_descent(self) -> None:
+        """Parses the input like parse with the generated recursive descent parser.
+
+        Its recursion follows the nesting of the input, a list only loops, so the recursion
+        limit is raised for deeply nested expressions while it runs.
+        """
+        from descent import load
+        module = load(self.grammar, self.codes, self.grammar_key)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, DESCENT_RECURSION_LIMIT))
+        try:
+            self.tree = module.parse(self)
+        finally:
+            sys.setrecursionlimit(limit)
 
-                # Expand production
-                if production == ["EPSILON"]: # if the production is epsilon
-                    current_node.add(Node("epsilon"))
+    def parse_flat(self) -> None:
+        """Parses the input like parse, but builds the tree as a FlatTree.
+
+        The children of a production are added as consecutive rows, so an expansion only
+        extends the columns and the node stack holds rows instead of Node objects.
+        """
+        codes = self.codes
+        n_terms, table, end = codes.n_terms, codes.table, codes.end
+        productions, right_ids = codes.productions, codes.right_ids
+        tree = FlatTree(codes.names + ["epsilon"])
+        epsilon = len(codes.names) # symbol of the epsilon leaves
+        symbol, token, first_child, next_sibling = tree.symbol, tree.token, tree.first_child, tree.next_sibling
+        tokens = tree.tokens
+        blank = [array("i", [-1]) * m for m in range(max(map(len, right_ids)) + 1)]
+
+        self.advance()
+        t = self.t
+        root = tree.add_node(codes.ids["Program"])
+        symbol_stack: List[int] = [end, codes.ids["Program"]] # initial stack with $ and Program
+        node_stack: List[int] = [-1, root] # the $ at the bottom has no row
+        pop_symbol, pop_node = symbol_stack.pop, node_stack.pop
+        push_symbols, push_nodes = symbol_stack.extend, node_stack.extend
+
+        while symbol_stack:
+            X = pop_symbol()
+            current = pop_node()
+
+            # Handle terminals
+            if X < n_terms:
+                if t == X:
+                    if X != end:
+                        token[current] = len(tokens)
+                        tokens.append((self.tok_type, self.lexeme))
+                    self.advance()
+                    t = self.t
                 else:
-                    children = [Node(sym) for sym in production] # create the children nodes
-                    for ch in children: # add the children to the current node
-                        current_node.add(ch)
-                    for sym, ch in reversed(list(zip(production, children))): # add the children to the current node
-                        symbol_stack.append(sym) # add the symbol to the symbol stack
-                        node_stack.append(ch) # add the node to the node stack
+                    self.log_err(f"syntax error, missing {codes.names[X]}")
+                continue
 
-        root.add(Node("$"))
-        self.tree = root
+            # Handle non-terminals
+            production = table[(X - n_terms) * n_terms + t]
+            if production < 0:
+                if self.recover(X):
+                    symbol_stack.append(X)
+                    node_stack.append(current)
+                else:
+                    tree.add_child(current, epsilon)
+                t = self.t
+                continue
+
+            # Expand production, the children are rows k .. k+m-1
+            right = right_ids[production]
+            if not right:
+                tree.add_child(current, epsilon)
+            else:
+                k, m = len(symbol), len(right)
+                symbol.extend(right)
+                token.extend(blank[m])
+                first_child.extend(blank[m])
+                next_sibling.extend(range(k + 1, k + m))
+                next_sibling.append(-1)
+                first_child[current] = k
+                push_symbols(productions[production]) # push the symbols, already reversed
+                push_nodes(range(k + m - 1, k - 1, -1)) # and their rows in the same order
+
+        tree.add_child(root, end)
+        self.tree = tree
 
 
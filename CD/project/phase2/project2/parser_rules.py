@@ -53,52 +53,6 @@ grammar = {
 
 
 
-first_sets = {
-    'Program': {'EPSILON', 'int', 'void'},
-    'Declaration-list': {'EPSILON', 'int', 'void'},
-    'Declaration': {'int', 'void'},
-    'Declaration-initial': {'int', 'void'},
-    'Declaration-prime': {'(', ';', '['},
-    'Var-declaration-prime': {';', '['},
-    'Fun-declaration-prime': {'('},
-    'Type-specifier': {'int', 'void'},
-    'Params': {'int', 'void'},
-    'Param-list': {',', 'EPSILON'},
-    'Param': {'int', 'void'},
-    'Param-prime': {'EPSILON', '['},
-    'Compound-stmt': {'{'},
-    'Statement-list': {'(', ';', 'EPSILON', 'ID', 'NUM', 'break', 'if', 'repeat', 'return', '{'},
-    'Statement': {'(', ';', 'ID', 'NUM', 'break', 'if', 'repeat', 'return', '{'},
-    'Expression-stmt': {'(', ';', 'ID', 'NUM', 'break'},
-    'Selection-stmt': {'if'},
-    'Iteration-stmt': {'repeat'},
-    'Return-stmt': {'return'},
-    'Return-stmt-prime': {'(', ';', 'ID', 'NUM'},
-    'Expression': {'(', 'ID', 'NUM'},
-    'B': {'(', '*', '+', '-', '<', '=', '==', 'EPSILON', '['},
-    'H': {'*', '+', '-', '<', '=', '==', 'EPSILON'},
-    'Simple-expression-zegond': {'(', 'NUM'},
-    'Simple-expression-prime': {'(', '*', '+', '-', '<', '==', 'EPSILON'},
-    'C': {'EPSILON', '<', '=='},
-    'Relop': {'<', '=='},
-    'Additive-expression': {'(', 'ID', 'NUM'},
-    'Additive-expression-prime': {'(', '*', '+', '-', 'EPSILON'},
-    'Additive-expression-zegond': {'(', 'NUM'},
-    'D': {'+', '-', 'EPSILON'},
-    'Addop': {'+', '-'},
-    'Term': {'(', 'ID', 'NUM'},
-    'Term-prime': {'(', '*', 'EPSILON'},
-    'Term-zegond': {'(', 'NUM'},
-    'G': {'*', 'EPSILON'},
-    'Factor': {'(', 'ID', 'NUM'},
-    'Var-call-prime': {'(', 'EPSILON', '['},
-    'Var-prime': {'EPSILON', '['},
-    'Factor-prime': {'(', 'EPSILON'},
-    'Factor-zegond': {'(', 'NUM'},
-    'Args': {'(', 'EPSILON', 'ID', 'NUM'},
-    'Arg-list': {'(', 'ID', 'NUM'},
-    'Arg-list-prime': {',', 'EPSILON'},
-}
 terminals = {
     ';', '(', ')', '{', '}', '[', ']', ',',
     '=', '<', '==', '+', '-', '*',
@@ -106,52 +60,3 @@ terminals = {
     'int', 'void',
     'ID', 'NUM', '$'
 }
-
-follow_sets = {
-    'Program': {'$'},
-    'Declaration-list': {'$', '(', ';', 'ID', 'NUM', 'break', 'if', 'repeat', 'return', '{', '}'},
-    'Declaration': {'$', '(', ';', 'ID', 'NUM', 'break', 'if', 'int', 'repeat', 'return', 'void', '{', '}'},
-    'Declaration-initial': {'(', ')', ',', ';', '['},
-    'Declaration-prime': {'$', '(', ';', 'ID', 'NUM', 'break', 'if', 'int', 'repeat', 'return', 'void', '{', '}'},
-    'Var-declaration-prime': {'$', '(', ';', 'ID', 'NUM', 'break', 'if', 'int', 'repeat', 'return', 'void', '{', '}'},
-    'Fun-declaration-prime': {'$', '(', ';', 'ID', 'NUM', 'break', 'if', 'int', 'repeat', 'return', 'void', '{', '}'},
-    'Type-specifier': {'ID'},
-    'Params': {')'},
-    'Param-list': {')'},
-    'Param': {')', ','},
-    'Param-prime': {')', ','},
-    'Compound-stmt': {'$', '(', ';', 'ID', 'NUM', 'break', 'else', 'if', 'int', 'repeat', 'return', 'until', 'void', '{', '}'},
-    'Statement-list': {'}'},
-    'Statement': {'(', ';', 'ID', 'NUM', 'break', 'else', 'if', 'repeat', 'return', 'until', '{', '}'},
-    'Expression-stmt': {'(', ';', 'ID', 'NUM', 'break', 'else', 'if', 'repeat', 'return', 'until', '{', '}'},
-    'Selection-stmt': {'(', ';', 'ID', 'NUM', 'break', 'else', 'if', 'repeat', 'return', 'until', '{', '}'},
-    'Iteration-stmt': {'(', ';', 'ID', 'NUM', 'break', 'else', 'if', 'repeat', 'return', 'until', '{', '}'},
-    'Return-stmt': {'(', ';', 'ID', 'NUM', 'break', 'else', 'if', 'repeat', 'return', 'until', '{', '}'},
-    'Return-stmt-prime': {'(', ';', 'ID', 'NUM', 'break', 'else', 'if', 'repeat', 'return', 'until', '{', '}'},
-    'Expression': {';', ',', ')', ']'},
-    'B': {';', ',', ')', ']'},
-    'H': {';', ',', ')', ']'},
-    'Simple-expression-zegond': {';', ',', ')', ']'},
-    'Simple-expression-prime': {';', ',', ')', ']'},
-    'C': {';', ',', ')', ']'},
-    'Relop': {'(', 'ID', 'NUM'},
-    'Additive-expression': {';', ',', ')', ']'},
-    'Additive-expression-prime': {';', '<', '==', ',', ')', ']'},
-    'Additive-expression-zegond': {';', '<', '==', ',', ')', ']'},
-    'D': {';', '<', '==', ',', ')', ']'},
-    'Addop': {'(', 'ID', 'NUM'},
-    'Term': {')', '+', ',', '-', ';', '<', '==', ']'},
-    'Term-prime': {')', '+', ',', '-', ';', '<', '==', ']'},
-    'Term-zegond': {')', '+', ',', '-', ';', '<', '==', ']'},
-    'G': {')', '+', ',', '-', ';', '<', '==', ']'},
-    'Factor': {')', '*', '+', ',', '-', ';', '<', '==', ']'},
-    'Var-call-prime': {')', '*', '+', ',', '-', ';', '<', '==', ']'},
-    'Var-prime': {')', '*', '+', ',', '-', ';', '<', '==', ']'},
-    'Factor-prime': {')', '*', '+', ',', '-', ';', '<', '==', ']'},
-    'Factor-zegond': {')', '*', '+', ',', '-', ';', '<', '==', ']'},
-    'Args': {')'},
-    'Arg-list': {')'},
-    'Arg-list-prime': {')'},
-}
-
-
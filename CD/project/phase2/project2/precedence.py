@@ -0,0 +1,234 @@
+"""Precedence climbing parser of the C-minus expressions.
+
+Parser.parse_ast and Parser.parse_recognize switch to it when they expand Expression:
+instead of walking Expression, B, H, Simple-expression, Additive-expression, D, Term, G
+and Factor for every operand, it parses the operators by their precedence (relation below
++ and -, below *) with a loop per level, and builds the AST nodes of ast_nodes.py that
+the semantic actions would build.
+
+It only takes expressions without syntax errors. At the first token the grammar does
+not allow, or if the token after the expression is not in FOLLOW(Expression), it gives
+up: the tokens it read are put back in front of the token stream and the table loop
+parses the expression again, so the errors and the recovery are exactly those of the
+table loop. A broken expression is read twice for each expression around the error.
+"""
+from collections import deque
+from ast_nodes import Assign, BinOp, Call, Num, Var
+
+MAX_NESTING = 100 # nested expressions taken by the fast path, deeper ones go to the table loop
+
+
+class Bail(Exception):
+    """The expression is not one the fast path takes."""
+
+
+class Replay:
+    """The tokens of a parser with the tokens read by a bailed fast path put back in front.
+
+    Once they are read again it puts the original token stream back into the parser, so
+    the rest of the input does not go through it.
+    """
+    __slots__ = ("parser", "buffer", "source")
+
+    def __init__(self, parser, tokens: list):
+        self.parser = parser
+        self.buffer = deque(tokens)
+        self.source = parser.tokens
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        buffer = self.buffer
+        if not buffer:
+            return next(self.source)
+        tok = buffer.popleft()
+        if not buffer and self.parser.tokens is self:
+            self.parser.tokens = self.source
+        return tok
+
+
+class ExpressionParser:
+    """Parses the expression at the current token of a Parser."""
+
+    def __init__(self, codes):
+        """
+        Args:
+            codes: IntTables of the grammar
+        """
+        ids = codes.ids
+        self.terminal_ids, self.other, self.end = codes.terminal_ids, codes.other, codes.end
+        self.ID, self.NUM = ids["ID"], ids["NUM"]
+        self.ASSIGN, self.LPAREN, self.RPAREN = ids["="], ids["("], ids[")"]
+        self.LBRACKET, self.RBRACKET, self.COMMA = ids["["], ids["]"], ids[","]
+        self.TIMES = ids["*"]
+        self.ADDOPS = frozenset((ids["+"], ids["-"]))
+        self.RELOPS = frozenset((ids["<"], ids["=="]))
+        self.follow = codes.follow[ids["Expression"] - codes.n_terms]
+        self.build = True
+        self.tokens = iter(())
+        self.read: list = []
+        self.t = self.end
+        self.tok = None
+        self.depth = 0
+
+    def parse(self, parser, build: bool = True):
+        """Parses the expression starting at the current token of parser.
+
+        Returns:
+            (True, its AST or None if not build) with parser at the token after the
+            expression, or (False, None) with parser at the same token, the tokens read are replayed
+        """
+        self.build = build
+        self.tokens = parser.tokens
+        self.read = []
+        self.t = parser.t
+        self.tok = (parser.tok_type, parser.lexeme, parser.current_line)
+        self.depth = 0
+        try:
+            value = self.expression()
+            if self.t not in self.follow:
+                raise Bail
+        except (Bail, RecursionError):
+            if isinstance(parser.tokens, Replay):
+                parser.tokens.buffer.extendleft(reversed(self.read))
+            else:
+                parser.tokens = Replay(parser, self.read)
+            return False, None
+        if self.tok is None: # the input ended, like Parser.advance
+            parser.a, parser.t = "$", self.end
+            parser.tok_type = parser.lexeme = None
+        else:
+            parser.tok_type, parser.lexeme, parser.current_line = self.tok
+            parser.a = parser.tok_type if parser.tok_type in ("ID", "NUM") else parser.lexeme
+            parser.t = self.t
+        return True, value
+
+    def advance(self):
+        """Reads the next token, remembering it for a bail."""
+        tok = next(self.tokens, None)
+        if tok is None:
+            self.t, self.tok = self.end, None
+            return
+        self.read.append(tok)
+        if tok[0] == "FIN":
+            self.t, self.tok = self.end, None
+            return
+        self.tok = tok
+        self.t = self.terminal_ids.get(tok[0] if tok[0] in ("ID", "NUM") else tok[1], self.other)
+
+    def expect(self, t: int):
+        if self.t != t:
+            raise Bail
+        self.advance()
+
+    def expression(self):
+        """Expression: ID = Expression | ID [ Expression ] = Expression | a simple expression."""
+        self.depth += 1
+        if self.depth > MAX_NESTING:
+            raise Bail
+        build = self.build
+        if self.t == self.ID:
+            _, name, line = self.tok
+            self.advance()
+            if self.t == self.ASSIGN:
+                self.advance()
+                value = self.expression()
+                self.depth -= 1
+                return Assign(Var(name, None, line), value, line) if build else None
+            if self.t == self.LBRACKET:
+                self.advance()
+                index = self.expression()
+                self.expect(self.RBRACKET)
+                target = Var(name, index, line) if build else None
+                if self.t == self.ASSIGN:
+                    self.advance()
+                    value = self.expression()
+                    self.depth -= 1
+                    return Assign(target, value, line) if build else None
+                left = target
+            elif self.t == self.LPAREN:
+                left = self.call(name, line)
+            else:
+                left = Var(name, None, line) if build else None
+        elif self.t == self.NUM:
+            left = self.number()
+        elif self.t == self.LPAREN:
+            left = self.parenthesized()
+        else:
+            raise Bail
+        value = self.relation(self.additive(self.term(left)))
+        self.depth -= 1
+        return value
+
+    def relation(self, left):
+        """At most one < or == after an additive expression."""
+        if self.t in self.RELOPS:
+            op, line = self.tok[1], self.tok[2]
+            self.advance()
+            right = self.additive(self.term(self.factor()))
+            return BinOp(op, left, right, line) if self.build else None
+        return left
+
+    def additive(self, left):
+        """The + and - after the term left, left associative."""
+        build = self.build
+        while self.t in self.ADDOPS:
+            op, line = self.tok[1], self.tok[2]
+            self.advance()
+            right = self.term(self.factor())
+            left = BinOp(op, left, right, line) if build else None
+        return left
+
+    def term(self, left):
+        """The * after the factor left, left associative."""
+        build = self.build
+        while self.t == self.TIMES:
+            line = self.tok[2]
+            self.advance()
+            right = self.factor()
+            left = BinOp("*", left, right, line) if build else None
+        return left
+
+    def factor(self):
+        """Factor: ( Expression ) | ID | ID [ Expression ] | ID ( Args ) | NUM."""
+        t = self.t
+        if t == self.ID:
+            _, name, line = self.tok
+            self.advance()
+            if self.t == self.LPAREN:
+                return self.call(name, line)
+            if self.t == self.LBRACKET:
+                self.advance()
+                index = self.expression()
+                self.expect(self.RBRACKET)
+                return Var(name, index, line) if self.build else None
+            return Var(name, None, line) if self.build else None
+        if t == self.NUM:
+            return self.number()
+        if t == self.LPAREN:
+            return self.parenthesized()
+        raise Bail
+
+    def number(self):
+        _, lexeme, line = self.tok
+        self.advance()
+        return Num(int(lexeme), line) if self.build else None
+
+    def parenthesized(self):
+        self.advance()
+        value = self.expression()
+        self.expect(self.RPAREN)
+        return value
+
+    def call(self, name: str, line: int):
+        """The ( Args ) of a call of name, at the '('."""
+        self.advance()
+        args = []
+        if self.t != self.RPAREN:
+            args.append(self.expression())
+            while self.t == self.COMMA:
+                self.advance()
+                args.append(self.expression())
+        self.expect(self.RPAREN)
+        return Call(name, args, line) if self.build else None
@@ -18,64 +18,146 @@ def preprocess(code: str) -> list:
 
     return code
 
+"""Characters used by the invalid token scans, they follow the INVALID_INPUT and INVALID_NUM patterns"""
+ALNUM = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
+DIGITS = set("0123456789")
+OPERATORS = set("!=&|*-+<>/(){}[];,")  # single character members of the (a-z|A-Z|!|=|...)* group
+BAD_CHARS = set("~^`'\".@#$%\\")
+AFTER_NOT = ALNUM | set("!(=-")  # what may follow '!'
+AFTER_NOT_SPACE = ALNUM | set("!(-")  # what may follow '! '
+AFTER_SLASH = ALNUM | set("!(-")  # what may follow '/'
+AFTER_NUM = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ@#$%\\")
+
+
+"""Returns the (start, end) spans of the INVALID_INPUT matches in the line, in O(n).
+The regex backtracks over the operator group on every start position, here the end of the
+operator run, the end of the alnum run and the next non space character are computed once
+from right to left, so each alternative is checked in O(1)."""
+def find_invalid_input(line: str) -> list:
+    n = len(line)
+    run_end = [n] * (n + 1) # end of the (a-z|A-Z|!|=|...)* run starting at i
+    alnum_end = [n] * (n + 1) # end of the [a-zA-Z0-9]+ run starting at i
+    next_nonspace = [n] * (n + 2) # first position >= i that is not whitespace
+    for i in range(n - 1, -1, -1):
+        c = line[i]
+        if line.startswith("a-z", i) or line.startswith("A-Z", i):
+            run_end[i] = run_end[i + 3]
+        elif c in OPERATORS:
+            run_end[i] = run_end[i + 1]
+        else:
+            run_end[i] = i
+        alnum_end[i] = alnum_end[i + 1] if c in ALNUM else i
+        next_nonspace[i] = next_nonspace[i + 1] if c.isspace() else i
+
+    def followed_by(k, allowed): # (?!\s*[allowed]) starting at k
+        k = next_nonspace[k]
+        return k < n and line[k] in allowed
+
+    spans = []
+    p = 0
+    while p < n:
+        c = line[p]
+        end = None
+        q = run_end[p]
+        if c == "/" and line.startswith("/", p + 1):  # //
+            end = p + 2
+        elif q < n and line[q] in BAD_CHARS:  # (a-z|A-Z|!|...)*[~^...]
+            end = q + 1
+        else:
+            q = alnum_end[p]
+            if q > p and q < n and line[q] == "!" and not line.startswith("=", q + 1):  # [a-zA-Z0-9]+!(?!=)
+                end = q + 1
+            elif c == "!" and not followed_by(p + 1, AFTER_NOT):
+                end = p + 1
+            elif c == "!" and line.startswith(" ", p + 1) and not followed_by(p + 2, AFTER_NOT_SPACE):
+                end = p + 2
+            elif c == "/" and not followed_by(p + 1, AFTER_SLASH):
+                end = p + 1
+        if end is None:
+            p += 1
+        else:
+            spans.append((p, end))
+            p = end
+    return spans
+
+
+"""Returns the (start, end) spans of the INVALID_NUM matches in the line, in O(n)."""
+def find_invalid_num(line: str) -> list:
+    n = len(line)
+    spans = []
+    p = 0
+    while p < n:
+        if line[p] not in DIGITS:
+            p += 1
+            continue
+        q = p
+        while q < n and line[q] in DIGITS:
+            q += 1
+        if q < n and line[q] in AFTER_NUM:
+            spans.append((p, q + 1))
+            q += 1
+        p = q # no match can start inside the digit run
+    return spans
+
+
+"""Returns the (start, end) spans of the non overlapping '*/' in the line."""
+def find_unopened_comments(line: str) -> list:
+    spans = []
+    s = line.find("*/")
+    while s != -1:
+        spans.append((s, s + 2))
+        s = line.find("*/", s + 2)
+    return spans
+
+
+"""Replaces the given sorted, non overlapping spans of the line with spaces in one join."""
+def blank_spans(line: str, spans) -> str:
+    if not spans:
+        return line
+    parts = []
+    last = 0
+    for s, e in spans:
+        parts.append(line[last:s])
+        parts.append(" " * (e - s))
+        last = e
+    parts.append(line[last:])
+    return "".join(parts)
+
+
+"""Finds invalid tokens in a line, returns the errors, the line with the errors replaced
+by spaces and whether there was an unclosed comment (then the rest of the code is dropped).
+Same checks as the UNCLOSED_COMMENT, UNOPENED_COMMENT, INVALID_INPUT and INVALID_NUM patterns,
+in this order, each check sees the line after the previous ones were blanked out."""
+def process_line(line: str):
+    context_len = 7 # for showing in errors
+    s = line.find("/*")
+    if s != -1: # Critical error, stop everything
+        return [f"({line[s : s + context_len]}, Unclosed comment)"], line[:s] + " " * (len(line) - s), True
+
+    errors = [] # each error consist of a tuple (position, error_msg)
+    spans = find_unopened_comments(line)
+    errors += [(s, f"({line[max(s - context_len, 0) : s + 2]}, Unopened comment)") for s, _ in spans]
+    line = blank_spans(line, spans)
+
+    spans = find_invalid_input(line)
+    errors += [(s, f"({line[s:e]}, Invalid input)") for s, e in spans]
+    line = blank_spans(line, spans)
+
+    spans = find_invalid_num(line)
+    errors += [(s, f"({line[s:e]}, Invalid number)") for s, e in spans]
+    line = blank_spans(line, spans)
+
+    errors.sort(key=lambda x: x[0]) # Sort errors by their position in the line
+    return [error_msg for _, error_msg in errors], line, False
+
+
 """processes the invalid tokens in the code and returns a list of errors and the cleaned code."""
 def process_invalid(code: str):
-    lines = code.split("\n")
     cleaned_lines = []
     all_errors = []
-
-    """For each invalid token, we add the in output and replace the error part with spaces"""
-    def process_invalid_tokens(line, tokens, error_type):
-        output = [] # each error consist of a tuple (error_msg, position)
-        modified_line = line
-        for token in tokens: 
-            t = token.group(0) 
-            s, e = token.start(), token.end()
-            context_len = 7 # for showing in errors
-
-            if error_type == "Unclosed comment":
-                e = len(line)
-                snippet = line[s : s + context_len] # error message
-                output.append((f"({snippet}, {error_type})", s))
-                # Critical error, stop everything
-                return output,  modified_line[:s] + " " * (e - s) + modified_line[e:], True
-            elif error_type == "Unopened comment":
-                snippet = line[max(s - context_len, 0) : s + 2]
-                output.append((f"({snippet}, {error_type})", s))
-            else: # Invalid number or input
-                output.append((f"({t}, {error_type})", s))
-
-            modified_line = modified_line[:s] + " " * (e - s) + modified_line[e:]
-        return output, modified_line, False
-    
-    """Finds invalid tokens in a line and process them."""
-    def process_line(line):
-        errors = []
-        updated_line = line
-        should_abort = False
-
-        patterns = [
-            (UNCLOSED_COMMENT, "Unclosed comment"),
-            (UNOPENED_COMMENT, "Unopened comment"),
-            (INVALID_INPUT, "Invalid input"),
-            (INVALID_NUM, "Invalid number")
-        ]
-        for pattern, error_type in patterns:
-            matches = list(pattern.finditer(updated_line)) # Find invalid tokens matching the pattern 
-            if matches:
-                found_errors, updated_line, abort = process_invalid_tokens(updated_line, matches, error_type)
-                errors.extend(found_errors)
-                # if there are any unclosed comment, don't look for other errors. 
-                if abort:
-                    should_abort = True
-                    break
-
-        errors.sort(key=lambda x: x[1]) # Sort errors by their position in the line
-        return errors, updated_line, should_abort
-
-    for line in lines:
+    for line in code.split("\n"):
         errors, cleaned_line, abort = process_line(line)
-        all_errors.append(" ".join([error_msg for error_msg, _ in errors]))
+        all_errors.append(" ".join(errors))
         cleaned_lines.append(cleaned_line)
         if abort: # if there is an unclosed comment, stop processing the rest of the code
             break
@@ -0,0 +1,205 @@
+"""Opt-in profiling of the compiler (compiler.py --profile).
+
+Records the wall time and the traced allocations of every phase and counters of the hot
+paths, and writes them as a JSON report, with a tracemalloc snapshot after every phase if
+asked. A normal compile never imports this module: the counters come from the outputs of
+the phases or from a Parser subclass, so the parse loop itself has no profiling code.
+The profiled run does the phases one after the other (a normal compile streams them into
+each other), so each of them gets its own numbers; it takes the mode, engine and tree file
+of compiler.py and the output files are the same. Only the dump of the parse tree or AST
+is still streamed into its file, the time of its writes is counted as file writes.
+"""
+import json
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from frontend import clean_lines, scan_lines, split_errors
+from preprocess import process_line
+from parser import Parser
+from ast_nodes import ast_lines
+from semantic import analyze, write_semantic_errors
+from treefile import write_tree_file
+from utils import tree_lines, write_syntax_errors
+
+
+class Profile:
+    """Wall time and allocations of named phases, and counters."""
+
+    def __init__(self, snapshots: Optional[Path] = None):
+        """Starts tracing the allocations.
+
+        Args:
+            snapshots: Directory to dump a tracemalloc snapshot into after every phase, or None
+        """
+        self.phases: List[dict] = []
+        self.counters: Dict[str, object] = {}
+        self.snapshots = snapshots
+        self.started = not tracemalloc.is_tracing() # stop tracing again in close
+        if self.started:
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measures the code of the with block as the phase name.
+
+        allocated is what the phase left allocated, peak the most it had allocated at once.
+        """
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            self.phases.append({"phase": name, "seconds": seconds,
+                                "allocated": current - before, "peak": peak - before})
+            if self.snapshots is not None:
+                self.snapshots.mkdir(parents=True, exist_ok=True)
+                snapshot = self.snapshots / f"{len(self.phases):02d}-{name.replace(' ', '-')}.tracemalloc"
+                tracemalloc.take_snapshot().dump(str(snapshot))
+
+    def move(self, source: str, target: str, seconds: float):
+        """Moves seconds measured in the phase source to the phase target."""
+        for phase in self.phases:
+            if phase["phase"] == source:
+                phase["seconds"] -= seconds
+            elif phase["phase"] == target:
+                phase["seconds"] += seconds
+
+    def close(self):
+        """Stops tracing the allocations, if __init__ started it."""
+        if self.started:
+            tracemalloc.stop()
+
+    def report(self) -> dict:
+        """The phases and counters as a JSON serializable dict."""
+        return {"seconds": sum(phase["seconds"] for phase in self.phases),
+                "phases": self.phases, "counters": self.counters}
+
+    def write(self, filename: Path):
+        """Writes the report as JSON."""
+        filename.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+
+
+class CountingTable:
+    """Stands in for the parse table of IntTables and counts the lookups."""
+    __slots__ = ("table", "lookups")
+
+    def __init__(self, table):
+        self.table = table
+        self.lookups = 0
+
+    def __getitem__(self, index: int) -> int:
+        self.lookups += 1
+        return self.table[index]
+
+
+class ProfiledParser(Parser):
+    """Parser that counts its parse table lookups, the descent engine makes none."""
+
+    def count_lookups(self):
+        self.codes.table = CountingTable(self.codes.table)
+
+    def parse(self) -> None:
+        self.count_lookups()
+        super().parse()
+
+    def parse_flat(self) -> None:
+        self.count_lookups()
+        super().parse_flat()
+
+    def parse_recognize(self) -> None:
+        self.count_lookups()
+        super().parse_recognize()
+
+    def parse_ast(self) -> None:
+        self.count_lookups()
+        super().parse_ast()
+
+
+def profile_compile(input_file: str, report: Path, snapshots: Optional[Path] = None,
+                    mode: str = "full", engine: str = "table", tree_file: Optional[str] = None) -> dict:
+    """Compiles input_file phase by phase, writes the output files and the report.
+
+    Args:
+        mode: --mode of compiler.py, "full", "recognize", "ast" or "semantic"
+        engine: --engine of compiler.py, "table" or "descent"
+        tree_file: File to write the binary parse tree into like --tree-file, or None
+
+    Returns:
+        The report
+    """
+    profile = Profile(snapshots)
+    with profile.phase("preprocess"):
+        with open(input_file) as f:
+            lines = list(clean_lines(f))
+    with profile.phase("invalid scan"):
+        processed = list(map(process_line, lines))
+    with profile.phase("tokenize"):
+        items = list(scan_lines(processed))
+    lexical_errors: list = []
+    with profile.phase("parse"):
+        parser = ProfiledParser(items, tokenizer=lambda items: split_errors(items, lexical_errors),
+                                flat=bool(tree_file) and engine == "table" and mode == "full",
+                                engine=engine, mode="ast" if mode == "semantic" else mode)
+    # the parse tree or AST is streamed to its file like a normal compile does, the lines of a
+    # deep tree would not fit in memory, the time of the writes is moved to the file writes
+    dump = dump_file = None
+    writing = 0.0
+    nodes = epsilons = 0
+    if mode in ("full", "ast"):
+        dump = "tree dump" if mode == "full" else "ast dump"
+        dump_file = open("parse_tree.txt" if mode == "full" else "ast.txt", "w",
+                         encoding="utf-8", buffering=1 << 16)
+        with profile.phase(dump):
+            for line in tree_lines(parser.tree) if mode == "full" else ast_lines(parser.ast):
+                start = time.perf_counter()
+                if nodes:
+                    dump_file.write("\n")
+                dump_file.write(line)
+                writing += time.perf_counter() - start
+                nodes += 1
+                epsilons += line.endswith("epsilon")
+    semantic_errors = None
+    if mode == "semantic":
+        with profile.phase("semantic"):
+            semantic_errors = analyze(parser.ast)
+    with profile.phase("file writes"):
+        if dump_file is not None:
+            if mode == "ast" and nodes: # ast.txt ends every line with a newline
+                dump_file.write("\n")
+            dump_file.close()
+        if semantic_errors is not None:
+            write_semantic_errors(semantic_errors)
+        write_syntax_errors(parser.syntax_errors)
+    if dump is not None:
+        profile.move(dump, "file writes", writing)
+    if tree_file and mode == "full":
+        with profile.phase("tree file"):
+            write_tree_file(parser.tree, tree_file)
+
+    kinds = Counter(item[0] for item in items if item[0] not in ("ERROR", "FIN"))
+    table = parser.codes.table
+    profile.counters.update({
+        "mode": mode,
+        "engine": engine,
+        "lines": len(lines),
+        "tokens": sum(kinds.values()),
+        "tokens_by_type": dict(kinds),
+        "lexical_error_lines": len(lexical_errors),
+        "table_lookups": table.lookups if isinstance(table, CountingTable) else None,
+        # every token skipped by the panic mode recovery is reported as illegal
+        "recovery_skips": sum(", illegal " in error for error in parser.syntax_errors),
+        "syntax_errors": len(parser.syntax_errors),
+        "nodes": nodes, # one line per node of the parse tree or AST that was dumped
+        "epsilon_leaves": epsilons,
+    })
+    if semantic_errors is not None:
+        profile.counters["semantic_errors"] = len(semantic_errors)
+    profile.close()
+    profile.write(report)
+    return profile.report()
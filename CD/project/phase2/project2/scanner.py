@@ -60,3 +60,21 @@ def getNextToken(code):
             t += next_char # Add new character to the token
 
 
+"""This function generates the same tokens as getNextToken, but it matches one token at a time
+with the TOKEN pattern instead of growing the token character by character"""
+def tokenize(code):
+    line_number = 1
+    for match in TOKEN.finditer(code):
+        kind = match.lastgroup
+        if kind == "NEWLINE":
+            line_number += 1
+        elif kind == "SPACE":
+            pass
+        elif kind == "SPLIT": # the symbol is on the line of its second character
+            line_number += match.group().count("\n")
+            yield "SYMBOL", match.group()[0] * 2, line_number
+        elif kind == "JUNK": # nothing can be matched anymore, skip to the end
+            line_number += match.group().count("\n")
+        else:
+            yield kind, match.group(), line_number
+    yield "FIN", line_number
@@ -35,4 +35,24 @@ KEYWORD = re.compile(
 SYMBOL = re.compile(r"(!|!=|==|=|&&|\|\||\*|\-|\+|<=|>=|<|>|/|\(|\)|{|}|\[|\]|;|,)")
 
 """list of keywords"""
-KEYWORDS = "int bool void true false if else while until repeat break return".split(" ")
\ No newline at end of file
+KEYWORDS = "int bool void true false if else while until repeat break return".split(" ")
+
+"""Master pattern for the regex tokenizer, one named group per token class.
+The order of the alternatives matters:
+    - KEYWORD comes before ID, a word that starts with a keyword is a KEYWORD (same as KEYWORD.match)
+    - two character symbols come before one character symbols ('==' before '=')
+    - SPLIT is a '&&' or '||' with line breaks between its characters: getNextToken keeps a
+      '&' or '|' that ends a line and completes it with the same character at the start of
+      a later line, if only empty lines are in between
+    - JUNK is the last resort, a character that can't start any token eats the rest of the input
+"""
+TOKEN = re.compile(
+    r"(?P<NEWLINE>\n)"
+    r"|(?P<SPACE> +)"
+    r"|(?P<KEYWORD>(?:int|void|if|else|while|return|repeat|until|break|bool|true|false)[A-Za-z0-9]*)"
+    r"|(?P<ID>[A-Za-z][A-Za-z0-9]*)"
+    r"|(?P<NUM>[0-9]+)"
+    r"|(?P<SYMBOL>!=|==|&&|\|\||[!=*\-+/(){}\[\];,<>])"
+    r"|(?P<SPLIT>&\n+&|\|\n+\|)"
+    r"|(?P<JUNK>[\s\S]+)"
+)
@@ -0,0 +1,338 @@
+"""Semantic analysis of the AST: scopes, declarations before use, types and arities.
+
+Identifiers are interned to ints by Names, the SymbolTable keeps a stack of scopes, each
+a dict from the id of a name to its Symbol. A lookup tries one dict per scope level from
+the innermost one, leaving a scope drops its whole dict at once.
+
+Analyzer walks the AST with an explicit work stack, so long operator chains and deep
+nesting do not hit the recursion limit. An expression is checked after its operands: its
+type goes on a stack of types, "int", "array" or "void" (the result of a void function),
+or None when it is unknown. An unknown type is never reported, it comes from an error
+already reported or from a part of the tree lost to a syntax error.
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from ast_nodes import (AstNode, Program, VarDecl, FunDecl, Compound, ExprStmt, Break, If, Repeat, Return,
+                       Assign, BinOp, Var, Call, Num)
+
+
+class Names:
+    """Interns identifiers to consecutive ints."""
+    __slots__ = ("ids", "strings")
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, name: str) -> int:
+        k = self.ids.get(name)
+        if k is None:
+            k = self.ids[name] = len(self.strings)
+            self.strings.append(name)
+        return k
+
+
+class Symbol:
+    """A declared name: kind is "var", "param" or "function", type is the type of its value.
+
+    The type of a variable or parameter is "int" or "array", of a function its return type
+    "int" or "void"; params holds the types of the parameters of a function.
+    """
+    __slots__ = ("name", "kind", "type", "params", "line")
+
+    def __init__(self, name: int, kind: str, type: Optional[str], line: Optional[int],
+                 params: Optional[List[Optional[str]]] = None):
+        self.name = name
+        self.kind = kind
+        self.type = type
+        self.params = params
+        self.line = line
+
+
+class SymbolTable:
+    """A stack of scopes, the global scope at the bottom."""
+    __slots__ = ("scopes",)
+
+    def __init__(self):
+        self.scopes: List[Dict[int, Symbol]] = [{}]
+
+    def push(self):
+        self.scopes.append({})
+
+    def pop(self):
+        self.scopes.pop()
+
+    def declare(self, symbol: Symbol) -> Optional[Symbol]:
+        """Declares symbol in the innermost scope, returns the symbol it replaced there or None."""
+        scope = self.scopes[-1]
+        previous = scope.get(symbol.name)
+        scope[symbol.name] = symbol
+        return previous
+
+    def lookup(self, name: int) -> Optional[Symbol]:
+        """The symbol of name in the innermost scope declaring it, None if undeclared."""
+        for scope in reversed(self.scopes):
+            symbol = scope.get(name)
+            if symbol is not None:
+                return symbol
+        return None
+
+
+# functions every program can call: name, return type and parameter types
+BUILTINS = [("output", "void", ["int"])]
+
+
+class Analyzer:
+    """Checks a Program and collects its semantic errors as (line, message)."""
+
+    def __init__(self):
+        self.names = Names()
+        self.table = SymbolTable()
+        self.errors: List[Tuple[int, str]] = []
+        self.work: List[Tuple[Callable, object]] = []
+        self.types: List[Optional[str]] = []
+        self.function: Optional[Symbol] = None # the function whose body is checked
+        self.loops = 0 # repeat statements around the statement checked
+        for name, type, params in BUILTINS:
+            self.table.declare(Symbol(self.names.intern(name), "function", type, None, params))
+        self.statements: Dict[type, Callable] = {
+            VarDecl: self.var_declaration, FunDecl: self.fun_declaration, Compound: self.compound,
+            ExprStmt: self.expression_statement, Break: self.break_statement, If: self.if_statement,
+            Repeat: self.repeat_statement, Return: self.return_statement,
+        }
+        self.expressions: Dict[type, Callable] = {
+            Var: self.var, Call: self.call, BinOp: self.binop, Assign: self.assign, Num: self.num,
+        }
+
+    def error(self, line: Optional[int], message: str):
+        self.errors.append((line or 0, message))
+
+    def analyze(self, program: Optional[Program]) -> List[Tuple[int, str]]:
+        """Checks program, returns the errors sorted by line."""
+        if program is not None:
+            self.push_all(self.statement, program.declarations)
+            self.run()
+        self.errors.sort(key=lambda e: e[0])
+        return self.errors
+
+    def run(self):
+        work = self.work
+        while work:
+            step, node = work.pop()
+            step(node)
+
+    def push_all(self, step: Callable, nodes: list):
+        """Schedules step for every node, in order."""
+        self.work.extend((step, node) for node in reversed(nodes))
+
+    # declarations and statements
+
+    def statement(self, node: Optional[AstNode]):
+        if node is not None:
+            self.statements[type(node)](node)
+
+    def declare(self, symbol: Symbol, line: Optional[int]):
+        if self.table.declare(symbol) is not None:
+            self.error(line, f"'{self.names.strings[symbol.name]}' is already defined in this scope.")
+
+    def var_declaration(self, node: VarDecl):
+        if node.name is None:
+            return
+        if node.type == "void":
+            self.error(node.line, f"Illegal type of void for '{node.name}'.")
+        type = "int" if node.size is None else "array"
+        self.declare(Symbol(self.names.intern(node.name), "var", type, node.line), node.line)
+
+    def fun_declaration(self, node: FunDecl):
+        params = [param for param in node.params if param.name is not None]
+        symbol = None
+        if node.name is not None:
+            symbol = Symbol(self.names.intern(node.name), "function", node.type, node.line,
+                            ["array" if param.array else "int" for param in params])
+            self.declare(symbol, node.line) # before the body, so it can call itself
+        # the parameters and the outermost declarations of the body share a scope
+        self.table.push()
+        for param in params:
+            if param.type == "void":
+                self.error(param.line, f"Illegal type of void for '{param.name}'.")
+            self.declare(Symbol(self.names.intern(param.name), "param", "array" if param.array else "int",
+                                param.line), param.line)
+        self.work.append((self.leave_function, (self.function, self.loops)))
+        self.function, self.loops = symbol, 0
+        if node.body is not None:
+            self.block(node.body)
+
+    def leave_function(self, outer: Tuple[Optional[Symbol], int]):
+        self.table.pop()
+        self.function, self.loops = outer
+
+    def compound(self, node: Compound):
+        self.table.push()
+        self.work.append((self.leave_scope, None))
+        self.block(node)
+
+    def block(self, node: Compound):
+        """Schedules the declarations and statements of node, in the current scope."""
+        self.push_all(self.statement, node.statements)
+        self.push_all(self.statement, node.declarations)
+
+    def leave_scope(self, _):
+        self.table.pop()
+
+    def expression_statement(self, node: ExprStmt):
+        if node.expr is not None:
+            self.work.append((self.discard, None))
+            self.expression(node.expr)
+
+    def discard(self, _):
+        self.types.pop()
+
+    def break_statement(self, node: Break):
+        if not self.loops:
+            self.error(node.line, "No 'repeat ... until' found for 'break'.")
+
+    def if_statement(self, node: If):
+        self.work.append((self.statement, node.otherwise))
+        self.work.append((self.statement, node.then))
+        self.condition(node.cond, node.line)
+
+    def repeat_statement(self, node: Repeat):
+        self.work.append((self.leave_loop, None))
+        self.condition(node.cond, node.line)
+        self.work.append((self.statement, node.body))
+        self.loops += 1
+
+    def leave_loop(self, _):
+        self.loops -= 1
+
+    def condition(self, node, line: Optional[int]):
+        """Schedules checking that the expression node is an int."""
+        self.work.append((self.expect_int, line))
+        self.expression(node)
+
+    def expect_int(self, line: Optional[int]):
+        type = self.types.pop()
+        if type is not None and type != "int":
+            self.error(line, f"Type mismatch in operands, Got {type} instead of int.")
+
+    def return_statement(self, node: Return):
+        if node.value is None:
+            if self.function is not None and self.function.type == "int":
+                self.error(node.line, f"Mismatch in return type of '{self.names.strings[self.function.name]}'.")
+            return
+        self.work.append((self.return_value, node.line))
+        self.expression(node.value)
+
+    def return_value(self, line: Optional[int]):
+        type = self.types.pop()
+        function = self.function
+        if function is not None and type is not None and (function.type != "int" or type != "int"):
+            self.error(line, f"Mismatch in return type of '{self.names.strings[function.name]}'.")
+
+    # expressions, every one leaves its type on the stack of types
+
+    def expression(self, node: Optional[AstNode]):
+        """Schedules the expression node, its type is on the stack of types once it ran."""
+        if node is None:
+            self.types.append(None)
+        else:
+            self.work.append((self.expressions[type(node)], node))
+
+    def lookup(self, name: Optional[str], line: Optional[int]) -> Optional[Symbol]:
+        if name is None:
+            return None
+        symbol = self.table.lookup(self.names.intern(name))
+        if symbol is None:
+            self.error(line, f"'{name}' is not defined.")
+        return symbol
+
+    def var(self, node: Var):
+        if node.index is not None:
+            self.work.append((self.element, node))
+            self.expression(node.index)
+            return
+        symbol = self.lookup(node.name, node.line)
+        if symbol is not None and symbol.kind == "function":
+            self.error(node.line, f"'{node.name}' is a function, not a variable.")
+            symbol = None
+        self.types.append(None if symbol is None else symbol.type)
+
+    def element(self, node: Var):
+        """An array element, its index is checked."""
+        index = self.types.pop()
+        symbol = self.lookup(node.name, node.line)
+        if symbol is not None and symbol.type != "array":
+            self.error(node.line, f"'{node.name}' is not an array.")
+        if index is not None and index != "int":
+            self.error(node.line, f"Type mismatch in operands, Got {index} instead of int.")
+        self.types.append("int")
+
+    def call(self, node: Call):
+        self.work.append((self.call_result, node))
+        for arg in reversed(node.args):
+            self.expression(arg)
+
+    def call_result(self, node: Call):
+        n = len(node.args)
+        args = self.types[len(self.types) - n:]
+        del self.types[len(self.types) - n:]
+        symbol = self.lookup(node.name, node.line)
+        if symbol is None:
+            self.types.append(None)
+            return
+        if symbol.kind != "function":
+            self.error(node.line, f"'{node.name}' is not a function.")
+            self.types.append(None)
+            return
+        if len(args) != len(symbol.params):
+            self.error(node.line, f"Mismatch in numbers of arguments of '{node.name}'.")
+        else:
+            for i, (expected, got) in enumerate(zip(symbol.params, args), 1):
+                if got is not None and got != expected:
+                    self.error(node.line, f"Mismatch in type of argument {i} of '{node.name}'. "
+                                          f"Expected '{expected}' but got '{got}' instead.")
+        self.types.append(symbol.type)
+
+    def binop(self, node: BinOp):
+        self.work.append((self.binop_result, node))
+        self.expression(node.right)
+        self.expression(node.left)
+
+    def binop_result(self, node: BinOp):
+        right = self.types.pop()
+        left = self.types.pop()
+        for type in (left, right):
+            if type is not None and type != "int":
+                self.error(node.line, f"Type mismatch in operands, Got {type} instead of int.")
+                break
+        self.types.append("int")
+
+    def assign(self, node: Assign):
+        self.work.append((self.assign_result, node))
+        self.expression(node.value)
+        self.expression(node.target)
+
+    def assign_result(self, node: Assign):
+        value = self.types.pop()
+        target = self.types.pop()
+        if target is not None and value is not None and target != value:
+            self.error(node.line, f"Type mismatch in operands, Got {value} instead of {target}.")
+        self.types.append(target)
+
+    def num(self, node: Num):
+        self.types.append("int")
+
+
+def analyze(program: Optional[Program]) -> List[Tuple[int, str]]:
+    """The semantic errors of a program as (line, message), sorted by line."""
+    return Analyzer().analyze(program)
+
+
+def write_semantic_errors(errors: List[Tuple[int, str]], filename: str = "semantic_errors.txt"):
+    """Writes the semantic errors one per line, or that there is none."""
+    if errors:
+        Path(filename).write_text(
+            "\n".join(f"#{line} : Semantic Error! {message}" for line, message in errors), encoding="utf-8")
+    else:
+        Path(filename).write_text(
+            "The input program is semantically correct.", encoding="utf-8")
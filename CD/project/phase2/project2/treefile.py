@@ -0,0 +1,195 @@
+"""Compact binary file of a parse tree, loaded lazily through mmap.
+
+The file holds the columns of a FlatTree and a string table:
+
+    header      HEADER: magic, version, node, name, token and string counts, blob size
+    symbol      int32 per node, index of its name (names are the first strings)
+    token       int32 per node, index of its token or -1
+    first_child int32 per node, row or -1
+    next_sibling int32 per node, row or -1
+    tokens      two int32 per token, the strings of its tok_type and lexeme
+    offsets     int32 per string and one more, where the string starts in the blob
+    blob        the strings in UTF-8, every distinct lexeme once
+
+Everything is little endian. TreeFile maps the file and views the columns in place, so
+loading does not depend on the size of the tree; a string is only decoded when a node
+that has it is read. TreeFile is a FlatTree, tree_lines and write_tree take it as is.
+
+Run as a script to convert a binary tree back to the text format of parse_tree.txt.
+"""
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, List, Union
+from utils import Node, FlatTree, write_tree
+
+MAGIC = b"PTRB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHiiiiii") # magic, version, reserved, nodes, names, tokens, strings, blob, reserved
+INT = array("i").itemsize # the columns are int32
+
+
+def flatten(tree: Node) -> FlatTree:
+    """The FlatTree of a Node tree, rows in preorder like Parser.parse_flat makes them."""
+    ids: Dict[str, int] = {}
+    flat = FlatTree([])
+    first_child, next_sibling = flat.first_child, flat.next_sibling
+    last = array("i") # last child of every row written so far, or -1
+    stack = [(tree, -1)] # (node, row of its parent)
+    while stack:
+        node, parent = stack.pop()
+        k = ids.get(node.symbol)
+        if k is None:
+            k = ids[node.symbol] = len(flat.names)
+            flat.names.append(node.symbol)
+        row = flat.add_node(k)
+        last.append(-1)
+        if node.tok_type is not None:
+            flat.token[row] = len(flat.tokens)
+            flat.tokens.append((node.tok_type, node.lexeme))
+        if parent != -1:
+            if last[parent] == -1:
+                first_child[parent] = row
+            else:
+                next_sibling[last[parent]] = row
+            last[parent] = row
+        stack.extend((child, row) for child in reversed(node.children))
+    return flat
+
+
+def write_tree_file(tree: Union[Node, FlatTree], filename: str = "parse_tree.bin"):
+    """Writes the parse tree in the binary format, a Node tree is flattened first."""
+    if not isinstance(tree, FlatTree):
+        tree = flatten(tree)
+    strings: List[str] = list(tree.names)
+    index: Dict[str, int] = {}
+    pairs = array("i")
+    for tok_type, lexeme in tree.tokens:
+        for s in (tok_type, lexeme):
+            k = index.get(s)
+            if k is None:
+                k = index[s] = len(strings)
+                strings.append(s)
+            pairs.append(k)
+    # the names of IntTables have a None between the terminals and non-terminals, no node uses it
+    encoded = [b"" if s is None else s.encode("utf-8") for s in strings]
+    offsets = array("i", [0])
+    for b in encoded:
+        offsets.append(offsets[-1] + len(b))
+    columns = [tree.symbol, tree.token, tree.first_child, tree.next_sibling, pairs, offsets]
+    if sys.byteorder == "big":
+        columns = [array("i", c) for c in columns]
+        for c in columns:
+            c.byteswap()
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(tree.symbol), len(tree.names),
+                            len(tree.tokens), len(strings), offsets[-1], 0))
+        for c in columns:
+            f.write(c)
+        f.write(b"".join(encoded))
+
+
+class Strings:
+    """The string table of a tree file, a string is decoded when it is read."""
+    __slots__ = ("offsets", "blob")
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class Tokens:
+    """The (tok_type, lexeme) pairs of a tree file, like FlatTree.tokens."""
+    __slots__ = ("pairs", "strings")
+
+    def __init__(self, pairs, strings: Strings):
+        self.pairs = pairs
+        self.strings = strings
+
+    def __len__(self):
+        return len(self.pairs) // 2
+
+    def __getitem__(self, k: int):
+        if not 0 <= k < len(self):
+            raise IndexError(k)
+        return self.strings[self.pairs[2 * k]], self.strings[self.pairs[2 * k + 1]]
+
+
+class TreeFile(FlatTree):
+    """A parse tree file mapped read only, the columns are views of the map.
+
+    Use it as a context manager or call close, the map stays open while the tree is read.
+    """
+    __slots__ = ("map", "views")
+
+    def __init__(self, filename: str = "parse_tree.bin"):
+        with open(filename, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self.map)
+        self.views = [data]
+        if len(data) < HEADER.size:
+            self.close()
+            raise ValueError(f"{filename} is not a parse tree file")
+        magic, version, _, n_nodes, n_names, n_tokens, n_strings, blob_size, _ = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{filename} is not a parse tree file of version {VERSION}")
+        sizes = [n_nodes] * 4 + [2 * n_tokens, n_strings + 1]
+        if len(data) != HEADER.size + sum(sizes) * INT + blob_size:
+            self.close()
+            raise ValueError(f"{filename} is truncated")
+
+        columns, start = [], HEADER.size
+        for n in sizes:
+            columns.append(self.column(data[start:start + n * INT]))
+            start += n * INT
+        blob = data[start:]
+        self.views.append(blob)
+        self.symbol, self.token, self.first_child, self.next_sibling, pairs, offsets = columns
+        strings = Strings(offsets, blob)
+        self.names = [strings[i] for i in range(n_names)]
+        self.tokens = Tokens(pairs, strings)
+
+    def column(self, view: memoryview):
+        """An int view of a column, a copy on big endian machines."""
+        if sys.byteorder == "big":
+            copy = array("i", view.tobytes())
+            copy.byteswap()
+            return copy
+        view = view.cast("i")
+        self.views.append(view)
+        return view
+
+    def close(self):
+        """Releases the views and unmaps the file, the tree cannot be read afterwards."""
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.map.close()
+
+    def __enter__(self) -> "TreeFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    args = argparse.ArgumentParser(description="Converts a binary parse tree file to the text format of parse_tree.txt.")
+    args.add_argument("tree_file", nargs="?", default="parse_tree.bin")
+    args.add_argument("-o", "--output", default="parse_tree.txt", help="text file to write (default: parse_tree.txt)")
+    options = args.parse_args()
+    with TreeFile(options.tree_file) as tree:
+        write_tree(tree, options.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """Utility functions for the compiler."""
-from typing import List, Optional
+from array import array
+from typing import Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 
 
@@ -11,6 +12,7 @@ def getfile(filename) -> str:
 
 class Node:
     """Represents a node in the parse tree."""
+    __slots__ = ("symbol", "tok_type", "lexeme", "children")
 
     def __init__(self, symbol: str, tok_type: Optional[str] = None, lexeme: Optional[str] = None):
         # The grammar symbol (terminal or non-terminal)
@@ -25,44 +27,192 @@ class Node:
         self.children.append(child)
 
 
-def draw_tree(node: Node, prefix: str, is_last: bool, out: List[str]):
-    """Recursively dumps the parse tree to a list of strings with proper formatting.
+# The epsilon leaf, shared by every epsilon expansion of a tree. It never gets children or a token
+EPSILON_LEAF = Node("epsilon")
+
+
+class FlatTree:
+    """A parse tree stored in parallel int columns, one row per node.
+
+    symbol[i] is the index of the name of node i in names, token[i] the index of its
+    (tok_type, lexeme) in tokens or -1, first_child[i] and next_sibling[i] are rows or -1.
+    Row 0 is the root.
+    """
+    __slots__ = ("names", "tokens", "symbol", "token", "first_child", "next_sibling")
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        self.tokens: List[Tuple[str, str]] = []
+        self.symbol = array("i")
+        self.token = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+
+    def __len__(self):
+        return len(self.symbol)
+
+    def add_node(self, symbol: int) -> int:
+        """Adds a node without children or token and returns its row."""
+        self.symbol.append(symbol)
+        self.token.append(-1)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        return len(self.symbol) - 1
+
+    def add_child(self, parent: int, symbol: int) -> int:
+        """Adds a node after the last child of parent and returns its row."""
+        row = self.add_node(symbol)
+        child = self.first_child[parent]
+        if child == -1:
+            self.first_child[parent] = row
+        else:
+            while self.next_sibling[child] != -1:
+                child = self.next_sibling[child]
+            self.next_sibling[child] = row
+        return row
+
+    def node(self, row: int = 0) -> "FlatNode":
+        """A Node like view of a row."""
+        return FlatNode(self, row)
+
+
+class FlatNode:
+    """Read only view of a FlatTree row with the attributes of a Node, made when the tree is read."""
+    __slots__ = ("tree", "row")
+
+    def __init__(self, tree: FlatTree, row: int):
+        self.tree = tree
+        self.row = row
+
+    @property
+    def symbol(self) -> str:
+        return self.tree.names[self.tree.symbol[self.row]]
+
+    @property
+    def tok_type(self) -> Optional[str]:
+        k = self.tree.token[self.row]
+        return None if k == -1 else self.tree.tokens[k][0]
+
+    @property
+    def lexeme(self) -> Optional[str]:
+        k = self.tree.token[self.row]
+        return None if k == -1 else self.tree.tokens[k][1]
+
+    @property
+    def children(self) -> List["FlatNode"]:
+        tree, nodes = self.tree, []
+        child = tree.first_child[self.row]
+        while child != -1:
+            nodes.append(FlatNode(tree, child))
+            child = tree.next_sibling[child]
+        return nodes
+
+
+# Branches of a line and the prefix pieces a node adds for its children, indexed by is_last
+BRANCH = ("├── ", "└── ")
+INDENT = ("│   ", "    ")
+
+
+def tree_lines(node: Union[Node, FlatTree, FlatNode], prefix: str = "", is_last: bool = True) -> Iterator[str]:
+    """Generates the lines of the parse tree without recursion.
+
+    A stack of (node, prefix, is_last) replaces the call stack, the prefix of the children of
+    a node is built once and shared by all of them, so deep chains like Declaration-list do not
+    hit the recursion limit.
 
     Args:
-        node: The current node to process
+        node: The root of the (sub)tree, a FlatTree is drawn from its root
+        prefix: The prefix string for proper indentation
+        is_last: Whether this node is the last child of its parent
+    """
+    if isinstance(node, FlatTree):
+        node = node.node()
+    if isinstance(node, FlatNode):
+        yield from flat_tree_lines(node.tree, node.row, prefix, is_last)
+        return
+    stack = [(node, prefix, is_last)]
+    while stack:
+        node, prefix, is_last = stack.pop()
+        if prefix == "":
+            yield node.symbol
+        elif node.tok_type is None:
+            yield f"{prefix}{BRANCH[is_last]}{node.symbol}"
+        else:
+            yield f"{prefix}{BRANCH[is_last]}({node.tok_type}, {node.lexeme})"
+        children = node.children
+        if children:
+            new_pref = prefix + INDENT[is_last]
+            stack.append((children[-1], new_pref, True))
+            stack.extend((ch, new_pref, False) for ch in reversed(children[:-1]))
+
+
+def flat_tree_lines(tree: FlatTree, row: int = 0, prefix: str = "", is_last: bool = True) -> Iterator[str]:
+    """Same as tree_lines for the subtree of a FlatTree row, it reads the columns directly."""
+    names, tokens, symbol, token = tree.names, tree.tokens, tree.symbol, tree.token
+    first_child, next_sibling = tree.first_child, tree.next_sibling
+    stack = [(row, prefix, is_last)]
+    while stack:
+        row, prefix, is_last = stack.pop()
+        k = token[row]
+        if prefix == "":
+            yield names[symbol[row]]
+        elif k == -1:
+            yield f"{prefix}{BRANCH[is_last]}{names[symbol[row]]}"
+        else:
+            yield f"{prefix}{BRANCH[is_last]}({tokens[k][0]}, {tokens[k][1]})"
+        child = first_child[row]
+        if child != -1:
+            new_pref = prefix + INDENT[is_last]
+            children = []
+            while child != -1:
+                children.append(child)
+                child = next_sibling[child]
+            stack.append((children[-1], new_pref, True))
+            stack.extend((ch, new_pref, False) for ch in reversed(children[:-1]))
+
+
+def draw_tree(node: Union[Node, FlatTree, FlatNode], prefix: str, is_last: bool, out: List[str]):
+    """Dumps the parse tree to a list of strings with proper formatting.
+
+    Args:
+        node: The current node to process, a FlatTree is drawn from its root
         prefix: The prefix string for proper indentation
         is_last: Whether this node is the last child of its parent
         out: The list to store the output strings
     """
-    if prefix == "":
-        out.append(node.symbol)
+    out.extend(tree_lines(node, prefix, is_last))
+
+
+def write_tree(tree: Union[Node, FlatTree], filename: str = "parse_tree.txt"):
+    """Streams the lines of the parse tree to a file through a buffered writer, lines are
+    separated by newlines like "\n".join would do."""
+    with open(filename, "w", encoding="utf-8", buffering=1 << 16) as f:
+        lines = tree_lines(tree)
+        f.write(next(lines))
+        for line in lines:
+            f.write("\n")
+            f.write(line)
+
+
+def write_syntax_errors(syntax_errors: List[str], filename: str = "syntax_errors.txt"):
+    """Writes the syntax errors one per line, or that there is none."""
+    if syntax_errors:
+        Path(filename).write_text(
+            "\n".join(syntax_errors), encoding="utf-8")
     else:
-        branch = "└── " if is_last else "├── "
-        if node.tok_type is None:
-            out.append(f"{prefix}{branch}{node.symbol}")
-        else:
-            out.append(f"{prefix}{branch}({node.tok_type}, {node.lexeme})")
-    new_pref = prefix + ("    " if is_last else "│   ")
-    for i, ch in enumerate(node.children):
-        draw_tree(ch, new_pref, i == len(node.children) - 1, out)
+        Path(filename).write_text(
+            "There is no syntax error.", encoding="utf-8")
 
 
-def write_output_files(tree: Node, syntax_errors: List[str]):
+def write_output_files(tree: Union[Node, FlatTree], syntax_errors: List[str]):
     """Writes the parse tree and syntax errors to their respective output files.
 
     Args:
-        tree: The root node of the parse tree
+        tree: The root node of the parse tree or a FlatTree
         syntax_errors: List of syntax error messages
     """
     # Write parse tree
-    lines: List[str] = []
-    draw_tree(tree, "", True, lines)
-    Path("parse_tree.txt").write_text("\n".join(lines), encoding="utf-8")
+    write_tree(tree)
 
     # Write syntax errors
-    if syntax_errors:
-        Path("syntax_errors.txt").write_text(
-            "\n".join(syntax_errors), encoding="utf-8")
-    else:
-        Path("syntax_errors.txt").write_text(
-            "There is no syntax error.", encoding="utf-8")
+    write_syntax_errors(syntax_errors)
@@ -44,11 +44,11 @@ num_states = [
     {},
     {}
 ]
-numDFA = DFA(num_states,(2),(2))
+numDFA = DFA(num_states,(2,),(2,))
 
 id_states = [
     {letter_input : 1},
     {letter_input : 1 , digit_input : 1 , white_space_input : 2 , symbol_input: 2},
     {}
 ]
-idDFA = DFA()
+idDFA = DFA(id_states,(2,),(2,))
@@ -0,0 +1,449 @@
+""" # Lexer generator
+- Compiles token specs into one minimized DFA with a flat 256 column transition table.
+- A spec is either a regex (string or compiled re pattern) or a DFA.py style state list.
+- Tokens are matched with maximal munch, when two specs match the same lexeme the first one wins.
+"""
+import re
+import sys
+from array import array
+
+ALPHABET = 256
+ALL_BYTES = (1 << ALPHABET) - 1
+
+
+def char_mask(chars) -> int:
+    """Returns the bitmask (bit i = byte i) of an iterable of characters."""
+    mask = 0
+    for c in chars:
+        code = ord(c)
+        if code >= ALPHABET:
+            raise ValueError(f"character {c!r} is not a byte")
+        mask |= 1 << code
+    return mask
+
+
+def range_mask(first: int, last: int) -> int:
+    """Returns the bitmask of the bytes first..last (both included)."""
+    return ((1 << (last + 1)) - 1) ^ ((1 << first) - 1)
+
+
+ESCAPES = {
+    "d": range_mask(ord("0"), ord("9")),
+    "w": range_mask(ord("0"), ord("9")) | range_mask(ord("a"), ord("z")) | range_mask(ord("A"), ord("Z")) | char_mask("_"),
+    "s": char_mask(" \t\n\r\f\v"),
+    "S": 0, "D": 0, "W": 0,
+    "n": char_mask("\n"), "t": char_mask("\t"), "r": char_mask("\r"), "f": char_mask("\f"), "v": char_mask("\v"),
+}
+ESCAPES["S"] = ALL_BYTES ^ ESCAPES["s"]
+ESCAPES["D"] = ALL_BYTES ^ ESCAPES["d"]
+ESCAPES["W"] = ALL_BYTES ^ ESCAPES["w"]
+
+
+class NFA:
+    """Thompson NFA. edges[s] is a list of (mask, target), mask None is an epsilon edge."""
+
+    def __init__(self):
+        self.edges = []
+        self.accept = {}  # state -> token index
+
+    def new_state(self) -> int:
+        self.edges.append([])
+        return len(self.edges) - 1
+
+    def edge(self, src: int, mask, dst: int):
+        self.edges[src].append((mask, dst))
+
+    def closure(self, states) -> frozenset:
+        """Epsilon closure of a set of states."""
+        stack = list(states)
+        seen = set(stack)
+        while stack:
+            s = stack.pop()
+            for mask, t in self.edges[s]:
+                if mask is None and t not in seen:
+                    seen.add(t)
+                    stack.append(t)
+        return frozenset(seen)
+
+
+class RegexParser:
+    """Parses the regex subset used by the scanners into NFA fragments.
+    Supported: literals, escapes, [classes], (groups), (?:groups), |, *, +, ? and '.'
+    Anchors, lookarounds, backreferences and {m,n} repeats are not supported.
+    """
+
+    def __init__(self, nfa: NFA, pattern: str):
+        self.nfa = nfa
+        self.pattern = pattern
+        self.pos = 0
+
+    def error(self, msg: str):
+        raise ValueError(f"{msg} at {self.pos} in {self.pattern!r}")
+
+    def peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def take(self) -> str:
+        c = self.pattern[self.pos]
+        self.pos += 1
+        return c
+
+    def parse(self):
+        """Returns (start, end) of the fragment for the whole pattern."""
+        frag = self.alternation()
+        if self.pos != len(self.pattern):
+            self.error("unexpected ')'")
+        return frag
+
+    def alternation(self):
+        branches = [self.sequence()]
+        while self.peek() == "|":
+            self.take()
+            branches.append(self.sequence())
+        if len(branches) == 1:
+            return branches[0]
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        for s, e in branches:
+            self.nfa.edge(start, None, s)
+            self.nfa.edge(e, None, end)
+        return start, end
+
+    def sequence(self):
+        start = end = self.nfa.new_state()
+        while self.peek() not in (None, "|", ")"):
+            s, e = self.repeat()
+            self.nfa.edge(end, None, s)
+            end = e
+        return start, end
+
+    def repeat(self):
+        s, e = self.atom()
+        while self.peek() in ("*", "+", "?"):
+            op = self.take()
+            start, end = self.nfa.new_state(), self.nfa.new_state()
+            self.nfa.edge(start, None, s)
+            self.nfa.edge(e, None, end)
+            if op in ("*", "?"):
+                self.nfa.edge(start, None, end)
+            if op in ("*", "+"):
+                self.nfa.edge(e, None, s)
+            s, e = start, end
+        return s, e
+
+    def atom(self):
+        c = self.take()
+        if c == "(":
+            if self.pattern.startswith("?:", self.pos):
+                self.pos += 2
+            elif self.peek() == "?":
+                self.error("unsupported group")
+            frag = self.alternation()
+            if self.peek() != ")":
+                self.error("missing ')'")
+            self.take()
+            return frag
+        if c in "*+?":
+            self.error("nothing to repeat")
+        if c in "^$":
+            self.error("anchors are not supported")
+        if c == "[":
+            mask = self.char_class()
+        elif c == ".":
+            mask = ALL_BYTES ^ char_mask("\n")
+        elif c == "\\":
+            mask = self.escape()
+        else:
+            mask = char_mask(c)
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        self.nfa.edge(start, mask, end)
+        return start, end
+
+    def escape(self) -> int:
+        if self.peek() is None:
+            self.error("bad escape")
+        c = self.take()
+        if c in ESCAPES:
+            return ESCAPES[c]
+        if c.isalnum():
+            self.error(f"unsupported escape \\{c}")
+        return char_mask(c)
+
+    def char_class(self) -> int:
+        negate = self.peek() == "^"
+        if negate:
+            self.take()
+        mask = 0
+        first = True
+        while first or self.peek() != "]":
+            if self.peek() is None:
+                self.error("missing ']'")
+            first = False
+            c = self.take()
+            if c == "\\":
+                low = self.escape()
+            else:
+                low = char_mask(c)
+            # a range like a-z, a trailing '-' is a literal
+            if self.peek() == "-" and self.pattern[self.pos + 1:self.pos + 2] not in ("]", ""):
+                self.take()
+                hi = self.take()
+                if hi == "\\":
+                    hi = chr(self.escape().bit_length() - 1)
+                if c == "\\" or ord(hi) < ord(c):
+                    self.error("bad range")
+                mask |= range_mask(ord(c), ord(hi))
+            else:
+                mask |= low
+        self.take()
+        return ALL_BYTES ^ mask if negate else mask
+
+
+def add_dfa_spec(nfa: NFA, spec):
+    """Adds a DFA.py style spec (states, accept, star) to the nfa and returns its start state.
+    Transitions into star states accept the lexeme read so far (the char is retracted),
+    so the state that takes them becomes an accepting state.
+    """
+    states, accept, star = spec
+    accept, star = set(_as_tuple(accept)), set(_as_tuple(star))
+    ids = [nfa.new_state() for _ in states]
+    finals = set()
+    for i, transitions in enumerate(states):
+        if i in accept and i not in star:
+            finals.add(ids[i])
+        for chars, target in transitions.items():
+            if target in star:
+                finals.add(ids[i])
+            else:
+                nfa.edge(ids[i], char_mask(chars), ids[target])
+    return ids[0], finals
+
+
+def _as_tuple(value):
+    return value if isinstance(value, (tuple, list, set, frozenset)) else (value,)
+
+
+def build_nfa(specs):
+    """Builds one NFA for all the (name, spec) pairs, returns (nfa, start)."""
+    nfa = NFA()
+    start = nfa.new_state()
+    for index, (name, spec) in enumerate(specs):
+        if isinstance(spec, re.Pattern):
+            spec = spec.pattern
+        if isinstance(spec, str):
+            s, e = RegexParser(nfa, spec).parse()
+            finals = {e}
+        else:
+            if hasattr(spec, "states"):  # a DFA object from DFA.py
+                spec = (spec.states, spec.accept, spec.star)
+            s, finals = add_dfa_spec(nfa, spec)
+        nfa.edge(start, None, s)
+        for f in finals:
+            nfa.accept[f] = index
+    return nfa, start
+
+
+def byte_classes(nfa: NFA):
+    """Groups the bytes that no edge of the nfa can tell apart.
+    Returns (class_of, representatives), class_of[b] is the class of byte b."""
+    masks = {mask for edges in nfa.edges for mask, _ in edges if mask is not None}
+    signatures = {}
+    class_of = []
+    for b in range(ALPHABET):
+        bit = 1 << b
+        sig = tuple(sorted(m for m in masks if m & bit))
+        class_of.append(signatures.setdefault(sig, len(signatures)))
+    representatives = [0] * len(signatures)
+    for b in reversed(range(ALPHABET)):
+        representatives[class_of[b]] = b
+    return class_of, representatives
+
+
+def subset_construction(nfa: NFA, start: int, representatives):
+    """Returns (delta, accept) of the DFA, state 0 is the dead state and state 1 the start.
+    delta[s][c] is the target of state s on byte class c, accept[s] is the token index or -1."""
+    dead = frozenset()
+    first = nfa.closure([start])
+    index = {dead: 0, first: 1}
+    order = [dead, first]
+    delta = []
+    i = 0
+    while i < len(order):
+        current = order[i]
+        row = []
+        for b in representatives:
+            bit = 1 << b
+            moved = [t for s in current for mask, t in nfa.edges[s] if mask is not None and mask & bit]
+            target = nfa.closure(moved) if moved else dead
+            if target not in index:
+                index[target] = len(order)
+                order.append(target)
+            row.append(index[target])
+        delta.append(row)
+        i += 1
+    accept = []
+    for states in order:
+        tokens = [nfa.accept[s] for s in states if s in nfa.accept]
+        accept.append(min(tokens) if tokens else -1)
+    return delta, accept
+
+
+def hopcroft(delta, accept, n_classes):
+    """Minimizes the DFA, returns the block number of every state."""
+    n = len(delta)
+    inverse = [[[] for _ in range(n)] for _ in range(n_classes)]
+    for s in range(n):
+        for c in range(n_classes):
+            inverse[c][delta[s][c]].append(s)
+
+    groups = {}
+    for s in range(n):
+        groups.setdefault(accept[s], set()).add(s)
+    partition = [frozenset(g) for g in groups.values()]
+    work = set(partition)
+    while work:
+        splitter = work.pop()
+        for c in range(n_classes):
+            x = {p for q in splitter for p in inverse[c][q]}
+            if not x:
+                continue
+            refined = []
+            for block in partition:
+                inside = block & x
+                if not inside or len(inside) == len(block):
+                    refined.append(block)
+                    continue
+                outside = block - inside
+                refined += [inside, outside]
+                if block in work:
+                    work.remove(block)
+                    work.update((inside, outside))
+                else:
+                    work.add(inside if len(inside) <= len(outside) else outside)
+            partition = refined
+
+    block_of = [0] * n
+    for b, block in enumerate(partition):
+        for s in block:
+            block_of[s] = b
+    return block_of
+
+
+class Lexer:
+    """Table driven lexer. table[state * 256 + byte] is the next state, 0 means no transition.
+    accept[state] is 0 for non accepting states and token index + 1 otherwise."""
+
+    def __init__(self, names, table, accept, skip=()):
+        self.names = list(names)
+        self.table = table
+        self.accept = accept
+        self.skip = set(skip)
+
+    @property
+    def state_count(self) -> int:
+        return len(self.accept)
+
+    def longest_match(self, data, pos: int):
+        """Returns (token index, end) of the longest token at pos, (-1, pos) if nothing matches."""
+        table, accept = self.table, self.accept
+        state, i, n = 1, pos, len(data)
+        token, end = -1, pos
+        while i < n:
+            state = table[(state << 8) | data[i]]
+            if not state:
+                break
+            i += 1
+            if accept[state]:
+                token, end = accept[state] - 1, i
+        return token, end
+
+    def tokens(self, data):
+        """Generates (name, lexeme, line) for bytes-like data.
+        A byte that can't start a token is reported with the name None."""
+        if isinstance(data, str):
+            data = data.encode("latin-1")
+        pos, line, n = 0, 1, len(data)
+        names, skip = self.names, self.skip
+        while pos < n:
+            token, end = self.longest_match(data, pos)
+            if token < 0:
+                end = pos + 1
+                yield None, bytes(data[pos:end]).decode("latin-1"), line
+            elif names[token] not in skip:
+                yield names[token], bytes(data[pos:end]).decode("latin-1"), line
+            line += bytes(data[pos:end]).count(b"\n")
+            pos = end
+
+    def write_module(self, filename: str):
+        """Writes the tables as a python module that can be loaded with load_module."""
+        with open(filename, "w") as f:
+            f.write("# generated by lexgen.py, do not edit\n")
+            f.write(f"NAMES = {self.names!r}\n")
+            f.write(f"SKIP = {sorted(self.skip)!r}\n")
+            f.write(f"TYPECODE = {self.table.typecode!r}\n")
+            f.write(f"TABLE = {self.table.tobytes()!r}\n")
+            f.write(f"ACCEPT = {self.accept.tobytes()!r}\n")
+
+    @classmethod
+    def load_module(cls, module):
+        """Builds a Lexer from a module written by write_module."""
+        table = array(module.TYPECODE)
+        table.frombytes(module.TABLE)
+        accept = array("H")
+        accept.frombytes(module.ACCEPT)
+        return cls(module.NAMES, table, accept, module.SKIP)
+
+
+def compile_lexer(specs, skip=()) -> Lexer:
+    """Compiles a list of (name, spec) pairs into a minimized table driven Lexer.
+
+    Args:
+        specs: (name, spec) pairs, spec is a regex or a DFA.py style (states, accept, star)
+        skip: names of the tokens that should not be reported (e.g. whitespace)
+    """
+    nfa, start = build_nfa(specs)
+    class_of, representatives = byte_classes(nfa)
+    delta, accept = subset_construction(nfa, start, representatives)
+    block_of = hopcroft(delta, accept, len(representatives))
+
+    # renumber the blocks so that the dead state is 0 and the start state is 1
+    numbering = {block_of[0]: 0, block_of[1]: 1}
+    for b in block_of:
+        numbering.setdefault(b, len(numbering))
+    n_states = len(numbering)
+    representative_state = {}
+    for s, b in enumerate(block_of):
+        representative_state.setdefault(numbering[b], s)
+
+    typecode = "B" if n_states <= 256 else "H"
+    table = array(typecode, bytes(n_states * ALPHABET * array(typecode).itemsize))
+    accept_table = array("H", [0] * n_states)
+    for new, s in representative_state.items():
+        accept_table[new] = accept[s] + 1
+        row = delta[s]
+        base = new * ALPHABET
+        for b in range(ALPHABET):
+            table[base + b] = numbering[block_of[row[class_of[b]]]]
+    return Lexer([name for name, _ in specs], table, accept_table, skip)
+
+
+def cminus_specs():
+    """Token specs of C-minus, built from the DFA.py state lists and regexes."""
+    from DFA import num_states, id_states
+    keywords = "|".join("int bool void true false if else while until repeat break return".split())
+    return [
+        ("WHITESPACE", r"[ \n\r\t\v\f]+"),
+        ("COMMENT", r"/\*([^*]|\*+[^*/])*\*+/"),
+        ("KEYWORD", keywords),
+        ("ID", (id_states, (2,), (2,))),
+        ("NUM", (num_states, (2,), (2,))),
+        ("SYMBOL", r"(!|!=|==|=|&&|\|\||\*|\-|\+|<=|>=|<|>|/|\(|\)|{|}|\[|\]|;|,)"),
+    ]
+
+
+if __name__ == "__main__":
+    lexer = compile_lexer(cminus_specs(), skip=("WHITESPACE", "COMMENT"))
+    print(f"{lexer.state_count} states, {len(lexer.table)} table entries", file=sys.stderr)
+    filename = sys.argv[1] if len(sys.argv) > 1 else "input.txt"
+    with open(filename, "rb") as f:
+        for name, lexeme, line in lexer.tokens(f.read()):
+            print(line, name or "ERROR", lexeme)
@@ -4,13 +4,6 @@ import re
 # stdnum: 40131383
 # resources: Chatgpt, Copilot, Slides and Compilers, principles, techniques and tools by Aho, Sethi and Ullman
 
-"""Reads the content of a file and returns it as a string."""
-def getfile(filename) -> str:
-    with open(filename) as f:
-        code = f.read()
-    return code
-
-
 """Writes the given lines to a file. If the lines are empty, writes the empty_message instead."""
 def writefile(name: str, lines, empty_message):
     empty = True
@@ -24,211 +17,293 @@ def writefile(name: str, lines, empty_message):
             f.write(empty_message)
 
 
-"""Regex patterns for identifying invalid inputs, identifiers, numbers and comments
-Invalid input:
-    This regex pattern is used to match invalid inputs, including:
-        - '//'
-        - Invalid characters (e.g., special characters, symbols) like ~ and ^  matches-> '^' 'abc^'
-        - Things like cd!e matches-> 'cdie' 'cd!' 'cd!e' not matches-> 'cd!= 1' 'cd!= 1.0' 
-        - Things like 'return;;!' if ! is not followed by some \\s*[a-zA-Z0-9(=-]) matches-> '!' '!)' '!!' not matches-> '!=' '! =' '! abc'  
-        - For '! ='. matches-> '! =' not matches-> '! abc' 
-        - For handeling '/'. matches-> '/ +' '/ /' not matches-> '/ abc' '/ !1' '/ 1.0' 
-Invalid num:
-    this regex pattern is used to match invalid numbers, including:
-        - '123abc' '123@' '123#' '123$' '123%' '123\''
-Uncosed comment:
-    this regex pattern is used to match unclosed comments, including:
-        - '/* comment' 
-Unopened comment:
-    this regex pattern is used to match unopened comments, including:
-        - 'comment */'
+"""list of keywords"""
+KEYWORDS = "int bool void true false if else while until repeat break return".split(" ")
+
+"""Master pattern for the regex tokenizer, one named group per token class.
+The order of the alternatives matters:
+    - KEYWORD comes before ID, a word that starts with a keyword is a KEYWORD
+    - two character symbols come before one character symbols ('==' before '=')
+    - JUNK is the last resort, a character that can't start any token eats the rest of the input,
+      except a '&' or '|' that ends a line: the same character at the start of a later line
+      completes it to '&&' or '||', if only empty lines are in between
 """
-INVALID_INPUT = re.compile(
-    r"//|(a-z|A-Z|!|=|&|\||\*|\-|\+|<|>|/|\(|\)|{|}|\[|\]|;|,)*[~^`'\"\.@#\$%\\]|[a-zA-Z0-9]+!(?!=)|!(?!\s*[a-zA-Z0-9!(=-])|! (?!\s*[a-zA-Z0-9!(-])|/(?!\s*[a-zA-Z0-9!\(-])"
-)
-INVALID_NUM = re.compile(r"[0-9]+[A-Za-z@#\$%\\]")
-UNCLOSED_COMMENT = re.compile(r"/\*")
-UNOPENED_COMMENT = re.compile(r"\*/")
-
-"""Regex patterns for identifying valid inputs, identifiers, numbers, symbols and keywords"""
-ID = re.compile(r"[A-Za-z][A-Za-z0-9]*")
-NUM = re.compile(r"[0-9]+")
-KEYWORD = re.compile(
-    r"(int|void|if|else|while|return|repeat|until|break|bool|true|false|void)"
+TOKEN = re.compile(
+    r"(?P<NEWLINE>\n)"
+    r"|(?P<SPACE> +)"
+    r"|(?P<KEYWORD>(?:int|void|if|else|while|return|repeat|until|break|bool|true|false)[A-Za-z0-9]*)"
+    r"|(?P<ID>[A-Za-z][A-Za-z0-9]*)"
+    r"|(?P<NUM>[0-9]+)"
+    r"|(?P<SYMBOL>!=|==|&&|\|\||[!=*\-+/(){}\[\];,<>])"
+    r"|(?P<JUNK>[\s\S]+)"
 )
-SYMBOL = re.compile(r"(!|!=|==|=|&&|\|\||\*|\-|\+|<=|>=|<|>|/|\(|\)|{|}|\[|\]|;|,)")
 
-"""list of keywords"""
-KEYWORDS = "int bool void true false if else while until repeat break return".split(" ")
 
+"""Lexical errors, found on every line after the comments are removed, in this order:
+Unclosed comment:
+    a '/*' left after the closed comments are removed, the rest of the code is dropped
+Unopened comment:
+    a '*/', like 'comment */'
+Invalid input:
+    - '//'
+    - Invalid characters (e.g., special characters, symbols) like ~ and ^  matches-> '^' 'abc^'
+    - Things like cd!e matches-> 'cdie' 'cd!' 'cd!e' not matches-> 'cd!= 1' 'cd!= 1.0'
+    - Things like 'return;;!' if ! is not followed by some \\s*[a-zA-Z0-9(=-]) matches-> '!' '!)' '!!' not matches-> '!=' '! =' '! abc'
+    - For '! ='. matches-> '! =' not matches-> '! abc'
+    - For handeling '/'. matches-> '/ +' '/ /' not matches-> '/ abc' '/ !1' '/ 1.0'
+    which is exactly what this pattern matches:
+    //|(a-z|A-Z|!|=|&|\\||\\*|\\-|\\+|<|>|/|\\(|\\)|{|}|\\[|\\]|;|,)*[~^`'\"\\.@#\\$%\\\\]|[a-zA-Z0-9]+!(?!=)|
+    !(?!\\s*[a-zA-Z0-9!(=-])|! (?!\\s*[a-zA-Z0-9!(-])|/(?!\\s*[a-zA-Z0-9!\\(-])
+Invalid number:
+    digits followed by a letter or one of @#$%\\, like '123abc' '123@' '123#' '123$' '123%' '123\\'
+Each error is replaced with spaces before the next check.
+"""
 
+"""Characters used by the invalid input and invalid number scans"""
+ALNUM = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
+DIGITS = set("0123456789")
+OPERATORS = set("!=&|*-+<>/(){}[];,")  # single character members of the (a-z|A-Z|!|=|...)* group
+BAD_CHARS = set("~^`'\".@#$%\\")
+AFTER_NOT = ALNUM | set("!(=-")  # what may follow '!'
+AFTER_NOT_SPACE = ALNUM | set("!(-")  # what may follow '! '
+AFTER_SLASH = ALNUM | set("!(-")  # what may follow '/'
+AFTER_NUM = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ@#$%\\")
 
-"""Preprocesses the input code by removing comments and replacing other whitespace characters with spaces."""
-def preprocess(code: str) -> list:
-    def replace_with_spaces(match):  # Ensure that \n will not replace
-        comment = match.group(0)
-        return "".join("\n" if c == "\n" else " " for c in comment)
-
-    # Replace the comments with spaces
-    COMMENT = r"/\*[\s\S]*?\*/" # It will match everything between /* and */ but non-greedy
-    code = re.sub(COMMENT, replace_with_spaces, code)
-
-    # Replace other whitespace with space
-    OTHER_WHITESPACE = r"[\r\t\v\f]"
-    code = re.sub(OTHER_WHITESPACE, " ", code)
-
-    return code
-
-"""processes the invalid tokens in the code and returns a list of errors and the cleaned code."""
-def process_invalid(code: str):
-    lines = code.split("\n")
-    cleaned_lines = []
-    all_errors = []
-
-    """For each invalid token, we add the in output and replace the error part with spaces"""
-    def process_invalid_tokens(line, tokens, error_type):
-        output = [] # each error consist of a tuple (error_msg, position)
-        modified_line = line
-        for token in tokens: 
-            t = token.group(0) 
-            s, e = token.start(), token.end()
-            context_len = 7 # for showing in errors
-
-            if error_type == "Unclosed comment":
-                e = len(line)
-                snippet = line[s : s + context_len] # error message
-                output.append((f"({snippet}, {error_type})", s))
-                # Critical error, stop everything
-                return output,  modified_line[:s] + " " * (e - s) + modified_line[e:], True
-            elif error_type == "Unopened comment":
-                snippet = line[max(s - context_len, 0) : s + 2]
-                output.append((f"({snippet}, {error_type})", s))
-            else: # Invalid number or input
-                output.append((f"({t}, {error_type})", s))
-
-            modified_line = modified_line[:s] + " " * (e - s) + modified_line[e:]
-        return output, modified_line, False
-    
-    """Finds invalid tokens in a line and process them."""
-    def process_line(line):
-        errors = []
-        updated_line = line
-        should_abort = False
-
-        patterns = [
-            (UNCLOSED_COMMENT, "Unclosed comment"),
-            (UNOPENED_COMMENT, "Unopened comment"),
-            (INVALID_INPUT, "Invalid input"),
-            (INVALID_NUM, "Invalid number")
-        ]
-        for pattern, error_type in patterns:
-            matches = list(pattern.finditer(updated_line)) # Find invalid tokens matching the pattern 
-            if matches:
-                found_errors, updated_line, abort = process_invalid_tokens(updated_line, matches, error_type)
-                errors.extend(found_errors)
-                # if there are any unclosed comment, don't look for other errors. 
-                if abort:
-                    should_abort = True
-                    break
 
-        errors.sort(key=lambda x: x[1]) # Sort errors by their position in the line
-        return errors, updated_line, should_abort
+"""Returns the (start, end) spans of the invalid inputs in the line, in O(n).
+Matching the pattern backtracks over the operator group on every start position, here the
+end of the operator run, the end of the alnum run and the next non space character are
+computed once from right to left, so each alternative is checked in O(1)."""
+def find_invalid_input(line: str) -> list:
+    n = len(line)
+    run_end = [n] * (n + 1) # end of the (a-z|A-Z|!|=|...)* run starting at i
+    alnum_end = [n] * (n + 1) # end of the [a-zA-Z0-9]+ run starting at i
+    next_nonspace = [n] * (n + 2) # first position >= i that is not whitespace
+    for i in range(n - 1, -1, -1):
+        c = line[i]
+        if line.startswith("a-z", i) or line.startswith("A-Z", i):
+            run_end[i] = run_end[i + 3]
+        elif c in OPERATORS:
+            run_end[i] = run_end[i + 1]
+        else:
+            run_end[i] = i
+        alnum_end[i] = alnum_end[i + 1] if c in ALNUM else i
+        next_nonspace[i] = next_nonspace[i + 1] if c.isspace() else i
 
-    for line in lines:
-        errors, cleaned_line, abort = process_line(line)
-        all_errors.append(" ".join([error_msg for error_msg, _ in errors]))
-        cleaned_lines.append(cleaned_line)
-        if abort: # if there is an unclosed comment, stop processing the rest of the code
-            break
+    def followed_by(k, allowed): # (?!\s*[allowed]) starting at k
+        k = next_nonspace[k]
+        return k < n and line[k] in allowed
 
-    cleaned_code = '\n'.join(cleaned_lines) + ' \n'
-    return all_errors, cleaned_code
-
-
-"""This function generates tokens from the input code"""
-def getNextToken(code):
-    pos = 0
-    line_number = 1
-
-    # Return the next character from the code and increment the position
-    def getchar(): 
-        nonlocal pos
-        if pos == len(code):
-            return None
-        c = code[pos]
-        pos += 1
-        return c
-
-    t = "" # processing token
-    while True:
-        if SYMBOL.match(t):
-            if t in ("!", "="): #lookahead for != and ==
-                lookahead = getchar()
-                if lookahead == "=":
-                    yield f"(SYMBOL, {t + lookahead})", line_number
-                    t = ""
-                else:
-                    pos -= 1
-                    yield f"(SYMBOL, {t})", line_number
-                    t = ""
-            else :
-                yield f"(SYMBOL, {t})", line_number
-                t = ""
-        elif KEYWORD.match(t):
-            lookahead = getchar()
-            pos -= 1
-            if not re.match(r'[a-zA-Z0-9]',lookahead): 
-                yield f"(KEYWORD, {t})", line_number
-                t = ""
-        elif ID.match(t):
-            lookahead = getchar()
-            pos -= 1
-            if not re.match(r'[A-Za-z0-9]',lookahead):
-                yield f"(ID, {t})", line_number
-                t = ""
-        elif NUM.match(t):
-            lookahead = getchar()
-            pos -= 1
-            if not re.match(r'[0-9]',lookahead):
-                yield f"(NUM, {t})", line_number
-                t = ""
-        next_char = getchar()
-        if not next_char:
-            yield "FIN", line_number
-            return
-        elif next_char == "\n":
-            line_number += 1
-        elif next_char == " " and len(t) == 0: # ignore leading spaces 
-            pass
+    spans = []
+    p = 0
+    while p < n:
+        c = line[p]
+        end = None
+        q = run_end[p]
+        if c == "/" and line.startswith("/", p + 1):  # //
+            end = p + 2
+        elif q < n and line[q] in BAD_CHARS:  # (a-z|A-Z|!|...)*[~^...]
+            end = q + 1
+        else:
+            q = alnum_end[p]
+            if q > p and q < n and line[q] == "!" and not line.startswith("=", q + 1):  # [a-zA-Z0-9]+!(?!=)
+                end = q + 1
+            elif c == "!" and not followed_by(p + 1, AFTER_NOT):
+                end = p + 1
+            elif c == "!" and line.startswith(" ", p + 1) and not followed_by(p + 2, AFTER_NOT_SPACE):
+                end = p + 2
+            elif c == "/" and not followed_by(p + 1, AFTER_SLASH):
+                end = p + 1
+        if end is None:
+            p += 1
         else:
-            t += next_char # Add new character to the token
+            spans.append((p, end))
+            p = end
+    return spans
 
 
-if __name__ == "__main__":
-    code = getfile("input.txt")
-    code = preprocess(code)
+"""Returns the (start, end) spans of the invalid numbers in the line, in O(n)."""
+def find_invalid_num(line: str) -> list:
+    n = len(line)
+    spans = []
+    p = 0
+    while p < n:
+        if line[p] not in DIGITS:
+            p += 1
+            continue
+        q = p
+        while q < n and line[q] in DIGITS:
+            q += 1
+        if q < n and line[q] in AFTER_NUM:
+            spans.append((p, q + 1))
+            q += 1
+        p = q # no match can start inside the digit run
+    return spans
 
-    errors, correct_code = process_invalid(code)
-    tokens = [""]
-    symbols = set(KEYWORDS) # Initialize the symbol table with keywords
-    line_number = 1
-    getToken = getNextToken(correct_code)
-    while True:
-        token ,token_line_number = next(getToken) # Get the next token and line number
-        if token == "FIN":
+
+"""Returns the (start, end) spans of the non overlapping '*/' in the line."""
+def find_unopened_comments(line: str) -> list:
+    spans = []
+    s = line.find("*/")
+    while s != -1:
+        spans.append((s, s + 2))
+        s = line.find("*/", s + 2)
+    return spans
+
+
+"""Replaces the given sorted, non overlapping spans of the line with spaces in one join."""
+def blank_spans(line: str, spans) -> str:
+    if not spans:
+        return line
+    parts = []
+    last = 0
+    for s, e in spans:
+        parts.append(line[last:s])
+        parts.append(" " * (e - s))
+        last = e
+    parts.append(line[last:])
+    return "".join(parts)
+
+
+"""Finds the lexical errors in a line, returns the errors, the line with the errors replaced
+by spaces and whether there was an unclosed comment (then the rest of the code is dropped).
+The checks run in the order listed above, each sees the line after the previous ones were
+blanked out."""
+def process_line(line: str):
+    context_len = 7 # for showing in errors
+    s = line.find("/*")
+    if s != -1: # Critical error, stop everything
+        return [f"({line[s : s + context_len]}, Unclosed comment)"], line[:s] + " " * (len(line) - s), True
+
+    errors = [] # each error consist of a tuple (position, error_msg)
+    spans = find_unopened_comments(line)
+    errors += [(s, f"({line[max(s - context_len, 0) : s + 2]}, Unopened comment)") for s, _ in spans]
+    line = blank_spans(line, spans)
+
+    spans = find_invalid_input(line)
+    errors += [(s, f"({line[s:e]}, Invalid input)") for s, e in spans]
+    line = blank_spans(line, spans)
+
+    spans = find_invalid_num(line)
+    errors += [(s, f"({line[s:e]}, Invalid number)") for s, e in spans]
+    line = blank_spans(line, spans)
+
+    errors.sort(key=lambda x: x[0]) # Sort errors by their position in the line
+    return [error_msg for _, error_msg in errors], line, False
+
+
+"""Other whitespace characters are replaced with space"""
+OTHER_WHITESPACE = str.maketrans("\r\t\v\f", "    ")
+
+
+"""Reads the lines of the source and yields them without comments and other whitespace.
+Closed comments are replaced with spaces (the lines inside a comment are yielded as empty lines),
+an unclosed comment is left as it is and nothing after its line is yielded."""
+def clean_lines(source):
+    ends_with_newline = True # an empty source is still one (empty) line
+    opened = None # (line before '/*', text from '/*' to the end of the line) of an open comment
+    inside = 0 # number of lines inside the open comment
+    for raw in source:
+        ends_with_newline = raw.endswith("\n")
+        line = raw[:-1] if ends_with_newline else raw
+        line = line.translate(OTHER_WHITESPACE)
+
+        parts = [] # the cleaned line
+        pos = 0
+        if opened is not None: # we are inside a comment that started on a previous line
+            e = line.find("*/")
+            if e == -1:
+                inside += 1
+                continue
+            yield opened[0] + " " * len(opened[1])
+            for _ in range(inside):
+                yield ""
+            opened, inside = None, 0
+            parts.append(" " * (e + 2))
+            pos = e + 2
+
+        while True:
+            s = line.find("/*", pos)
+            if s == -1:
+                parts.append(line[pos:])
+                break
+            parts.append(line[pos:s])
+            e = line.find("*/", s + 2)
+            if e == -1: # the comment goes on in the next lines
+                opened = ("".join(parts), line[s:])
+                break
+            parts.append(" " * (e + 2 - s))
+            pos = e + 2
+        if opened is None:
+            yield "".join(parts)
+
+    if opened is not None: # unclosed comment, the line keeps its '/*'
+        yield opened[0] + opened[1]
+    elif ends_with_newline:
+        yield ""
+
+
+"""This function generates the lexical errors and the tokens of the source in one pass.
+Every line is cleaned by clean_lines, its errors are found and blanked out by process_line
+and the rest is matched with TOKEN. It yields ("ERROR", errors, line) for every line with
+lexical errors, then (type, lexeme, line) for every token of the line, and ("FIN", line)
+after the last line. Once a JUNK match is found no more tokens are generated."""
+def scan(source):
+    line_number = 0
+    swallowed = False # JUNK found, the tokens end there
+    pending = None # a '&' or '|' that ended a line, the first half of a '&&' or '||'
+    for line in clean_lines(source):
+        line_number += 1
+        errors, line, abort = process_line(line)
+        if errors:
+            yield "ERROR", " ".join(errors), line_number
+        start = 0
+        if pending is not None and not swallowed:
+            if line.startswith(pending): # the symbol is on the line of its second half
+                yield "SYMBOL", pending * 2, line_number
+                pending, start = None, 1
+            elif line: # only empty lines may come between the halves
+                swallowed = True
+        if not swallowed and pending is None:
+            for match in TOKEN.finditer(line, start):
+                kind = match.lastgroup
+                if kind == "JUNK":
+                    if match.group() in ("&", "|"): # the rest of the line, it may go on in a later one
+                        pending = match.group()
+                    else:
+                        swallowed = True
+                    break
+                if kind != "SPACE":
+                    yield kind, match.group(), line_number
+        if abort: # unclosed comment, the rest of the code is dropped
             break
-        if line_number != token_line_number:
-            while line_number != token_line_number-1: # Add empty lines for the missing lines
-                tokens.append('')
-                line_number+=1
-            tokens.append(token + " ")
-            line_number += 1
-        else:
-            tokens[line_number - 1] += token + " "
-        if token.startswith("(ID, "): # Add identifiers to the symbol table
-            symbols.add(token[5:-1])
+    yield "FIN", line_number + 1
+
 
+if __name__ == "__main__":
+    symbols = set(KEYWORDS) # Initialize the symbol table with keywords
+    no_errors = no_tokens = True
+    with open("input.txt") as f, open("lexical_errors.txt", "w") as errors_file, open("tokens.txt", "w") as tokens_file:
+        line_tokens, line_number = "", 0
+        for item in scan(f): # errors and tokens come line by line, in one pass over the input
+            kind = item[0]
+            if kind == "ERROR":
+                errors_file.write(f"{item[2]}.\t{item[1]}\n")
+                no_errors = False
+                continue
+            if kind == "FIN" or item[2] != line_number: # the tokens of the previous line are complete
+                if line_tokens:
+                    tokens_file.write(f"{line_number}.\t{line_tokens}\n")
+                    no_tokens = False
+                if kind == "FIN":
+                    break
+                line_tokens, line_number = "", item[2]
+            line_tokens += f"({kind}, {item[1]}) "
+            if kind == "ID": # Add identifiers to the symbol table
+                symbols.add(item[1])
+        if no_errors:
+            errors_file.write("There is no lexical error.")
+        if no_tokens:
+            tokens_file.write("There is no token")
 
-    writefile("lexical_errors.txt", errors, "There is no lexical error.")
-    writefile("tokens.txt", tokens, "There is no token")
     writefile("symbol_table.txt",symbols,"There is no symbol")